@@ -3,53 +3,93 @@ ContinualTrainer – Phase-101
 ----------------------------
 Guardian-supervised continual learning manager for Astra Intelligence.
 Supports incremental updates using ReplayBuffer and NeuralAgent.
+
+seed_synthetic=True fills a throwaway in-memory buffer with random
+samples (smoke tests); the persisted astra_replay/ buffer only ever
+holds real experience.
+
+Each successful step saves the agent's weights as a new ModelRegistry
+version under MODEL_NAME (NeuralAgent.save_trained; promoted unless
+the promoted version validated better). Synthetic runs save nothing.
 """
 
-import os
 import random
+from pathlib import Path
+
+import numpy as np
 import torch
 import torch.nn as nn
-from collections import deque
+
+from astra_modules.learning.replay_buffer import ReplayBuffer as _ArrayReplayBuffer
+from astra_modules.learning.epoch_trainer import BATCH_SIZE, fit, format_report
+
+
+REPLAY_FILE = "astra_replay/agent_replay.bin"
+INPUT_SIZE = 32
+MODEL_NAME = "remote_agent"     # registry name (not AstraPrime's 12-feature neural_agent)
+
+
+def _get_replay_path() -> Path:
+    """File backing the agent trainer's replay buffer, astra_replay/agent_replay.bin."""
+    return Path(__file__).resolve().parents[2] / REPLAY_FILE
 
 
 class ReplayBuffer:
-    """Simple replay buffer for continual learning."""
+    """
+    (x, y) replay for continual learning, memory-mapped under
+    astra_replay/ so samples survive restarts and can be appended
+    by other processes. y (regression target) is kept in the
+    outcome column.
+    """
 
-    def __init__(self, capacity=5000):
-        self.buffer = deque(maxlen=capacity)
+    def __init__(self, capacity=5000, path=None, input_size=INPUT_SIZE, persist=True):
+        path = (path or _get_replay_path()) if persist else None
+        self.buffer = _ArrayReplayBuffer(capacity, feature_dim=input_size, path=path)
 
     def add(self, x, y):
-        self.buffer.append((x, y))
+        self.buffer.add(x, 0.0, float(np.ravel(y)[0]))
 
     def sample(self, batch_size=32):
-        batch = random.sample(self.buffer, min(len(self.buffer), batch_size))
-        x, y = zip(*batch)
-        return list(x), list(y)
+        batch = self.buffer.sample(batch_size)
+        return batch.features, batch.outcomes[:, None]
+
+    def all(self):
+        batch = self.buffer.snapshot()
+        return batch.features, batch.outcomes[:, None]
 
     def size(self):
-        return len(self.buffer)
+        return self.buffer.size()
 
 
 class ContinualTrainer:
     """Handles Guardian-protected continual training."""
 
-    def __init__(self, guardian, agent=None):
+    def __init__(self, guardian, agent=None, buffer=None, seed_synthetic=False, model_name=MODEL_NAME):
         self.guardian = guardian
         self.agent = agent
-        self.buffer = ReplayBuffer()
-        self.guardian._write_log("📚 ContinualTrainer initialized (Phase-101).")
+        self.last_report = None
+        self.model_name = None if seed_synthetic else model_name
+
+        if seed_synthetic:
+            # Random samples for testing — kept out of the persisted buffer
+            self.buffer = buffer or ReplayBuffer(persist=False)
+            for _ in range(100):
+                x = [random.random() for _ in range(INPUT_SIZE)]
+                y = [sum(x) / len(x)]
+                self.buffer.add(x, y)
+        else:
+            self.buffer = buffer or ReplayBuffer()
 
-        # Fill buffer with synthetic samples for testing
-        for _ in range(100):
-            x = [random.random() for _ in range(32)]
-            y = [sum(x) / len(x)]
-            self.buffer.add(x, y)
+        self.guardian._write_log("📚 ContinualTrainer initialized (Phase-101).")
 
     # ------------------------------------------------------------------
 
-    def step(self, iterations=5, batch_size=32):
-        """Run incremental learning for a number of iterations."""
-        self.guardian._write_log(f"🚀 ContinualTrainer step started ({iterations} iterations).")
+    def step(self, iterations=5, batch_size=BATCH_SIZE, num_threads=None):
+        """
+        Run up to `iterations` epochs of shuffled mini-batches over the
+        whole buffer, early-stopped on a held-out slice.
+        """
+        self.guardian._write_log(f"🚀 ContinualTrainer step started (≤{iterations} epochs).")
 
         if not self.agent:
             self.guardian._write_log("⚠️ No agent provided – skipping training.")
@@ -59,13 +99,35 @@ class ContinualTrainer:
             self.guardian._write_log("⚠️ ReplayBuffer empty – no training data available.")
             return
 
-        for i in range(iterations):
-            x_batch, y_batch = self.buffer.sample(batch_size)
-            loss = self.agent.train_step(x_batch, y_batch)
-            if loss is not None:
-                self.guardian._write_log(f"📉 Iteration {i+1}/{iterations}: loss={loss:.6f}")
-            else:
-                self.guardian._write_log(f"⚠️ Iteration {i+1}/{iterations} failed – skipping.")
+        x, y = self.buffer.all()
+        try:
+            # A registry-loaded (shared, read-only) model → private copy
+            if hasattr(self.agent, "make_trainable"):
+                self.agent.make_trainable()
+            report = fit(
+                self.agent.model, x, y,
+                optimizer=getattr(self.agent, "optimizer", None),
+                criterion=getattr(self.agent, "criterion", None),
+                epochs=iterations,
+                batch_size=batch_size,
+                num_threads=num_threads,
+            )
+        except Exception as e:
+            self.guardian._write_log(f"⚠️ Training failed – {e}")
+            return
 
+        # Cached predictions are keyed on the model version
+        if hasattr(self.agent, "model_version"):
+            self.agent.model_version += 1
+        if hasattr(self.agent, "checkpoint"):
+            self.agent.checkpoint = None
+        self.last_report = report
+
+        self.guardian._write_log(f"📉 {format_report(report)}")
+        if self.model_name and hasattr(self.agent, "save_trained"):
+            try:
+                self.agent.save_trained(report, name=self.model_name)
+            except Exception as e:
+                self.guardian._write_log(f"⚠️ Checkpoint save failed – {e}")
         self.guardian._write_log("✅ ContinualTrainer step completed successfully.")
-
+        return report
@@ -7,6 +7,11 @@ Astra’s central intelligence layer:
 - Supports hybrid learning and multi-agent scoring
 """
 
+import numpy as np
+
+from astra_modules.engine.score_matrix import to_scalar, weight_vector
+
+
 class AstraPrime:
     def __init__(self, agents, replay_buffer=None, paper_trader=None):
         """
@@ -67,19 +72,18 @@ class AstraPrime:
     # -----------------------------------------------------------
     def aggregate(self, data_bundle):
         outputs = {}
-        weighted_sum = 0
-        total_weight = 0
 
         for name, agent in self.agents.items():
             agent_data = data_bundle.get(name)
-            out = self.safe_compute(agent, name, agent_data)
-            outputs[name] = out
+            outputs[name] = self.safe_compute(agent, name, agent_data)
 
-            w = self.weights.get(name, 0)
-            weighted_sum += out["score"] * w
-            total_weight += w
+        # Agent score row · weight vector
+        names = list(outputs)
+        row = np.array([to_scalar(outputs[n]["score"], 50) for n in names], dtype=float)
+        w = weight_vector(self.weights, names)
+        total_weight = w.sum()
 
-        final_score = weighted_sum / total_weight if total_weight else 50
+        final_score = float(row @ w / total_weight) if total_weight else 50
         final_score = max(0, min(100, final_score))
 
         # Convert numeric → grade
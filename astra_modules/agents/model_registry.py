@@ -0,0 +1,315 @@
+"""
+model_registry.py — Phase-100
+
+Versioned model checkpoints under astra_models/<name>/.
+
+ • astra_models/<name>/v000001/  weights.npy  (all tensors, one flat
+   float32 array) + meta.json (layout, dims, feature schema hash,
+   metrics, checksum)
+ • a version directory is written under a temp name and renamed into
+   place — readers never see a half-written checkpoint
+ • promote(name, version) atomically replaces CURRENT.json; load()
+   without a version returns the promoted one (else the newest)
+ • load() memory-maps weights.npy (copy-on-write) and caches the
+   tensors per (name, version): every agent in the process shares one
+   deserialized weight set, and worker processes loading the same
+   version share the same page-cache pages
+ • prune() keeps the newest KEEP_VERSIONS (+ the promoted one)
+
+Framework-agnostic: callers hand in / get back {param: ndarray}
+(NeuralAgent converts to and from torch state_dicts).
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+
+MODEL_DIR = "astra_models"
+WEIGHTS_FILE = "weights.npy"
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT.json"
+
+KEEP_VERSIONS = 10
+MAX_CACHED = 8          # (name, version) weight sets kept mapped
+
+_VERSION_RE = re.compile(r"^v(\d{6})$")
+
+
+class ModelRegistryError(Exception):
+    """Missing checkpoint, or metadata incompatible with the caller."""
+
+
+# -----------------------------------------------------------
+# Internal helpers
+# -----------------------------------------------------------
+
+def _get_model_root() -> Path:
+    """Registry root, astra_models/: one directory per model with vNNNNNN versions and CURRENT.json."""
+    return Path(__file__).resolve().parents[2] / MODEL_DIR
+
+
+def _atomic_write(path: Path, payload: dict) -> None:
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def schema_hash(features):
+    """Stable hash of an ordered feature list (None → None)."""
+    if not features:
+        return None
+    return hashlib.blake2b("\n".join(map(str, features)).encode(), digest_size=8).hexdigest()
+
+
+def flatten_state(state):
+    """{name: array} → (flat float32 array, layout [{name, shape, dtype, offset}])."""
+    layout, parts, offset = [], [], 0
+    for key, value in state.items():
+        arr = np.asarray(value)
+        layout.append({"name": key, "shape": list(arr.shape), "dtype": arr.dtype.str, "offset": offset})
+        parts.append(arr.astype(np.float32, copy=False).ravel())
+        offset += arr.size
+    flat = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    return flat, layout
+
+
+def unflatten_state(flat, layout):
+    """Views into `flat` (no copy for float32 tensors)."""
+    state = OrderedDict()
+    for entry in layout:
+        shape = tuple(entry["shape"])
+        size = int(np.prod(shape, dtype=np.int64))
+        view = flat[entry["offset"]:entry["offset"] + size].reshape(shape)
+        dtype = np.dtype(entry["dtype"])
+        state[entry["name"]] = view if dtype == np.float32 else view.astype(dtype)
+    return state
+
+
+# ===========================================================
+# REGISTRY
+# ===========================================================
+
+class ModelRegistry:
+    def __init__(self, root=None, keep=KEEP_VERSIONS, max_cached=MAX_CACHED):
+        self.root = Path(root) if root else _get_model_root()
+        self.keep = keep
+        self.max_cached = max(1, int(max_cached))
+
+        self._lock = threading.RLock()
+        self._cache = OrderedDict()     # (name, version) -> (state, meta)
+        self.hits = 0
+        self.misses = 0
+
+    def _model_dir(self, name) -> Path:
+        d = self.root / name
+        d.mkdir(parents=True, exist_ok=True)
+        return d
+
+    def _version_dir(self, name, version) -> Path:
+        return self.root / name / f"v{int(version):06d}"
+
+    # ---------------------------------------------------------
+    # VERSIONS
+    # ---------------------------------------------------------
+    def list_versions(self, name) -> list:
+        d = self.root / name
+        if not d.is_dir():
+            return []
+        out = []
+        for p in d.iterdir():
+            m = _VERSION_RE.match(p.name)
+            if m and (p / META_FILE).exists():
+                out.append(int(m.group(1)))
+        return sorted(out)
+
+    def latest_version(self, name):
+        versions = self.list_versions(name)
+        return versions[-1] if versions else None
+
+    def current_version(self, name):
+        """Promoted version (None if nothing was promoted)."""
+        try:
+            with (self.root / name / CURRENT_FILE).open("r", encoding="utf-8") as f:
+                version = json.load(f).get("version")
+        except (OSError, ValueError):
+            return None
+        return int(version) if version is not None else None
+
+    def resolve(self, name, version=None) -> int:
+        """Explicit version, else promoted, else newest."""
+        if version is None:
+            version = self.current_version(name) or self.latest_version(name)
+        if version is None or not (self._version_dir(name, version) / META_FILE).exists():
+            raise ModelRegistryError(f"{name}: no checkpoint {version if version else 'registered'}")
+        return int(version)
+
+    def metadata(self, name, version=None) -> dict:
+        version = self.resolve(name, version)
+        with (self._version_dir(name, version) / META_FILE).open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ---------------------------------------------------------
+    # SAVE / PROMOTE
+    # ---------------------------------------------------------
+    def save(self, name, state, meta=None, metrics=None, promote=False) -> int:
+        """
+        Write a new checkpoint; returns its version.
+
+        state:   {param name: array}
+        meta:    dims / feature_schema / anything JSON-serializable
+        metrics: evaluation numbers to keep next to the weights
+        """
+        flat, layout = flatten_state(state)
+        d = self._model_dir(name)
+        tmp = d / f".v.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+
+        weights = tmp / WEIGHTS_FILE
+        np.save(weights, flat)
+
+        record = dict(meta or {})
+        if record.get("feature_schema") and not record.get("schema_hash"):
+            record["schema_hash"] = schema_hash(record["feature_schema"])
+        record.update({
+            "name": name,
+            "created_at": time.time(),
+            "metrics": dict(metrics or {}),
+            "layout": layout,
+            "parameters": int(flat.size),
+            "checksum": _file_digest(weights),
+        })
+
+        # Claim the next free version by renaming the finished directory
+        # into place (fails if another writer took it → try the next one)
+        with self._lock:
+            version = (self.latest_version(name) or 0) + 1
+            while True:
+                record["version"] = version
+                _atomic_write(tmp / META_FILE, record)
+                try:
+                    os.rename(tmp, self._version_dir(name, version))
+                    break
+                except OSError:
+                    if not self._version_dir(name, version).exists():
+                        raise
+                    version += 1
+
+        if promote:
+            self.promote(name, version)
+        self.prune(name)
+        print(f"[model_registry] {name} v{version} saved ({flat.size} params)")
+        return version
+
+    def promote(self, name, version):
+        """Atomically point CURRENT at `version`."""
+        version = self.resolve(name, version)
+        previous = self.current_version(name)
+        _atomic_write(self._model_dir(name) / CURRENT_FILE, {
+            "version": version,
+            "previous": previous,
+            "promoted_at": time.time(),
+        })
+        was = f"v{previous}" if previous else "none"
+        print(f"[model_registry] {name} v{version} promoted (was {was})")
+        return version
+
+    def prune(self, name):
+        if not self.keep:
+            return
+        current = self.current_version(name)
+        versions = self.list_versions(name)
+        for v in versions[:-self.keep]:
+            if v == current:
+                continue
+            with self._lock:
+                self._cache.pop((name, v), None)
+            shutil.rmtree(self._version_dir(name, v), ignore_errors=True)
+
+    # ---------------------------------------------------------
+    # LOAD (cached, memory-mapped)
+    # ---------------------------------------------------------
+    def load(self, name, version=None, expect=None, verify=False):
+        """
+        (state, meta) for a checkpoint. Repeated loads of the same
+        version return the same arrays (no re-read, no copy).
+
+        expect: {meta key: value} the checkpoint must match (None
+                values and keys missing from the metadata are skipped)
+        verify: re-hash weights.npy against the stored checksum
+        """
+        version = self.resolve(name, version)
+        key = (name, version)
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                entry = self._read(name, version, verify)
+                self._cache[key] = entry
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+
+        state, meta = entry
+        for k, want in (expect or {}).items():
+            have = meta.get(k)
+            if want is not None and have is not None and have != want:
+                raise ModelRegistryError(f"{name} v{version}: {k}={have!r}, expected {want!r}")
+        return state, meta
+
+    def _read(self, name, version, verify):
+        d = self._version_dir(name, version)
+        with (d / META_FILE).open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if verify and _file_digest(d / WEIGHTS_FILE) != meta.get("checksum"):
+            raise ModelRegistryError(f"{name} v{version}: checksum mismatch")
+        # mmap_mode="c": pages come from the shared page cache; writes
+        # (if a caller ever mutates a tensor) stay private to the process
+        flat = np.load(d / WEIGHTS_FILE, mmap_mode="c")
+        return unflatten_state(flat, meta["layout"]), meta
+
+    def cache_stats(self) -> dict:
+        with self._lock:
+            return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# -------------------------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------------------------
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Process-wide registry (shared load cache)."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ModelRegistry()
+        return _default_registry
@@ -3,13 +3,36 @@ NeuralAgent – Phase-101
 -----------------------
 A Guardian-protected neural network agent for Astra Intelligence.
 Automatically initializes input/output dimensions and logs all events.
+
+Checkpoints live in the versioned ModelRegistry (agents/model_registry):
+save() writes a new version, load() restores the promoted one.
+Trainers call save_trained() after each run: the new version is
+promoted unless the promoted one had a lower validation loss.
+load(shared=True) hands every caller the same read-only NeuralNet whose
+parameters alias the registry's memory-mapped weights — ensemble members
+and inference workers don't each deserialize a copy.
 """
 
+import copy
 import os
+import threading
+from pathlib import Path
+
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
 
+from astra_modules.agents.model_registry import ModelRegistryError, get_registry, schema_hash
+
+
+MODEL_NAME = "neural_agent"
+LEGACY_FILE = "neural_agent.pt"     # pre-registry single checkpoint
+
+# (registry root, name, version, device) -> shared inference NeuralNet
+_SHARED_MODELS = {}
+_SHARED_LOCK = threading.Lock()
+
 
 class NeuralNet(nn.Module):
     """Lightweight neural network architecture."""
@@ -28,24 +51,62 @@ class NeuralNet(nn.Module):
         return self.model(x)
 
 
+class _QuietGuardian:
+    """Stand-in when no guardian is passed (AstraPrime, inference workers)."""
+
+    def _write_log(self, *args, **kwargs):
+        pass
+
+
+def _shared_model(registry, name, state, meta, device):
+    """One eval-mode NeuralNet per checkpoint, parameters aliasing the mmap."""
+    key = (str(registry.root), name, meta["version"], str(device))
+    with _SHARED_LOCK:
+        model = _SHARED_MODELS.get(key)
+        if model is None:
+            model = NeuralNet(meta["input_size"], meta["hidden_size"], meta["output_size"])
+            tensors = {k: torch.from_numpy(v) for k, v in state.items()}
+            try:
+                model.load_state_dict(tensors, assign=True)   # no copy (torch ≥ 2.1)
+            except TypeError:
+                model.load_state_dict(tensors)
+            model = model.to(device).eval().requires_grad_(False)
+            _SHARED_MODELS[key] = model
+        return model
+
+
 class NeuralAgent:
     """Guardian-supervised neural model for Astra."""
 
-    def __init__(self, guardian, input_size=32, hidden_size=64, output_size=1):
-        self.guardian = guardian
+    def __init__(self, guardian=None, input_size=32, hidden_size=64, output_size=1,
+                 feature_schema=None, registry=None):
+        self.guardian = guardian or _QuietGuardian()
         self.guardian._write_log("🧠 Initializing NeuralAgent...")
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+        self.input_size = input_size
+        self.hidden_size = hidden_size
+        self.output_size = output_size
+        self.feature_schema = list(feature_schema) if feature_schema else None
+        self.registry = registry
+
         self.model = NeuralNet(input_size, hidden_size, output_size).to(self.device)
         self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
         self.criterion = nn.MSELoss()
 
+        # Bumped after every weight update (invalidates cached predictions)
+        self.model_version = 0
+        # Registry version the weights came from / were saved as
+        self.checkpoint = None
+        self.shared = False
+
         self.guardian._write_log(f"✅ NeuralAgent initialized on {self.device} (Phase-101).")
 
     # ------------------------------------------------------------------
 
     def train_step(self, x_batch, y_batch):
         """Single training step."""
+        self.make_trainable()
         try:
             x = torch.tensor(x_batch, dtype=torch.float32, device=self.device)
             y = torch.tensor(y_batch, dtype=torch.float32, device=self.device)
@@ -55,6 +116,8 @@ class NeuralAgent:
             loss = self.criterion(output, y)
             loss.backward()
             self.optimizer.step()
+            self.model_version += 1
+            self.checkpoint = None      # weights no longer match a saved version
 
             loss_val = loss.item()
             self.guardian._write_log(f"📉 Training step complete (loss={loss_val:.6f})")
@@ -78,3 +141,112 @@ class NeuralAgent:
             self.guardian._write_log(f"⚠️ Prediction error: {e}")
             return None
 
+    # ------------------------------------------------------------------
+    # CHECKPOINTS (ModelRegistry)
+    # ------------------------------------------------------------------
+
+    def _registry(self):
+        return self.registry or get_registry()
+
+    def metadata(self) -> dict:
+        return {
+            "architecture": "NeuralNet",
+            "input_size": self.input_size,
+            "hidden_size": self.hidden_size,
+            "output_size": self.output_size,
+            "feature_schema": self.feature_schema,
+            "schema_hash": schema_hash(self.feature_schema),
+        }
+
+    def save(self, metrics=None, promote=False, name=MODEL_NAME):
+        """Write the current weights as a new registry version."""
+        state = {k: v.detach().cpu().numpy() for k, v in self.model.state_dict().items()}
+        version = self._registry().save(name, state, meta=self.metadata(), metrics=metrics, promote=promote)
+        self.checkpoint = version
+        self.guardian._write_log(f"💾 NeuralAgent saved as {name} v{version}.")
+        return version
+
+    def save_trained(self, report, name=MODEL_NAME):
+        """
+        Save the weights after a training run (epoch_trainer report as
+        metrics) and promote them unless the promoted version of the
+        same architecture validated better. Returns the saved version.
+        """
+        metrics = {k: v for k, v in report.items() if v is None or isinstance(v, (bool, int, float, str))}
+        return self.save(metrics=metrics, promote=self._improves(name, metrics.get("val_loss")), name=name)
+
+    def _improves(self, name, val_loss):
+        registry = self._registry()
+        current = registry.current_version(name)
+        if current is None:
+            return True
+        try:
+            meta = registry.metadata(name, current)
+        except ModelRegistryError:
+            return True
+        if any(meta.get(k) != v for k, v in self.metadata().items() if k != "feature_schema"):
+            return True     # promoted checkpoint no longer loads into this agent
+        best = meta.get("metrics", {}).get("val_loss")
+        if val_loss is None:
+            return best is None     # never replaces a validated version
+        return best is None or val_loss <= best
+
+    def load(self, version=None, name=MODEL_NAME, shared=False):
+        """
+        Restore a registry checkpoint (promoted one by default).
+
+        shared=True → use the process-wide read-only model for this
+        version (inference); make_trainable() / the first train_step()
+        takes a private copy.
+        Returns the loaded version, or None if there is nothing compatible.
+        """
+        registry = self._registry()
+        if not registry.list_versions(name):
+            self._import_legacy(registry, name)
+
+        expect = {k: v for k, v in self.metadata().items() if k != "feature_schema"}
+        try:
+            state, meta = registry.load(name, version, expect=expect)
+        except ModelRegistryError as e:
+            self.guardian._write_log(f"⚠️ NeuralAgent load skipped: {e}")
+            return None
+
+        if shared:
+            self.model = _shared_model(registry, name, state, meta, self.device)
+        else:
+            self.model.load_state_dict({k: torch.from_numpy(np.array(v)) for k, v in state.items()})
+            self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
+        self.shared = shared
+        self.checkpoint = meta["version"]
+        self.model_version += 1
+        self.guardian._write_log(f"📦 NeuralAgent loaded {name} v{self.checkpoint}{' (shared)' if shared else ''}.")
+        return self.checkpoint
+
+    def make_trainable(self):
+        """
+        Swap a shared (read-only) model for a private trainable copy
+        with its own optimizer. Call before handing self.model /
+        self.optimizer to an external training loop; no-op otherwise.
+        """
+        if self.shared:
+            self.model = copy.deepcopy(self.model).requires_grad_(True).train()
+            self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
+            self.shared = False
+        return self
+
+    def _import_legacy(self, registry, name):
+        """Register astra_models/neural_agent.pt as v1 if it fits this architecture."""
+        legacy = Path(registry.root) / LEGACY_FILE
+        if name != MODEL_NAME or not legacy.exists():
+            return None
+        try:
+            state = torch.load(legacy, map_location="cpu", weights_only=True)
+            expected = {k: tuple(v.shape) for k, v in self.model.state_dict().items()}
+            if {k: tuple(v.shape) for k, v in state.items()} != expected:
+                self.guardian._write_log(f"⚠️ {LEGACY_FILE} does not match NeuralNet – not imported.")
+                return None
+            meta = dict(self.metadata(), source=LEGACY_FILE)
+            return registry.save(name, {k: v.numpy() for k, v in state.items()}, meta=meta, promote=True)
+        except Exception as e:
+            self.guardian._write_log(f"⚠️ Legacy checkpoint import failed: {e}")
+            return None
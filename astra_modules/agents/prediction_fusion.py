@@ -3,6 +3,9 @@ PredictionFusion – Astra Intelligence (Phase-100C)
 --------------------------------------------------
 Combines predictions from multiple NeuralAgents and
 outputs a single consensus forecast under GuardianV6.
+
+Members load the promoted ModelRegistry checkpoint with shared=True,
+so the ensemble holds one memory-mapped weight set, not one per agent.
 """
 
 import os
@@ -23,18 +26,19 @@ class PredictionFusion:
     """
     Loads and manages multiple NeuralAgents for ensemble predictions.
     """
-    def __init__(self, base_path=None, ensemble_size=3):
+    def __init__(self, base_path=None, ensemble_size=3, version=None):
         self.base_path = base_path or os.getcwd()
         self.guardian = GuardianV6(self.base_path)
         self.agents = []
         self.ensemble_size = ensemble_size
+        self.version = version
         self._init_agents()
         self.guardian._write_log("🤖 PredictionFusion initialized.")
 
     def _init_agents(self):
         for i in range(self.ensemble_size):
-            agent = NeuralAgent(base_path=self.base_path)
-            agent.load()
+            agent = NeuralAgent(self.guardian)
+            agent.load(version=self.version, shared=True)
             self.agents.append(agent)
 
     def predict(self, x):
@@ -43,7 +47,7 @@ class PredictionFusion:
         for idx, agent in enumerate(self.agents):
             try:
                 with torch.no_grad():
-                    y = agent.predict(x)
+                    y = torch.as_tensor(agent.predict(x))
                     preds.append(y.squeeze().tolist())
             except Exception as e:
                 self.guardian._write_log(f"⚠️ Agent {idx} prediction failed: {e}")
@@ -60,7 +64,7 @@ class PredictionFusion:
         """Optional: measure variance between agent outputs."""
         preds = []
         for agent in self.agents:
-            y = agent.predict(x)
+            y = torch.as_tensor(agent.predict(x))
             preds.append(y.squeeze().tolist())
 
         if len(preds) < 2:
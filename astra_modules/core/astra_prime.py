@@ -7,8 +7,12 @@ Enhancements:
  • agent weighting system
  • dynamic weight optimizer (Phase-100 hook)
  • clean integration with StateBundleBuilder & NeuralAgent
+ • memoized agent outputs keyed by input fingerprints
+ • neural agent starts from the promoted ModelRegistry checkpoint
 """
 
+import os
+
 import numpy as np
 
 from astra_modules.agents.momentum_agent import MomentumAgent
@@ -18,10 +22,31 @@ from astra_modules.agents.psychology_agent import PsychologyAgent
 from astra_modules.agents.catalyst_agent import CatalystAgent
 from astra_modules.agents.technical_agent import TechnicalAgent
 from astra_modules.agents.neural_agent import NeuralAgent
+from astra_modules.state.state_bundle_builder import NEURAL_FEATURES, NEURAL_INPUT_SIZE
+from astra_modules.engine.score_matrix import (
+    AGENT_ORDER,
+    weight_vector,
+    weights_to_dict,
+    normalize_weights,
+    to_scalar,
+    score_matrix,
+    evaluate_weight_grid,
+    optimize_weights,
+)
+from astra_modules.core.score_cache import (
+    ScoreCache,
+    fingerprint,
+    frame_fingerprint,
+    last_bar_timestamp,
+)
+
+# Weights that are not a registry checkpoint (fresh init, unsaved
+# training) only exist in this process → never match a persisted key
+_SESSION = os.urandom(8).hex()
 
 
 class AstraPrime:
-    def __init__(self):
+    def __init__(self, cache=None):
         # Agents
         self.momentum = MomentumAgent()
         self.volume = VolumeAgent()
@@ -29,7 +54,24 @@ class AstraPrime:
         self.psych = PsychologyAgent()
         self.catalyst = CatalystAgent()
         self.technical = TechnicalAgent()
-        self.neural = NeuralAgent()
+        self.neural = NeuralAgent(input_size=NEURAL_INPUT_SIZE, feature_schema=NEURAL_FEATURES)
+        # Promoted registry checkpoint, shared read-only across instances
+        # (trainers call make_trainable()); fresh weights if none fits
+        if hasattr(self.neural, "load"):
+            self.neural.load(shared=True)
+
+        self.agents = {
+            "momentum": self.momentum,
+            "volume": self.volume,
+            "risk": self.risk,
+            "psych": self.psych,
+            "catalyst": self.catalyst,
+            "technical": self.technical,
+            "neural": self.neural,
+        }
+
+        # Agent output memo (fingerprint → output)
+        self.cache = cache if cache is not None else ScoreCache()
 
         # Agent weights (will be optimized in Phase-100)
         self.weights = {
@@ -41,6 +83,7 @@ class AstraPrime:
             "technical": 0.20,
             "neural": 0.25,
         }
+        self.weight_vector = weight_vector(self.weights, AGENT_ORDER)
 
     # -----------------------------------------------------------
     # SAFE VALUE
@@ -55,6 +98,34 @@ class AstraPrime:
         except Exception:
             return default
 
+    # -----------------------------------------------------------
+    # FINGERPRINTS
+    # -----------------------------------------------------------
+    def model_version(self, name):
+        return getattr(self.agents.get(name), "model_version", 0)
+
+    def model_key(self):
+        """
+        Neural registry checkpoint + current weights. Stable across
+        restarts; weights that were never saved get a per-process key.
+        """
+        checkpoint = getattr(self.neural, "checkpoint", None)
+        if checkpoint is None:
+            checkpoint = (_SESSION, self.model_version("neural"))
+        return fingerprint(checkpoint, self.weight_vector)
+
+    def packet_fingerprint(self, df, psychology_data=None, catalyst_data=None):
+        """
+        Ticker-level key: last bar + trailing features + the psychology /
+        catalyst inputs run() scores + model_key(). Unchanged key → reuse
+        packet (new sentiment on an unchanged bar is a new key).
+        """
+        signals = (self.safe(psychology_data, 0.5), self.safe(catalyst_data, 0.0))
+        return frame_fingerprint(df, signals, self.model_key())
+
+    def cache_stats(self):
+        return self.cache.stats()
+
     # -----------------------------------------------------------
     # MAIN RUN FUNCTION
     # -----------------------------------------------------------
@@ -81,21 +152,28 @@ class AstraPrime:
             "catalyst_score": self.safe(catalyst_data, 0.0),
         }
 
-        # Agent outputs
-        a = {
-            "momentum": self.momentum.run({"momentum": latest["momentum"]}),
-            "volume": self.volume.run({"vol_spike": latest["vol_spike"]}),
-            "risk": self.risk.run({"volatility": latest["volatility"]}),
-            "psych": self.psych.run({"psych_score": latest["psych_score"]}),
-            "catalyst": self.catalyst.run({"catalyst_score": latest["catalyst_score"]}),
-            "technical": self.technical.run({
+        # Agent inputs
+        inputs = {
+            "momentum": {"momentum": latest["momentum"]},
+            "volume": {"vol_spike": latest["vol_spike"]},
+            "risk": {"volatility": latest["volatility"]},
+            "psych": {"psych_score": latest["psych_score"]},
+            "catalyst": {"catalyst_score": latest["catalyst_score"]},
+            "technical": {
                 "rsi": latest["rsi"],
                 "macd": latest["macd"],
                 "ma_ratio": latest["ma_ratio"],
-            }),
+            },
         }
 
-        # Neural input vector
+        # Agent outputs (memoized on bar timestamp + inputs + model version)
+        bar_ts = last_bar_timestamp(df)
+        a = {}
+        for name, agent_inputs in inputs.items():
+            key = fingerprint(bar_ts, tuple(agent_inputs.values()), self.model_version(name))
+            a[name] = self.cache.memo(name, ticker, key, self.agents[name].run, agent_inputs)
+
+        # Neural input vector (NEURAL_FEATURES order)
         vector = np.array([
             latest["rsi"] / 100,
             latest["macd"],
@@ -111,12 +189,12 @@ class AstraPrime:
             (df["close"].pct_change().iloc[-1]),
         ], dtype=float)
 
-        a["neural"] = self.neural.predict(vector)
+        key = fingerprint(bar_ts, vector, self.model_version("neural"))
+        a["neural"] = self.cache.memo("neural", ticker, key, self.neural.predict, vector)
 
-        # Weighted Astra score
-        score = 0
-        for agent, s in a.items():
-            score += s * self.weights[agent]
+        # Weighted Astra score (agent row · weight vector)
+        row = np.array([to_scalar(a.get(name)) for name in AGENT_ORDER], dtype=float)
+        score = float(row @ self.weight_vector)
 
         # Convert to grade A+ / A / B / etc.
         grade = self.grade(score)
@@ -130,6 +208,50 @@ class AstraPrime:
             "fetch_meta": fetch_meta,
         }
 
+    # -----------------------------------------------------------
+    # MATRIX SCORING
+    # -----------------------------------------------------------
+    def set_weights(self, weights):
+        """Accepts a {agent: w} dict or a (K,) vector in AGENT_ORDER."""
+        if isinstance(weights, dict):
+            vec = weight_vector({**self.weights, **weights}, AGENT_ORDER)
+        else:
+            vec = np.asarray(weights, dtype=float).ravel()
+        self.weight_vector = normalize_weights(vec)
+        self.weights = weights_to_dict(self.weight_vector, AGENT_ORDER)
+        return self.weights
+
+    def score_packets(self, packets, weights=None):
+        """
+        Re-score many packets at once.
+
+        weights=None → (N,) scores under current weights
+        weights=(W, K) candidate matrix → (N, W) scores
+        """
+        tickers, S = score_matrix(packets, AGENT_ORDER)
+        if weights is None:
+            return tickers, S @ self.weight_vector
+        return tickers, evaluate_weight_grid(S, weights)
+
+    def optimize_weights(self, score_history, return_history, n_candidates=2000, top_k=10, seed=None, apply=True):
+        """
+        Phase-100 weight optimizer hook.
+
+        score_history: (T, N, K) agent scores in AGENT_ORDER
+        return_history: (T, N) forward returns
+        """
+        result = optimize_weights(
+            score_history,
+            return_history,
+            n_candidates=n_candidates,
+            top_k=top_k,
+            seed=seed,
+            base=self.weight_vector,
+        )
+        if apply:
+            self.set_weights(result["weights"])
+        return result
+
     # -----------------------------------------------------------
     # GRADING SYSTEM
     # -----------------------------------------------------------
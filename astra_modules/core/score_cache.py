@@ -0,0 +1,170 @@
+"""
+score_cache.py — Phase-100
+
+Memoized agent outputs for AstraPrime.
+
+Every agent output is cached under a cheap fingerprint of its inputs:
+ • last bar timestamp
+ • hash of the agent's input features
+ • model version (NeuralAgent bumps this after each training step)
+
+Between intraday rescans most daily inputs are unchanged, so agents
+(and whole tickers, under the "packet" slot) are served from cache.
+Hit / miss counts are kept per agent for scan reports.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Sentinel for "not cached" (None is a valid agent output)
+MISS = object()
+
+# Columns AstraPrime reads from the enriched fetch_unified frame
+FEATURE_COLUMNS = (
+    "close",
+    "rsi",
+    "macd",
+    "ma10",
+    "ma30",
+    "momentum",
+    "volatility",
+    "vol_spike",
+)
+
+# Rows that can influence AstraPrime's inputs (20-day pct_change window + 1)
+FINGERPRINT_ROWS = 21
+
+
+# -------------------------------------------------------------
+# FINGERPRINTS
+# -------------------------------------------------------------
+def fingerprint(*parts):
+    """Short stable hash of mixed scalars / arrays / strings."""
+    h = hashlib.blake2b(digest_size=12)
+    for p in parts:
+        if isinstance(p, np.ndarray):
+            h.update(np.ascontiguousarray(p, dtype=float).tobytes())
+        elif isinstance(p, (list, tuple)):
+            try:
+                h.update(np.asarray(p, dtype=float).tobytes())
+            except Exception:
+                h.update(repr(p).encode())
+        else:
+            h.update(repr(p).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+def last_bar_timestamp(df):
+    """Timestamp of the most recent bar (date column or index)."""
+    try:
+        for col in ("date", "timestamp", "datetime"):
+            if col in df.columns:
+                return str(df[col].iloc[-1])
+        return str(df.index[-1])
+    except Exception:
+        return None
+
+
+def frame_fingerprint(df, *extra, columns=FEATURE_COLUMNS, rows=FINGERPRINT_ROWS):
+    """Fingerprint of the last bar + trailing feature rows of a frame."""
+    try:
+        cols = [c for c in columns if c in df.columns]
+        tail = df[cols].tail(rows).to_numpy(dtype=float, na_value=np.nan)
+    except Exception:
+        return None
+
+    return fingerprint(last_bar_timestamp(df), tuple(cols), tail, *extra)
+
+
+# -------------------------------------------------------------
+# CACHE
+# -------------------------------------------------------------
+class ScoreCache:
+    """
+    Per-agent LRU memo of agent outputs.
+
+    Slots are keyed by (agent, ticker); each slot holds the last
+    fingerprint + output, so a changed input simply overwrites it.
+    """
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # (agent, ticker) -> (fingerprint, value)
+        self._hits = {}
+        self._misses = {}
+        self._lock = threading.Lock()   # shared by ScanManager score workers
+
+    def get(self, agent, ticker, key):
+        """Return the cached output, or MISS."""
+        slot = (agent, ticker)
+        with self._lock:
+            entry = self._entries.get(slot)
+
+            if key is not None and entry is not None and entry[0] == key:
+                self._entries.move_to_end(slot)
+                self._hits[agent] = self._hits.get(agent, 0) + 1
+                return entry[1]
+
+            self._misses[agent] = self._misses.get(agent, 0) + 1
+            return MISS
+
+    def put(self, agent, ticker, key, value):
+        if key is None:
+            return value
+
+        slot = (agent, ticker)
+        with self._lock:
+            self._entries[slot] = (key, value)
+            self._entries.move_to_end(slot)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def memo(self, agent, ticker, key, compute, *args, **kwargs):
+        """get() or compute + put()."""
+        value = self.get(agent, ticker, key)
+        if value is MISS:
+            value = self.put(agent, ticker, key, compute(*args, **kwargs))
+        return value
+
+    def invalidate(self, ticker=None, agent=None):
+        """Drop entries for a ticker and/or agent (all if both None)."""
+        with self._lock:
+            for slot in list(self._entries):
+                if (agent is None or slot[0] == agent) and (ticker is None or slot[1] == ticker):
+                    del self._entries[slot]
+
+    # ---------------------------------------------------------
+    # STATS
+    # ---------------------------------------------------------
+    def stats(self):
+        """{agent: {"hits", "misses", "hit_rate"}}"""
+        out = {}
+        with self._lock:
+            hits = dict(self._hits)
+            misses = dict(self._misses)
+        for agent in sorted(set(hits) | set(misses)):
+            h = hits.get(agent, 0)
+            m = misses.get(agent, 0)
+            total = h + m
+            out[agent] = {
+                "hits": h,
+                "misses": m,
+                "hit_rate": h / total if total else 0.0,
+            }
+        return out
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+    def __len__(self):
+        return len(self._entries)
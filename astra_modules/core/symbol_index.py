@@ -0,0 +1,234 @@
+"""
+symbol_index.py — Phase-100
+
+Symbol metadata index, built once per process.
+
+One record per instrument:
+    symbol · asset_class (equity / etf / crypto) · exchange
+    coingecko_id (crypto) · liquidity_tier (1 = most liquid … 3)
+
+Every alias spelling (BTC, BTCUSD, BTC-USD, BTC/USD, btc-usd) is a key
+of the same dict, so routing is one dict hit — no per-call string
+heuristics. Fetchers route on asset_class + provider ids; the UI
+splits stocks / crypto with split().
+
+Unlisted symbols default to a tier-3 US equity (or crypto for a
+canonical "XXX-USD" pair). Extra or overriding records can be
+listed in astra_symbols.json (project root):
+    {"symbols": [{"symbol": "PEPE-USD", "asset_class": "crypto",
+                  "coingecko_id": "pepe", "liquidity_tier": 3}]}
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+SYMBOLS_FILE = "astra_symbols.json"
+
+EQUITY = "equity"
+ETF = "etf"
+CRYPTO = "crypto"
+
+DEFAULT_TIER = 3
+
+
+class SymbolMeta(NamedTuple):
+    symbol: str                     # canonical (AAPL, BRK.B, BTC-USD)
+    asset_class: str
+    exchange: str
+    coingecko_id: Optional[str]
+    liquidity_tier: int
+
+
+# -------------------------------------------------------------
+# BUILT-IN TABLE
+# -------------------------------------------------------------
+# base → (coingecko id, tier)
+_CRYPTO = {
+    "BTC": ("bitcoin", 1),
+    "ETH": ("ethereum", 1),
+    "SOL": ("solana", 2),
+    "XRP": ("ripple", 2),
+    "BNB": ("binancecoin", 2),
+    "ADA": ("cardano", 2),
+    "DOGE": ("dogecoin", 2),
+    "AVAX": ("avalanche-2", 2),
+    "DOT": ("polkadot", 2),
+    "LINK": ("chainlink", 2),
+    "LTC": ("litecoin", 2),
+    "BCH": ("bitcoin-cash", 2),
+    "MATIC": ("matic-network", 2),
+    "ATOM": ("cosmos", 3),
+    "ETC": ("ethereum-classic", 3),
+    "NEAR": ("near", 3),
+    "FTM": ("fantom", 3),
+    "MANA": ("decentraland", 3),
+    "USDT": ("tether", 1),
+    "USDC": ("usd-coin", 1),
+}
+
+# exchange → tier → symbols
+_EQUITIES = {
+    "NASDAQ": {
+        1: "AAPL MSFT AMZN GOOGL GOOG META NVDA TSLA AVGO COST",
+        2: "AMD NFLX PYPL QCOM MU COIN PLTR ABNB ADBE AMAT ARM ASML CRWD CSCO INTC LRCX "
+           "MDB PANW PEP SBUX TXN RIVN LYFT SMCI SOFI MARA RIOT CELH DKNG AFRM ENPH BIDU "
+           "UAL AAL",
+    },
+    "NYSE": {
+        1: "BRK.B JPM V MA HD PG XOM UNH LLY WMT JNJ",
+        2: "ABBV ABT AXP BA BABA BAC BLK BMY BP C CAT CI COP CRM CVX DAL DE DIS ELV EOG ETN "
+           "F FDX GE GM GS HON IBM KO LMT LOW MCD MRK MS NET NKE NOC NOW ORCL OXY PBR PFE "
+           "PH RTX SCHW SHEL SHOP SLB SNOW SQ T TGT TMO TSM UBER UPS WFC RBLX MRNA",
+    },
+}
+
+_ETFS = {
+    "SPY": ("NYSEARCA", 1),
+    "QQQ": ("NASDAQ", 1),
+    "IWM": ("NYSEARCA", 1),
+    "DIA": ("NYSEARCA", 2),
+}
+
+
+def _get_symbols_path() -> Path:
+    """Symbol metadata index, astra_symbols.json next to app.py."""
+    return Path(__file__).resolve().parents[2] / SYMBOLS_FILE
+
+
+def _crypto_aliases(base):
+    return (base, f"{base}USD", f"{base}-USD", f"{base}/USD", f"{base}USDT")
+
+
+class SymbolIndex:
+    def __init__(self, path=None):
+        self.path = Path(path) if path else _get_symbols_path()
+        self._index = {}       # alias → SymbolMeta
+        self._build()
+
+    # ---------------------------------------------------------
+    # BUILD (once)
+    # ---------------------------------------------------------
+    def _add(self, meta, aliases=()):
+        for key in (meta.symbol, *aliases):
+            self._index[key] = meta
+            self._index[key.lower()] = meta
+
+    def _build(self):
+        for exchange, tiers in _EQUITIES.items():
+            for tier, symbols in tiers.items():
+                for sym in symbols.split():
+                    self._add(SymbolMeta(sym, EQUITY, exchange, None, tier), (sym.replace(".", "-"),))
+
+        for sym, (exchange, tier) in _ETFS.items():
+            self._add(SymbolMeta(sym, ETF, exchange, None, tier))
+
+        # Crypto last: a crypto base never shadows a listed equity alias
+        for base, (cg_id, tier) in _CRYPTO.items():
+            meta = SymbolMeta(f"{base}-USD", CRYPTO, "CRYPTO", cg_id, tier)
+            aliases = [a for a in _crypto_aliases(base) if a not in self._index]
+            self._add(meta, aliases)
+
+        self._load_overrides()
+
+    def _load_overrides(self):
+        if not self.path.exists():
+            return
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                records = json.load(f).get("symbols", [])
+        except Exception as e:
+            print(f"[symbol_index] failed to read {self.path.name}: {e}")
+            return
+
+        for rec in records:
+            try:
+                asset_class = rec.get("asset_class", EQUITY)
+                symbol = str(rec["symbol"]).upper()
+                meta = SymbolMeta(
+                    symbol,
+                    asset_class,
+                    rec.get("exchange", "CRYPTO" if asset_class == CRYPTO else "US"),
+                    rec.get("coingecko_id"),
+                    int(rec.get("liquidity_tier", DEFAULT_TIER)),
+                )
+            except Exception:
+                continue
+
+            aliases = list(rec.get("aliases", []))
+            if asset_class == CRYPTO and symbol.endswith("-USD"):
+                aliases += _crypto_aliases(symbol[:-4])
+            self._add(meta, aliases)
+
+    # ---------------------------------------------------------
+    # LOOKUPS (one dict hit)
+    # ---------------------------------------------------------
+    def get(self, symbol) -> SymbolMeta:
+        meta = self._index.get(symbol)
+        if meta is not None:
+            return meta
+
+        sym = str(symbol or "").strip().upper()
+        meta = self._index.get(sym)
+        if meta is None:
+            # Unlisted: canonical "-USD" pairs are crypto (no provider id),
+            # anything else a tier-3 US equity. Memoized → next lookup is one hit.
+            if sym.endswith("-USD"):
+                meta = SymbolMeta(sym, CRYPTO, "CRYPTO", None, DEFAULT_TIER)
+            else:
+                meta = SymbolMeta(sym, EQUITY, "US", None, DEFAULT_TIER)
+        if symbol is not None:
+            self._index[symbol] = meta
+        return meta
+
+    def __contains__(self, symbol):
+        return symbol in self._index or str(symbol).upper() in self._index
+
+    def asset_class(self, symbol) -> str:
+        return self.get(symbol).asset_class
+
+    def is_crypto(self, symbol) -> bool:
+        return self.get(symbol).asset_class == CRYPTO
+
+    def canonical(self, symbol) -> str:
+        return self.get(symbol).symbol
+
+    def coingecko_id(self, symbol):
+        return self.get(symbol).coingecko_id
+
+    def liquidity_tier(self, symbol) -> int:
+        return self.get(symbol).liquidity_tier
+
+    def split(self, items, key=None):
+        """
+        Partition symbols (or dicts / objects via `key`) into
+        (non-crypto, crypto), preserving order.
+        """
+        key = key or (lambda x: x)
+        stocks, crypto = [], []
+        for item in items:
+            (crypto if self.is_crypto(key(item)) else stocks).append(item)
+        return stocks, crypto
+
+    def symbols(self, asset_class=None):
+        """Canonical symbols, optionally of one asset class."""
+        seen = {m.symbol: m for m in self._index.values()}
+        return sorted(s for s, m in seen.items() if asset_class is None or m.asset_class == asset_class)
+
+
+# -------------------------------------------------------------
+# PROCESS-WIDE INSTANCE
+# -------------------------------------------------------------
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_symbol_index() -> SymbolIndex:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = SymbolIndex()
+    return _instance
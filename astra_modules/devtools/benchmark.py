@@ -0,0 +1,370 @@
+# ================================================================
+# Astra DevTools — Scan → Rank Pipeline Benchmark
+# ================================================================
+#
+# Times each pipeline stage on seeded synthetic universes
+# (100 / 1k / 10k tickers) and on astra_cache/*.parquet fixtures:
+#
+#     parse     provider payload → OHLCV DataFrame
+#     enrich    RSI / MACD / MAs / volatility     (enrich_ohlcv)
+#     features  agent columns + state bundle      (add_agent_features + StateBundleBuilder)
+#     agents    six rule agents                   (momentum … technical)
+#     neural    NeuralAgent.predict               (skipped without torch)
+#     rank      RankingEngine.rank over the universe
+#
+# Results are compared with a stored baseline JSON; any stage whose
+# per-ticker time grew by more than the tolerance is flagged. Timings
+# are absolute, so the baseline is per machine: it is not committed
+# (astra_benchmark_baseline.json is git-ignored) and records the host
+# it was measured on. A missing / unreadable baseline, or one from
+# another host, is an error (exit 2), not a pass — record one on this
+# machine with --update-baseline.
+# Harness is stdlib-only (argparse / random / statistics / time).
+#
+#     python -m astra_modules.devtools.benchmark
+#     python -m astra_modules.devtools.benchmark --sizes 100 1000 --no-parquet
+#     python -m astra_modules.devtools.benchmark --update-baseline
+# ================================================================
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from astra_modules.fetch_core.fetch_unified import parse_twelvedata, enrich_ohlcv, add_agent_features
+from astra_modules.state.state_bundle_builder import StateBundleBuilder
+from astra_modules.engine.ranking_engine import RankingEngine
+from astra_modules.engine.score_matrix import AGENT_ORDER, to_scalar
+from astra_modules.agents.momentum_agent import MomentumAgent
+from astra_modules.agents.volume_agent import VolumeAgent
+from astra_modules.agents.risk_agent import RiskAgent
+from astra_modules.agents.psychology_agent import PsychologyAgent
+from astra_modules.agents.catalyst_agent import CatalystAgent
+from astra_modules.agents.technical_agent import TechnicalAgent
+
+
+BASELINE_FILE = "astra_benchmark_baseline.json"
+CACHE_DIR = "astra_cache"
+
+SIZES = (100, 1000, 10000)
+BARS = 250
+SEED = 42
+
+STAGES = ("parse", "enrich", "features", "agents", "neural", "rank")
+
+# Regression = per-ticker time > baseline × (1 + TOLERANCE) and slower by > NOISE_FLOOR_US
+TOLERANCE = 0.25
+NOISE_FLOOR_US = 5.0
+
+
+def _project_root() -> Path:
+    """Project root (same level as app.py)."""
+    return Path(__file__).resolve().parents[2]
+
+
+# -------------------------------
+# SYNTHETIC UNIVERSE
+# -------------------------------
+def synthetic_payload(index, bars=BARS, seed=SEED):
+    """
+    Seeded geometric random walk in TwelveData `values` format
+    (newest first, string fields). Same (index, seed) → same payload.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    price = rng.uniform(5.0, 500.0)
+    drift = rng.uniform(-0.001, 0.0015)
+    vol = rng.uniform(0.005, 0.04)
+    base_volume = rng.uniform(2e5, 5e7)
+    start = date(2020, 1, 1)
+
+    rows = []
+    for i in range(bars):
+        open_ = price
+        price = max(0.5, price * (1.0 + drift + rng.gauss(0.0, vol)))
+        high = max(open_, price) * (1.0 + abs(rng.gauss(0.0, vol / 2)))
+        low = min(open_, price) * (1.0 - abs(rng.gauss(0.0, vol / 2)))
+        rows.append({
+            "datetime": (start + timedelta(days=i)).isoformat(),
+            "open": f"{open_:.4f}",
+            "high": f"{high:.4f}",
+            "low": f"{low:.4f}",
+            "close": f"{price:.4f}",
+            "volume": f"{base_volume * rng.uniform(0.5, 2.0):.0f}",
+        })
+    rows.reverse()
+    return rows
+
+
+def synthetic_universe(n, bars=BARS, seed=SEED):
+    """Yields (ticker, loader); loader() → DataFrame is the timed parse step."""
+    for i in range(n):
+        ticker = f"SYN{i:05d}"
+        payload = synthetic_payload(i, bars, seed)
+        yield ticker, (lambda p=payload, t=ticker: parse_twelvedata(p, t).sort_values("date").reset_index(drop=True))
+
+
+def parquet_universe(cache_dir=None, bars=BARS):
+    """Yields (ticker, loader) over astra_cache/*.parquet (Date/Open/High/Low/Close/Volume)."""
+    cache_dir = Path(cache_dir) if cache_dir else _project_root() / CACHE_DIR
+    for path in sorted(cache_dir.glob("*.parquet")):
+        def load(p=path):
+            df = pd.read_parquet(p)
+            df.columns = [str(c).lower() for c in df.columns]
+            return df.sort_values("date").tail(bars).reset_index(drop=True)
+        yield path.stem, load
+
+
+# -------------------------------
+# PIPELINE UNDER TEST
+# -------------------------------
+class _QuietGuardian:
+    """NeuralAgent logs every call; keep log I/O out of the timings."""
+
+    def _write_log(self, *args, **kwargs):
+        pass
+
+
+def _load_neural(input_size):
+    try:
+        from astra_modules.agents.neural_agent import NeuralAgent
+        return NeuralAgent(_QuietGuardian(), input_size=input_size)
+    except Exception as e:
+        print(f"⚠ neural stage skipped: {e}")
+        return None
+
+
+class PipelineBenchmark:
+    def __init__(self):
+        self.builder = StateBundleBuilder()
+        self.rank_engine = RankingEngine()
+        self.agents = {
+            "momentum": MomentumAgent(),
+            "volume": VolumeAgent(),
+            "risk": RiskAgent(),
+            "psych": PsychologyAgent(),
+            "catalyst": CatalystAgent(),
+            "technical": TechnicalAgent(),
+        }
+        self.neural = None
+        self._neural_checked = False
+
+    def run(self, universe, name):
+        timings = {stage: [] for stage in STAGES}
+        packets = {}
+        clock = time.perf_counter
+        wall0 = clock()
+
+        for ticker, load in universe:
+            t = clock()
+            df = load()
+            timings["parse"].append(clock() - t)
+            if df is None or len(df) < 40:
+                continue
+
+            t = clock()
+            df = enrich_ohlcv(df)
+            timings["enrich"].append(clock() - t)
+
+            t = clock()
+            df = add_agent_features(df)
+            meta = {"last_price": float(df["close"].iloc[-1]), "sparkline": df["sparkline"].iloc[-1]}
+            bundle = self.builder.build_bundle(ticker, df, fetch_meta=meta)
+            inputs = self.builder.agent_inputs(bundle)
+            timings["features"].append(clock() - t)
+
+            t = clock()
+            scores = {n: self.agents[n].run(inputs[n]) for n in inputs}
+            timings["agents"].append(clock() - t)
+
+            if not self._neural_checked:
+                self.neural = _load_neural(len(bundle["neural_vector"]))
+                self._neural_checked = True
+            if self.neural is not None:
+                t = clock()
+                scores["neural"] = self.neural.predict(bundle["neural_vector"])
+                timings["neural"].append(clock() - t)
+
+            row = [to_scalar(scores.get(n)) for n in AGENT_ORDER]
+            packets[ticker] = {
+                "ticker": ticker,
+                "astra_score": sum(row) / len(row),
+                "agent_scores": scores,
+                "fetch_meta": meta,
+            }
+
+        t = clock()
+        self.rank_engine.rank(packets)
+        timings["rank"].append(clock() - t)
+
+        wall = clock() - wall0
+        n = len(packets)
+        return {
+            "name": name,
+            "tickers": n,
+            "wall_s": wall,
+            "tickers_per_sec": n / wall if wall > 0 else 0.0,
+            "stages": {s: stage_stats(v, per=n if s == "rank" else None) for s, v in timings.items() if v},
+        }
+
+
+def stage_stats(samples, per=None):
+    """
+    Seconds → microsecond summary. `per_ticker_us` is the regression
+    metric (for whole-universe stages like rank: total / tickers).
+    """
+    us = [s * 1e6 for s in samples]
+    total = sum(us)
+    if len(us) >= 2:
+        q = statistics.quantiles(us, n=100, method="inclusive")
+        p50, p95, p99 = q[49], q[94], q[98]
+    else:
+        p50 = p95 = p99 = us[0]
+    return {
+        "count": len(us),
+        "total_s": total / 1e6,
+        "per_ticker_us": total / per if per else statistics.fmean(us),
+        "p50_us": p50,
+        "p95_us": p95,
+        "p99_us": p99,
+    }
+
+
+# -------------------------------
+# BASELINE COMPARISON
+# -------------------------------
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def compare(results, baseline, tolerance=TOLERANCE, noise_floor_us=NOISE_FLOOR_US):
+    """
+    Returns rows {dataset, stage, baseline_us, current_us, ratio, regression}
+    for every dataset/stage present in both runs.
+    """
+    rows = []
+    base_sets = (baseline or {}).get("datasets", {})
+    for name, cur in results["datasets"].items():
+        base = base_sets.get(name)
+        if not base:
+            continue
+        for stage, cs in cur["stages"].items():
+            bs = base.get("stages", {}).get(stage)
+            if not bs or not bs.get("per_ticker_us"):
+                continue
+            b, c = bs["per_ticker_us"], cs["per_ticker_us"]
+            ratio = c / b
+            rows.append({
+                "dataset": name,
+                "stage": stage,
+                "baseline_us": b,
+                "current_us": c,
+                "ratio": ratio,
+                "regression": ratio > 1.0 + tolerance and (c - b) > noise_floor_us,
+            })
+    return rows
+
+
+def print_report(results, rows):
+    print("\n📊 Astra Pipeline Benchmark")
+    print("--------------------------------------------------")
+    for name, r in results["datasets"].items():
+        print(f"{name}: {r['tickers']} tickers in {r['wall_s']:.2f}s ({r['tickers_per_sec']:.1f}/s)")
+        for stage, s in r["stages"].items():
+            print(
+                f"   {stage:<9} {s['per_ticker_us']:10.1f} µs/ticker   "
+                f"p50={s['p50_us']:9.1f}  p95={s['p95_us']:9.1f}  p99={s['p99_us']:9.1f}"
+            )
+
+    if rows:
+        print("\nvs baseline")
+        for row in rows:
+            flag = "❌ REGRESSION" if row["regression"] else "✔"
+            print(f"   {row['dataset']:<16} {row['stage']:<9} ×{row['ratio']:.2f}  {flag}")
+    print("--------------------------------------------------\n")
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+def run_benchmark(sizes=SIZES, parquet=True, bars=BARS, seed=SEED):
+    bench = PipelineBenchmark()
+    datasets = {}
+
+    for n in sizes:
+        name = f"synthetic_{n}"
+        datasets[name] = bench.run(synthetic_universe(n, bars, seed), name)
+
+    if parquet:
+        datasets["parquet_cache"] = bench.run(parquet_universe(bars=bars), "parquet_cache")
+
+    return {
+        "meta": {
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "host": platform.node(),
+            "bars": bars,
+            "seed": seed,
+        },
+        "datasets": datasets,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Astra scan → rank pipeline benchmark")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SIZES))
+    parser.add_argument("--no-parquet", action="store_true", help="skip astra_cache/*.parquet fixtures")
+    parser.add_argument("--bars", type=int, default=BARS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--baseline", default=str(_project_root() / BASELINE_FILE))
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write this run's results JSON here")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.sizes, not args.no_parquet, args.bars, args.seed)
+    baseline = load_baseline(args.baseline)
+    foreign = baseline is not None and baseline.get("meta", {}).get("host") != results["meta"]["host"]
+    rows = [] if foreign else compare(results, baseline, args.tolerance)
+    print_report(results, rows)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✔ baseline written → {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"⚠ no baseline at {args.baseline} — nothing compared (run with --update-baseline)")
+        return 2
+    if foreign:
+        print(f"⚠ baseline at {args.baseline} was recorded on another host — nothing compared "
+              "(run with --update-baseline on this machine)")
+        return 2
+    if not rows:
+        print("⚠ baseline shares no dataset / stage with this run — nothing compared")
+
+    regressions = [r for r in rows if r["regression"]]
+    if regressions:
+        print(f"❌ {len(regressions)} stage regression(s) vs baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,495 @@
+# ================================================================
+# Astra DevTools — Accelerated Market Replay
+# ================================================================
+#
+# Replays historical sessions from astra_cache/*.parquet through the
+# live code path, bar by bar, at 1x–1000x (or unpaced) speed:
+#
+#     market    the bar's open → low/high → close path is fed to
+#               PaperTrader.on_tick (mark-to-market, stop / target /
+#               expiry close-outs → ReplayBuffer)
+#     scan      ScanManager.iter_scan over every ticker with a bar:
+#               fetch_stage serves the trailing window from the cache,
+#               indicators are recomputed (enrich_ohlcv +
+#               add_agent_features), then SmartScan / HybridScan /
+#               StateBundleBuilder / AstraPrime as in production
+#     rank      RankingEngine.rank
+#     trade     PaperTrader opens the top-k at the close (stop, target,
+#               max hold), context = the ticker's state bundle
+#     train     learning ContinualTrainer consumes the closed outcomes
+#
+# Nothing touches live state: the scan state store is in memory, no
+# checkpoints, model versions or scan metrics are written, the replay
+# buffer is not file-backed.
+#
+# Report: end-to-end latency per simulated bar (scheduled arrival →
+# done, p50 / p95 / p99), per-stage and per-ticker scan latencies,
+# sustained throughput (bars/s, ticker-bars/s, speed-up vs real time),
+# schedule lag, trading and training outcomes (trained / skipped /
+# failed runs; any failed training run → exit code 1).
+#
+#     python -m astra_modules.devtools.market_replay                    # last week, unpaced
+#     python -m astra_modules.devtools.market_replay --days 1 --speed 1000
+#     python -m astra_modules.devtools.market_replay --start 2025-06-02 --end 2025-06-27 --tickers AAPL MSFT
+# ================================================================
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from astra_modules.core.symbol_index import get_symbol_index
+from astra_modules.engine.scan_manager import ScanManager
+from astra_modules.engine.scan_metrics import latency_stats
+from astra_modules.engine.scan_state import ScanStateStore
+from astra_modules.fetch_core.fetch_unified import enrich_ohlcv, add_agent_features
+from astra_modules.learning.continual_trainer import ContinualTrainer
+from astra_modules.learning.paper_trader import PaperTrader
+from astra_modules.learning.replay_buffer import ReplayBuffer
+from astra_modules.state.state_bundle_builder import StateBundleBuilder
+
+
+CACHE_DIR = "astra_cache"
+
+DAYS = 5                    # sessions replayed by default (one trading week)
+LOOKBACK = 90               # bars of history each scan sees (fetch_unified lookback)
+MIN_BARS = 40               # ScanManager.fetch_stage minimum
+BAR_SECONDS = 6.5 * 3600    # one regular session — the cache holds daily bars
+SPEED = 0.0                 # 0 = unpaced (as fast as possible)
+
+TOP_K = 5
+STOP_PCT = 0.03
+TARGET_PCT = 0.05
+HOLD_BARS = 3
+TRAIN_EVERY = 1             # bars between ContinualTrainer runs
+REPLAY_CAPACITY = 5000
+
+STAGES = ("market", "scan", "rank", "trade", "train")
+
+
+def _project_root() -> Path:
+    """Repository root (parent of astra_modules/); the default parquet cache resolves against it."""
+    return Path(__file__).resolve().parents[2]
+
+
+# -------------------------------
+# FEED
+# -------------------------------
+class ReplayFeed:
+    """
+    Per-ticker OHLCV frames from the parquet cache plus the session
+    calendar being replayed (equity dates; crypto only when asked).
+    """
+
+    def __init__(self, cache_dir=None, tickers=None, start=None, end=None, days=DAYS,
+                 lookback=LOOKBACK, include_crypto=False):
+        cache_dir = Path(cache_dir) if cache_dir else _project_root() / CACHE_DIR
+        symbols = get_symbol_index()
+        wanted = {symbols.canonical(t) for t in tickers} if tickers else None
+        self.lookback = int(lookback)
+
+        self.frames = {}
+        for path in sorted(cache_dir.glob("*.parquet")):
+            sym = symbols.canonical(path.stem)
+            if wanted is not None and sym not in wanted:
+                continue
+            if symbols.is_crypto(sym) and not include_crypto:
+                continue
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                print(f"[market_replay] failed to read {path.name}: {e}")
+                continue
+            df.columns = [str(c).lower() for c in df.columns]
+            if "date" not in df or "close" not in df:
+                continue
+            df["date"] = pd.to_datetime(df["date"])
+            df = df.drop_duplicates("date").sort_values("date").reset_index(drop=True)
+            df = df.astype({c: float for c in ("open", "high", "low", "close", "volume") if c in df})
+            df["symbol"] = sym
+            self.frames[sym] = df
+
+        dates = sorted(set().union(*(set(df["date"]) for df in self.frames.values()))) if self.frames else []
+        dates = pd.DatetimeIndex(dates)
+        if start is not None:
+            dates = dates[dates >= pd.Timestamp(start)]
+        if end is not None:
+            dates = dates[dates <= pd.Timestamp(end)]
+        if start is None and days:
+            dates = dates[-int(days):]
+        self.sessions = dates
+
+        # Row of each session per ticker (-1 = no bar that day)
+        self.symbols = list(self.frames)
+        self._rows = {sym: self._row_index(df, dates) for sym, df in self.frames.items()}
+
+        # (4, sessions, tickers) open / high / low / close, NaN = no bar
+        self._ohlc = np.full((4, len(dates), len(self.symbols)), np.nan)
+        for j, sym in enumerate(self.symbols):
+            df, rows = self.frames[sym], self._rows[sym]
+            have = rows >= 0
+            for k, col in enumerate(("open", "high", "low", "close")):
+                values = df[col if col in df else "close"].to_numpy(dtype=float)
+                self._ohlc[k, have, j] = values[rows[have]]
+
+    @staticmethod
+    def _row_index(df, dates):
+        pos = df["date"].searchsorted(dates)
+        pos = np.minimum(pos, len(df) - 1)
+        return np.where(df["date"].to_numpy()[pos] == dates.to_numpy(), pos, -1)
+
+    def tickers_at(self, i):
+        """Tickers with a bar in session i."""
+        return [sym for sym in self.symbols if self._rows[sym][i] >= 0]
+
+    def ohlc_at(self, i):
+        """(4, N) open / high / low / close for session i, aligned with self.symbols (NaN = no bar)."""
+        return self._ohlc[:, i]
+
+    def window(self, ticker, i):
+        """Trailing `lookback` bars up to and including session i (copy)."""
+        r = self._rows[ticker][i]
+        if r < 0:
+            return None
+        return self.frames[ticker].iloc[max(0, r - self.lookback + 1):r + 1].reset_index(drop=True)
+
+
+# -------------------------------
+# LIVE PIPELINE, REPLAY-FED
+# -------------------------------
+class ReplayScanState(ScanStateStore):
+    """In-memory scan state: every replayed bar is a new session, nothing hits disk."""
+
+    def __init__(self):
+        self.path = None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.tickers = {}
+
+    def save(self):
+        pass
+
+    def pre_fetch_skip(self, ticker, model_key, is_crypto, now=None):
+        return None, None
+
+
+class RecordingBundleBuilder(StateBundleBuilder):
+    """Keeps each ticker's latest bundle (its neural_vector becomes the trade context)."""
+
+    def __init__(self):
+        super().__init__()
+        self.bundles = {}
+
+    def build_bundle(self, *args, **kwargs):
+        bundle = super().build_bundle(*args, **kwargs)
+        self.bundles[bundle.get("ticker")] = bundle
+        return bundle
+
+
+class ReplayScanManager(ScanManager):
+    """ScanManager whose fetch stage reads the replay feed at the current session."""
+
+    def __init__(self, feed, **kwargs):
+        super().__init__(state=ReplayScanState(), prefilter=False, **kwargs)
+        self.feed = feed
+        self.session = None
+        self.builder = RecordingBundleBuilder()
+
+    def fetch_stage(self, ticker):
+        df = self.feed.window(ticker, self.session)
+        if df is None or len(df) < MIN_BARS:
+            return None, None
+        with self.metrics.span("indicators", ticker):
+            df = add_agent_features(enrich_ohlcv(df))
+        meta = {"last_price": float(df["close"].iloc[-1]), "sparkline": df["sparkline"].iloc[-1]}
+        return df, meta
+
+
+# -------------------------------
+# SIMULATOR
+# -------------------------------
+class MarketReplay:
+    def __init__(self, feed, speed=SPEED, bar_seconds=BAR_SECONDS, top_k=TOP_K, stop_pct=STOP_PCT,
+                 target_pct=TARGET_PCT, hold_bars=HOLD_BARS, train_every=TRAIN_EVERY,
+                 fetch_workers=None, score_workers=None):
+        self.feed = feed
+        self.speed = float(speed or 0.0)
+        self.bar_seconds = float(bar_seconds)
+        self.top_k = int(top_k)
+        self.stop_pct = stop_pct
+        self.target_pct = target_pct
+        self.hold_bars = hold_bars
+        self.train_every = int(train_every)
+
+        workers = {k: v for k, v in (("fetch_workers", fetch_workers), ("score_workers", score_workers)) if v}
+        self.manager = ReplayScanManager(feed, **workers)
+        self.buffer = ReplayBuffer(REPLAY_CAPACITY)
+        self.trader = PaperTrader(self.buffer)
+        self.trainer = ContinualTrainer(self.manager.prime.neural, self.buffer, model_name=None)
+
+        # Trader's price vector follows the feed's symbol order
+        self.trader.register_symbols(feed.symbols)
+
+    def _bar(self, i, sim_t):
+        """One simulated bar through every stage → {stage: seconds, ...}."""
+        clock = time.perf_counter
+        timings = {}
+        feed, trader, manager = self.feed, self.trader, self.manager
+
+        # Market: O → L/H → H/L → C ticks (bullish bars dip first)
+        t = clock()
+        o, h, l, c = feed.ohlc_at(i)
+        up = c >= o
+        path = (o, np.where(up, l, h), np.where(up, h, l), c)
+        closes = {"stop": 0, "target": 0, "expiry": 0}
+        for k, prices in enumerate(path):
+            res = trader.on_tick(prices, now=sim_t + self.bar_seconds * k / 3)
+            for reason in closes:
+                closes[reason] += res[reason]
+        timings["market"] = clock() - t
+
+        # Scan: live iter_scan over tickers with a bar this session
+        t = clock()
+        manager.session = i
+        tickers = feed.tickers_at(i)
+        stats, packets = {}, {}
+        for ticker, packet in manager.iter_scan(tickers, stats, screen=False):
+            packets[ticker] = packet
+        timings["scan"] = clock() - t
+
+        t = clock()
+        ranked = manager.rank_engine.rank(packets)
+        timings["rank"] = clock() - t
+
+        # Trade: top-k at the close
+        t = clock()
+        close_t = sim_t + self.bar_seconds
+        picks = [r for r in ranked[:self.top_k] if r.get("ticker") in packets]
+        opened = 0
+        if picks:
+            names = [r["ticker"] for r in picks]
+            px = np.array([packets[n].get("fetch_meta", {}).get("last_price", np.nan) for n in names], dtype=float)
+            contexts = []
+            for n in names:
+                bundle = manager.builder.bundles.get(n, {})
+                contexts.append({
+                    "neural_vector": bundle.get("neural_vector"),
+                    "prediction": packets[n].get("astra_score", 0.0),
+                    "grade": packets[n].get("grade"),
+                })
+            ids = trader.open_trades(names, px, stops=px * (1 - self.stop_pct), targets=px * (1 + self.target_pct),
+                                     max_minutes=self.hold_bars * self.bar_seconds / 60, contexts=contexts, now=close_t)
+            opened = int((ids >= 0).sum())
+        timings["trade"] = clock() - t
+
+        # Train: ContinualTrainer over the outcomes so far
+        t = clock()
+        trained = None
+        if self.train_every and (i + 1) % self.train_every == 0:
+            before = self.trainer.last_report
+            message = self.trainer.train()
+            if self.trainer.last_error is not None:
+                status = "failed"
+            elif self.trainer.last_report is not before:
+                status = "trained"
+            else:
+                status = "skipped"      # nothing labelled to train on yet
+            trained = {"status": status, "message": message, "error": self.trainer.last_error}
+        timings["train"] = clock() - t
+
+        scan_stages = {s: list(v) for s, v in manager.metrics.durations.items()}
+        return timings, {
+            "tickers": len(tickers),
+            "scored": stats.get("scored", 0),
+            "failed": stats.get("fetch_failed", 0) + stats.get("score_failed", 0),
+            "opened": opened,
+            "closed": closes,
+            "trained": trained,
+        }, scan_stages
+
+    def run(self, progress=True) -> dict:
+        sessions = self.feed.sessions
+        n = len(sessions)
+        interval = self.bar_seconds / self.speed if self.speed > 0 else 0.0
+
+        latencies, processing, lags = [], [], []
+        stage_times = defaultdict(list)
+        scan_stages = defaultdict(list)
+        totals = defaultdict(int)
+        closes = defaultdict(int)
+        last_train = last_error = None
+        ticker_bars = 0
+
+        t0 = time.perf_counter()
+        for i, session in enumerate(sessions):
+            arrival = t0 + i * interval
+            now = time.perf_counter()
+            if interval and now < arrival:
+                time.sleep(arrival - now)
+            start = time.perf_counter()
+            if not interval:
+                arrival = start
+
+            # Bar-indexed clock: bar i spans [i, i+1) · bar_seconds, so trade
+            # expiry (hold_bars · bar_seconds) counts bars, not calendar time
+            timings, info, spans = self._bar(i, i * self.bar_seconds)
+            done = time.perf_counter()
+
+            latencies.append(done - arrival)
+            processing.append(done - start)
+            lags.append(start - arrival)
+            for stage, secs in timings.items():
+                stage_times[stage].append(secs)
+            for stage, secs in spans.items():
+                scan_stages[stage].extend(secs)
+            for key in ("tickers", "scored", "failed", "opened"):
+                totals[key] += info[key]
+            for reason, k in info["closed"].items():
+                closes[reason] += k
+            if info["trained"] is not None:
+                totals["train_runs"] += 1
+                totals[f"train_{info['trained']['status']}"] += 1
+                last_train = info["trained"]["message"]
+                if info["trained"]["error"] is not None:
+                    last_error = info["trained"]["error"]
+            ticker_bars += info["scored"]
+
+            if progress:
+                print(f"[market_replay] {i + 1}/{n} {pd.Timestamp(session).date()} · "
+                      f"{info['scored']}/{info['tickers']} scored · {info['opened']} opened · "
+                      f"{sum(info['closed'].values())} closed · {(done - arrival) * 1000:.0f} ms")
+
+        wall = time.perf_counter() - t0
+        busy = sum(processing)
+        summary = self.trader.summary()
+        closed = self.trader.get_closed_positions()
+        wins = sum(1 for tr in closed if tr["pnl"] > 0)
+
+        return {
+            "sessions": n,
+            "start": str(pd.Timestamp(sessions[0]).date()) if n else None,
+            "end": str(pd.Timestamp(sessions[-1]).date()) if n else None,
+            "tickers": len(self.feed.symbols),
+            "speed": self.speed or "max",
+            "bar_seconds": self.bar_seconds,
+            "latency": {
+                "bar": latency_stats(latencies),
+                "processing": latency_stats(processing),
+                "schedule_lag": latency_stats(lags),
+                "late_bars": int(sum(1 for x in lags if x > 0.001)),
+                "stages": {s: latency_stats(stage_times[s]) for s in STAGES if stage_times[s]},
+                "scan_per_ticker": {s: latency_stats(v) for s, v in scan_stages.items()},
+            },
+            "throughput": {
+                "wall_s": wall,
+                "busy_s": busy,
+                "bars_per_sec": n / busy if busy > 0 else 0.0,
+                "ticker_bars_per_sec": ticker_bars / busy if busy > 0 else 0.0,
+                "speedup_vs_realtime": n * self.bar_seconds / wall if wall > 0 else 0.0,
+            },
+            "scan": {"ticker_bars": int(totals["tickers"]), "scored": int(totals["scored"]),
+                     "failed": int(totals["failed"])},
+            "trading": {
+                "opened": int(totals["opened"]),
+                "closed": dict(closes),
+                "open": summary["open"],
+                "realized_pnl": summary["realized_pnl"],
+                "unrealized_pnl": summary["unrealized_pnl"],
+                "hit_rate": wins / len(closed) if closed else 0.0,
+            },
+            "training": {
+                "replay_samples": self.buffer.size(),
+                "runs": int(totals["train_runs"]),
+                "trained": int(totals["train_trained"]),
+                "failed": int(totals["train_failed"]),
+                "skipped": int(totals["train_skipped"]),
+                "last": last_train,
+                "last_error": last_error,
+            },
+        }
+
+
+# -------------------------------
+# REPORT
+# -------------------------------
+def print_report(r):
+    lat, thr = r["latency"], r["throughput"]
+    print("\n⏩ Astra Market Replay")
+    print("--------------------------------------------------")
+    print(f"{r['sessions']} bars · {r['start']} → {r['end']} · {r['tickers']} tickers · speed {r['speed']}"
+          + ("x" if r["speed"] != "max" else ""))
+    b = lat["bar"]
+    if b.get("count"):
+        print(f"   bar latency   p50 {b['p50_ms']:8.1f} ms  p95 {b['p95_ms']:8.1f}  p99 {b['p99_ms']:8.1f}  "
+              f"max {b['max_ms']:8.1f}")
+    for stage, s in lat["stages"].items():
+        print(f"   {stage:<9} mean {s['mean_ms']:8.1f} ms  p95 {s['p95_ms']:8.1f}")
+    for stage, s in lat["scan_per_ticker"].items():
+        print(f"   · {stage:<11} {s['mean_ms']:7.2f} ms/ticker  p95 {s['p95_ms']:7.2f}")
+    print(f"   throughput    {thr['bars_per_sec']:.2f} bars/s · {thr['ticker_bars_per_sec']:.0f} ticker-bars/s · "
+          f"×{thr['speedup_vs_realtime']:,.0f} real time")
+    print(f"   schedule      {lat['late_bars']} late bar(s)"
+          + (f" · max lag {lat['schedule_lag']['max_ms']:.0f} ms" if lat["schedule_lag"].get("count") else ""))
+    t = r["trading"]
+    print(f"   trading       {t['opened']} opened · closed {t['closed']} · {t['open']} open · "
+          f"realized {t['realized_pnl']:+.2f} · hit rate {t['hit_rate']:.0%}")
+    tr = r["training"]
+    print(f"   training      {tr['trained']}/{tr['runs']} run(s) trained · {tr['skipped']} skipped (no data) · "
+          f"{tr['failed']} failed · {tr['replay_samples']} replay samples")
+    if tr["failed"]:
+        print(f"   ❌ training failed {tr['failed']}x — last error: {tr['last_error']}")
+    else:
+        print(f"   · last: {tr['last']}")
+    print("--------------------------------------------------\n")
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Astra accelerated market replay (end-to-end load test)")
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--tickers", nargs="*")
+    parser.add_argument("--include-crypto", action="store_true")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--days", type=int, default=DAYS, help="last N sessions (without --start)")
+    parser.add_argument("--lookback", type=int, default=LOOKBACK)
+    parser.add_argument("--speed", type=float, default=SPEED, help="1–1000 (× real time); 0 = unpaced")
+    parser.add_argument("--bar-seconds", type=float, default=BAR_SECONDS)
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--stop-pct", type=float, default=STOP_PCT)
+    parser.add_argument("--target-pct", type=float, default=TARGET_PCT)
+    parser.add_argument("--hold-bars", type=float, default=HOLD_BARS)
+    parser.add_argument("--train-every", type=int, default=TRAIN_EVERY, help="0 = no training")
+    parser.add_argument("--fetch-workers", type=int)
+    parser.add_argument("--score-workers", type=int)
+    parser.add_argument("--quiet", action="store_true")
+    parser.add_argument("--output", help="write the report JSON here")
+    args = parser.parse_args(argv)
+
+    feed = ReplayFeed(args.cache_dir, args.tickers, args.start, args.end, args.days, args.lookback,
+                      args.include_crypto)
+    if not feed.symbols or not len(feed.sessions):
+        print("❌ nothing to replay (no cached tickers / sessions in range)")
+        return 1
+
+    sim = MarketReplay(feed, args.speed, args.bar_seconds, args.top_k, args.stop_pct, args.target_pct,
+                       args.hold_bars, args.train_every, args.fetch_workers, args.score_workers)
+    report = sim.run(progress=not args.quiet)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    return 1 if report["training"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,10 +14,10 @@ def profile_astra_load(symbol="AAPL"):
     # -------------------------------
     # SMART SCAN TIMING
     # -------------------------------
-    t0 = time.time()
+    t0 = time.perf_counter()
     try:
         smart_scan(symbol)
-        report["smart_scan"] = round(time.time() - t0, 4)
+        report["smart_scan"] = round(time.perf_counter() - t0, 4)
         print(f"✔ smart_scan({symbol}) completed in {report['smart_scan']}s")
     except Exception as e:
         report["smart_scan"] = f"ERROR: {e}"
@@ -26,13 +26,31 @@ def profile_astra_load(symbol="AAPL"):
     # -------------------------------
     # HYBRID SCAN TIMING
     # -------------------------------
-    t1 = time.time()
+    t1 = time.perf_counter()
     try:
         hybrid_scan(symbol)
-        report["hybrid_scan"] = round(time.time() - t1, 4)
+        report["hybrid_scan"] = round(time.perf_counter() - t1, 4)
         print(f"✔ hybrid_scan({symbol}) completed in {report['hybrid_scan']}s")
     except Exception as e:
         report["hybrid_scan"] = f"ERROR: {e}"
         print(f"❌ hybrid_scan error: {e}")
 
     return report
+
+
+def profile_scan_pipeline(symbols=("AAPL", "MSFT", "NVDA", "BTC-USD")):
+    """Full ScanManager run with per-stage p50/p95/p99 + provider calls."""
+    from astra_modules.engine.scan_manager import ScanManager
+
+    manager = ScanManager(prefilter=None)
+    manager.scan_universe(list(symbols))
+    summary = manager.last_scan_stats.get("metrics", {})
+
+    print(f"✔ {summary.get('tickers', 0)} tickers in {summary.get('wall_s', 0):.2f}s "
+          f"({summary.get('tickers_per_sec', 0):.2f}/s)")
+    for stage, s in summary.get("stages", {}).items():
+        print(f"  {stage:<9} p50={s.get('p50_ms', 0):8.1f}ms  p95={s.get('p95_ms', 0):8.1f}ms  "
+              f"p99={s.get('p99_ms', 0):8.1f}ms  n={s.get('count', 0)}")
+    print(f"  provider calls: {summary.get('provider_calls', {})}")
+
+    return summary
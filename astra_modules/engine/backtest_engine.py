@@ -0,0 +1,542 @@
+"""
+backtest_engine.py — Phase-100
+
+Vectorized walk-forward backtest of AstraPrime scoring + RankingEngine.
+
+ • load_panel()      astra_cache/*.parquet → aligned (dates × tickers)
+                     close / volume frames (or synthetic_panel())
+ • panel_features()  the indicators AstraPrime reads (rsi, macd, ma10/ma30,
+                     10-bar momentum, volatility, vol_spike), computed on
+                     whole frames — every ticker and date at once
+ • agent_scores()    (T × N × K) agent matrix: each agent's run()
+                     rewritten as array ops on the same inputs AstraPrime
+                     feeds it (NaN → AstraPrime's defaults); normalization
+                     ranges from BOUNDS (overridable — engine/param_sweep.py)
+ • Backtest.run()    RankingEngine-equivalent rank score (one effective
+                     K-vector, since both layers are linear), top-k
+                     equal-weight portfolios every `hold` bars, close→close
+                     forward returns — no look-ahead
+
+Optional walk-forward weight fitting: every `refit_every` rebalances the
+agent weights are re-optimized (score_matrix.optimize_weights) on the
+trailing `train_window` completed periods only, then applied to the
+next block.
+
+Report: total / annualized return, Sharpe, max drawdown, hit rate,
+turnover, equal-weight universe benchmark.
+
+    python -m astra_modules.engine.backtest_engine --top-k 10 --hold 5
+    python -m astra_modules.engine.backtest_engine --synthetic 500 --years 5
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from astra_modules.core.symbol_index import get_symbol_index
+from astra_modules.engine.ranking_engine import RANK_FIELDS, RANK_WEIGHTS
+from astra_modules.engine.score_matrix import (
+    AGENT_ORDER,
+    NEUTRAL_SCORE,
+    weight_vector,
+    weights_to_dict,
+    optimize_weights,
+)
+
+
+CACHE_DIR = "astra_cache"
+
+# AstraPrime agent weights (core/astra_prime.py)
+PRIME_WEIGHTS = {
+    "momentum": 0.15,
+    "volume": 0.10,
+    "risk": 0.10,
+    "psych": 0.10,
+    "catalyst": 0.10,
+    "technical": 0.20,
+    "neural": 0.25,
+}
+
+# AstraPrime input defaults (used where an indicator is NaN)
+DEFAULTS = {
+    "rsi": 50.0,
+    "macd": 0.0,
+    "ma_ratio": 1.0,
+    "momentum": 0.0,
+    "volatility": 0.02,
+    "vol_spike": 1.0,
+    "psych_score": 0.5,
+    "catalyst_score": 0.0,
+}
+
+# Agent normalization ranges (agents/*.py) — value → 0..1 ramp bounds
+BOUNDS = {
+    "momentum": (-0.10, 0.10),
+    "volume": (0.5, 2.0),
+    "risk": (0.01, 0.06),
+    "rsi": (20.0, 80.0),
+    "macd": (-1.0, 1.0),
+    "ma_ratio": (0.8, 1.2),
+}
+
+TOP_K = 10
+HOLD = 5                # bars per rebalance (close → close)
+WARMUP = 30             # bars before the first rebalance (ma30)
+BARS_PER_YEAR = 252
+GAP_FILL = 5            # forward-fill at most this many missing bars per ticker
+
+REFIT_EVERY = 12        # rebalances between walk-forward weight refits
+MIN_TRAIN = 24          # rebalances of history before the first refit
+TRAIN_WINDOW = 104      # trailing rebalances each refit trains on (≈2y at hold=5)
+
+
+def _get_cache_dir() -> Path:
+    """Parquet OHLCV cache the backtest replays (astra_cache/)."""
+    return Path(__file__).resolve().parents[2] / CACHE_DIR
+
+
+# -------------------------------------------------------------
+# PANEL
+# -------------------------------------------------------------
+def load_panel(cache_dir=None, tickers=None, include_crypto=False, start=None, end=None):
+    """
+    Aligned close / volume frames (index = dates, columns = canonical
+    symbols). Crypto is reindexed onto the equity calendar when mixed.
+    """
+    cache_dir = Path(cache_dir) if cache_dir else _get_cache_dir()
+    symbols = get_symbol_index()
+    wanted = {symbols.canonical(t) for t in tickers} if tickers else None
+
+    closes, volumes, crypto = {}, {}, set()
+    for path in sorted(cache_dir.glob("*.parquet")):
+        sym = symbols.canonical(path.stem)
+        if wanted is not None and sym not in wanted:
+            continue
+        is_crypto = symbols.is_crypto(sym)
+        if is_crypto and not include_crypto:
+            continue
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            print(f"[backtest] failed to read {path.name}: {e}")
+            continue
+        df.columns = [str(c).lower() for c in df.columns]
+        if "date" not in df or "close" not in df:
+            continue
+        df = df.drop_duplicates("date").set_index(pd.to_datetime(df["date"])).sort_index()
+        closes[sym] = df["close"].astype(float)
+        volumes[sym] = df["volume"].astype(float) if "volume" in df else pd.Series(np.nan, index=df.index)
+        if is_crypto:
+            crypto.add(sym)
+
+    if not closes:
+        return pd.DataFrame(), pd.DataFrame()
+
+    close = pd.DataFrame(closes)
+    volume = pd.DataFrame(volumes).reindex(index=close.index, columns=close.columns)
+
+    equities = [c for c in close.columns if c not in crypto]
+    if equities and crypto:
+        calendar = close[equities].dropna(how="all").index
+        close, volume = close.loc[calendar], volume.loc[calendar]
+
+    if start is not None:
+        close, volume = close.loc[pd.Timestamp(start):], volume.loc[pd.Timestamp(start):]
+    if end is not None:
+        close, volume = close.loc[:pd.Timestamp(end)], volume.loc[:pd.Timestamp(end)]
+    return close, volume
+
+
+def synthetic_panel(n_tickers=500, years=5, seed=42):
+    """Seeded GBM close / volume frames (n_tickers × years of bars)."""
+    rng = np.random.default_rng(seed)
+    T = int(years * BARS_PER_YEAR)
+    dates = pd.bdate_range(end="2026-01-02", periods=T)
+    drift = rng.uniform(-0.0005, 0.001, n_tickers)
+    vol = rng.uniform(0.008, 0.035, n_tickers)
+    rets = drift + vol * rng.standard_normal((T, n_tickers))
+    close = rng.uniform(10, 400, n_tickers) * np.exp(np.cumsum(np.log1p(np.maximum(rets, -0.5)), axis=0))
+    volume = rng.uniform(2e5, 2e7, n_tickers) * rng.lognormal(0.0, 0.4, (T, n_tickers))
+    cols = [f"SYN{i:04d}" for i in range(n_tickers)]
+    return pd.DataFrame(close, index=dates, columns=cols), pd.DataFrame(volume, index=dates, columns=cols)
+
+
+# -------------------------------------------------------------
+# FEATURES (fetch_unified.enrich_ohlcv + add_agent_features)
+# -------------------------------------------------------------
+def panel_features(close, volume):
+    """Indicator frames, same definitions as the live pipeline."""
+    close = close.ffill(limit=GAP_FILL)
+    delta = close.diff()
+
+    gain = delta.clip(lower=0).rolling(14).mean()
+    loss = (-delta).clip(lower=0).rolling(14).mean()
+    rsi = 100 - 100 / (1 + gain / loss)
+
+    macd = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+
+    ma10 = close.rolling(10, min_periods=1).mean()
+    ma30 = close.rolling(30, min_periods=1).mean()
+
+    returns = close / close.shift(1) - 1
+    volatility = returns.rolling(10).std().fillna(0)
+    momentum = (close / close.shift(10) - 1).fillna(0)
+
+    avg_volume = volume.rolling(20, min_periods=1).mean().replace(0, np.nan)
+    vol_spike = (volume / avg_volume).fillna(1.0)
+
+    return {
+        "close": close,
+        "returns": returns,
+        "rsi": rsi.fillna(50),
+        "macd": macd,
+        "ma_ratio": ma10 / ma30,
+        "momentum": momentum,
+        "volatility": volatility,
+        "vol_spike": vol_spike,
+    }
+
+
+def _input(features, name):
+    """(T, N) AstraPrime input with NaN → default."""
+    arr = features[name].to_numpy(dtype=float) if name in features else None
+    if arr is None:
+        return None
+    return np.where(np.isfinite(arr), arr, DEFAULTS[name])
+
+
+def _ramp(x, low, high):
+    return np.clip((x - low) / (high - low), 0.0, 1.0)
+
+
+# -------------------------------------------------------------
+# AGENT SCORES (vectorized agent.run)
+# -------------------------------------------------------------
+SCORE_INPUTS = ("rsi", "macd", "ma_ratio", "vol_spike", "volatility")
+
+
+def score_inputs(features):
+    """{name: (T, N) array} of the indicators the rule agents read."""
+    return {name: _input(features, name) for name in SCORE_INPUTS}
+
+
+def agent_scores(features, psych=None, catalyst=None, neural=None, bounds=None):
+    """
+    (T, N, K) scores in AGENT_ORDER.
+
+    features: panel_features() frames or score_inputs() arrays.
+    psych / catalyst: optional (T, N) signals (default: AstraPrime's
+    neutral inputs). neural: optional callable (M, 12) vectors → (M,)
+    scores; NEUTRAL_SCORE when omitted (needs panel_features() frames).
+    bounds: {agent: (low, high)} overrides for BOUNDS.
+    """
+    b = {**BOUNDS, **(bounds or {})}
+    inputs = features if isinstance(features["rsi"], np.ndarray) else score_inputs(features)
+    rsi = inputs["rsi"]
+    T, N = rsi.shape
+    macd = inputs["macd"]
+    ma_ratio = inputs["ma_ratio"]
+    vol_spike = inputs["vol_spike"]
+    volatility = inputs["volatility"]
+
+    S = np.empty((T, N, len(AGENT_ORDER)), dtype=float)
+    col = {name: j for j, name in enumerate(AGENT_ORDER)}
+
+    # MomentumAgent reads roc_5 / roc_10 / slope_norm; AstraPrime only passes
+    # "momentum", so all three fall back to 0.0 → normalize(0) (0.5 at ±10%)
+    S[..., col["momentum"]] = _ramp(0.0, *b["momentum"])
+    S[..., col["volume"]] = _ramp(vol_spike, *b["volume"])
+    S[..., col["risk"]] = 1.0 - _ramp(volatility, *b["risk"])
+
+    psych = DEFAULTS["psych_score"] if psych is None else np.nan_to_num(np.asarray(psych, float), nan=DEFAULTS["psych_score"])
+    catalyst = DEFAULTS["catalyst_score"] if catalyst is None else np.nan_to_num(np.asarray(catalyst, float), nan=DEFAULTS["catalyst_score"])
+    S[..., col["psych"]] = np.clip(psych, 0.0, 1.0)
+    S[..., col["catalyst"]] = np.clip(catalyst, 0.0, 1.0)
+
+    S[..., col["technical"]] = (
+        0.4 * _ramp(rsi, *b["rsi"])
+        + 0.3 * _ramp(macd, *b["macd"])
+        + 0.3 * _ramp(ma_ratio, *b["ma_ratio"])
+    )
+
+    if neural is None:
+        S[..., col["neural"]] = NEUTRAL_SCORE
+    else:
+        vectors = neural_vectors(features, psych, catalyst)
+        out = np.asarray(neural(vectors.reshape(T * N, -1)), dtype=float).reshape(T, N)
+        S[..., col["neural"]] = np.where(np.isfinite(out), out, NEUTRAL_SCORE)
+
+    return S
+
+
+def neural_vectors(features, psych=None, catalyst=None):
+    """(T, N, 12) AstraPrime neural input vectors."""
+    close = features["close"].to_numpy(dtype=float)
+    returns = features["returns"]
+    psych = DEFAULTS["psych_score"] if psych is None else psych
+    catalyst = DEFAULTS["catalyst_score"] if catalyst is None else catalyst
+    cols = [
+        _input(features, "rsi") / 100,
+        _input(features, "macd"),
+        _input(features, "ma_ratio"),
+        _input(features, "momentum"),
+        _input(features, "volatility"),
+        _input(features, "vol_spike"),
+        np.broadcast_to(psych, close.shape),
+        np.broadcast_to(catalyst, close.shape),
+        np.nan_to_num(close) / 1000.0,
+        returns.rolling(5, min_periods=1).mean().to_numpy(dtype=float),
+        returns.rolling(20, min_periods=1).mean().to_numpy(dtype=float),
+        returns.to_numpy(dtype=float),
+    ]
+    return np.stack(cols, axis=-1)
+
+
+def rank_vector(agent_weights=None, rank_weights=None):
+    """
+    Effective (K,) vector with rank_score = S @ v:
+    RankingEngine combines astra_score (= S @ agent weights) with raw
+    agent columns — both linear, so they fold into one vector.
+    """
+    w_agents = weight_vector(agent_weights or PRIME_WEIGHTS, AGENT_ORDER)
+    w_rank = dict(rank_weights or RANK_WEIGHTS)
+    v = w_rank.get("astra_score", 0.0) * w_agents
+    for field in RANK_FIELDS:
+        if field in AGENT_ORDER:
+            v[AGENT_ORDER.index(field)] += w_rank.get(field, 0.0)
+    return v
+
+
+# -------------------------------------------------------------
+# PORTFOLIOS
+# -------------------------------------------------------------
+def top_k_members(scores, R, top_k=TOP_K):
+    """(P, N) top-k membership from (P, N) scores; untradable rows never picked."""
+    valid = np.isfinite(R)
+    scores = np.where(valid, scores, -np.inf)
+    k = max(1, min(int(top_k), scores.shape[1]))
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    picked_ok = np.take_along_axis(valid, top, axis=1)
+
+    member = np.zeros(scores.shape, dtype=bool)
+    np.put_along_axis(member, top, picked_ok, axis=1)
+    return member
+
+
+def portfolio_returns(member, R, cost=0.0):
+    """Equal-weight (net, benchmark, turnover) per rebalance; cost per side."""
+    n_held = member.sum(axis=1)
+    R0 = np.where(member, R, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gross = np.where(n_held > 0, R0.sum(axis=1) / np.maximum(n_held, 1), 0.0)
+        bench = np.nanmean(np.where(np.isfinite(R), R, np.nan), axis=1)
+    bench = np.nan_to_num(bench)
+
+    # Turnover: fraction of the book replaced at each rebalance
+    prev = np.vstack([np.zeros((1, member.shape[1]), dtype=bool), member[:-1]])
+    changed = (member & ~prev).sum(axis=1)
+    turnover = np.where(n_held > 0, changed / np.maximum(n_held, 1), 0.0)
+    return gross - turnover * cost * 2, bench, turnover
+
+
+def return_stats(r, periods_per_year):
+    """Total / annualized return, Sharpe and max drawdown of period returns."""
+    if len(r) == 0:
+        return {"total_return": 0.0, "annual_return": 0.0, "sharpe": 0.0, "max_drawdown": 0.0}
+    equity = np.cumprod(1 + r)
+    years = len(r) / periods_per_year
+    sd = r.std(ddof=1) if len(r) > 1 else 0.0
+    return {
+        "total_return": float(equity[-1] - 1),
+        "annual_return": float(equity[-1] ** (1 / years) - 1) if years > 0 and equity[-1] > 0 else -1.0,
+        "sharpe": float(r.mean() / sd * np.sqrt(periods_per_year)) if sd > 0 else 0.0,
+        "max_drawdown": float((equity / np.maximum.accumulate(equity) - 1).min()),
+    }
+
+
+# -------------------------------------------------------------
+# BACKTEST
+# -------------------------------------------------------------
+class Backtest:
+    def __init__(self, close, volume, top_k=TOP_K, hold=HOLD, warmup=WARMUP,
+                 agent_weights=None, rank_weights=None, cost_bps=0.0,
+                 psych=None, catalyst=None, neural=None, bounds=None):
+        self.close = close
+        self.volume = volume
+        self.top_k = int(top_k)
+        self.hold = max(1, int(hold))
+        self.warmup = int(warmup)
+        self.agent_weights = dict(agent_weights or PRIME_WEIGHTS)
+        self.rank_weights = dict(rank_weights or RANK_WEIGHTS)
+        self.cost = cost_bps / 1e4
+        self.psych = psych
+        self.catalyst = catalyst
+        self.neural = neural
+        self.bounds = dict(bounds or {})
+
+    def prepare(self):
+        """Features, agent scores and forward returns on rebalance dates."""
+        t0 = time.perf_counter()
+        features = panel_features(self.close, self.volume)
+        S = agent_scores(features, self.psych, self.catalyst, self.neural, self.bounds)
+
+        close = features["close"].to_numpy(dtype=float)
+        raw = self.close.to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fwd = np.full_like(close, np.nan)
+            fwd[:-self.hold] = close[self.hold:] / close[:-self.hold] - 1
+
+        # Tradable: a real (not gap-filled) bar today and a price at exit
+        fwd = np.where(np.isfinite(raw) & np.isfinite(fwd), fwd, np.nan)
+
+        dates = np.arange(self.warmup, len(close) - self.hold, self.hold)
+        self.dates = self.close.index[dates]
+        self.inputs = {k: v[dates] for k, v in score_inputs(features).items()}   # (P, N) each
+        self.S = S[dates]                       # (P, N, K)
+        self.R = fwd[dates]                     # (P, N)
+        self.prepare_seconds = time.perf_counter() - t0
+        return self
+
+    def _walk_forward_scores(self, refit_every, min_train, train_window, n_candidates, seed):
+        """Per-block agent weights fitted on earlier rebalances only."""
+        P = len(self.S)
+        scores = np.empty(self.R.shape)
+        fitted = []
+        v0 = rank_vector(self.agent_weights, self.rank_weights)
+        base = weight_vector(self.agent_weights, AGENT_ORDER)
+
+        for start in range(0, P, refit_every):
+            block = slice(start, min(P, start + refit_every))
+            # The period ending at rebalance p is only known `hold` bars later,
+            # i.e. at p + 1 — train on [start - 1 - train_window, start - 1)
+            train = start - 1
+            if train >= min_train:
+                lo = max(0, train - train_window)
+                res = optimize_weights(self.S[lo:train], self.R[lo:train], n_candidates=n_candidates,
+                                       top_k=self.top_k, seed=seed, base=base)
+                v = rank_vector(res["weights"], self.rank_weights)
+                fitted.append({"from": str(self.dates[start].date()), **res["weights"]})
+            else:
+                v = v0
+            scores[block] = self.S[block] @ v
+        return scores, fitted
+
+    def run(self, walk_forward=False, refit_every=REFIT_EVERY, min_train=MIN_TRAIN,
+            train_window=TRAIN_WINDOW, n_candidates=1000, seed=None) -> dict:
+        if not hasattr(self, "S"):
+            self.prepare()
+        t0 = time.perf_counter()
+
+        fitted = []
+        if walk_forward:
+            scores, fitted = self._walk_forward_scores(refit_every, min_train, train_window, n_candidates, seed)
+        else:
+            scores = self.S @ rank_vector(self.agent_weights, self.rank_weights)
+
+        member = top_k_members(scores, self.R, self.top_k)
+        net, bench, turnover = portfolio_returns(member, self.R, self.cost)
+
+        report = self._report(net, bench, member, turnover)
+        report["seconds"] = {"prepare": self.prepare_seconds, "run": time.perf_counter() - t0}
+        if fitted:
+            report["walk_forward_weights"] = fitted
+        self.period_returns = pd.DataFrame({"portfolio": net, "benchmark": bench, "turnover": turnover},
+                                           index=self.dates)
+        return report
+
+    def _report(self, net, bench, member, turnover):
+        periods_per_year = BARS_PER_YEAR / self.hold
+        picks = member.sum()
+        wins = (member & (self.R > 0)).sum()
+
+        return {
+            "tickers": int(self.close.shape[1]),
+            "bars": int(self.close.shape[0]),
+            "start": str(self.dates[0].date()) if len(self.dates) else None,
+            "end": str(self.dates[-1].date()) if len(self.dates) else None,
+            "rebalances": int(len(net)),
+            "top_k": self.top_k,
+            "hold": self.hold,
+            "portfolio": return_stats(net, periods_per_year),
+            "benchmark": return_stats(bench, periods_per_year),
+            "hit_rate": float(wins / picks) if picks else 0.0,
+            "beat_benchmark": float((net > bench).mean()) if len(net) else 0.0,
+            "avg_turnover": float(turnover[1:].mean()) if len(turnover) > 1 else 0.0,
+            "agent_weights": weights_to_dict(weight_vector(self.agent_weights, AGENT_ORDER)),
+        }
+
+
+def run_backtest(close=None, volume=None, walk_forward=False, **kwargs):
+    """Convenience: cache panel (or given frames) → report dict."""
+    if close is None:
+        close, volume = load_panel()
+    run_kw = {k: kwargs.pop(k) for k in ("refit_every", "min_train", "train_window", "n_candidates", "seed") if k in kwargs}
+    return Backtest(close, volume, **kwargs).run(walk_forward=walk_forward, **run_kw)
+
+
+# -------------------------------------------------------------
+# CLI
+# -------------------------------------------------------------
+def print_report(r):
+    p, b = r["portfolio"], r["benchmark"]
+    print("\n📈 Astra Walk-Forward Backtest")
+    print("--------------------------------------------------")
+    print(f"{r['tickers']} tickers · {r['bars']} bars · {r['start']} → {r['end']}")
+    print(f"top-{r['top_k']} every {r['hold']} bars · {r['rebalances']} rebalances")
+    print(f"   portfolio  total {p['total_return']:+.2%}  annual {p['annual_return']:+.2%}  "
+          f"sharpe {p['sharpe']:.2f}  maxDD {p['max_drawdown']:.2%}")
+    print(f"   benchmark  total {b['total_return']:+.2%}  annual {b['annual_return']:+.2%}  "
+          f"sharpe {b['sharpe']:.2f}  maxDD {b['max_drawdown']:.2%}")
+    print(f"   hit rate {r['hit_rate']:.1%} · beat benchmark {r['beat_benchmark']:.1%} · "
+          f"turnover {r['avg_turnover']:.1%}")
+    s = r["seconds"]
+    print(f"   {s['prepare']:.2f}s features + scores · {s['run']:.2f}s portfolios")
+    print("--------------------------------------------------\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Astra vectorized walk-forward backtest")
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--tickers", nargs="*")
+    parser.add_argument("--include-crypto", action="store_true")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="N synthetic tickers instead of the cache")
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--hold", type=int, default=HOLD)
+    parser.add_argument("--cost-bps", type=float, default=0.0)
+    parser.add_argument("--walk-forward", action="store_true", help="refit agent weights on past rebalances")
+    parser.add_argument("--refit-every", type=int, default=REFIT_EVERY)
+    parser.add_argument("--train-window", type=int, default=TRAIN_WINDOW)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="write the report JSON here")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        close, volume = synthetic_panel(args.synthetic, args.years, seed=args.seed or 42)
+    else:
+        close, volume = load_panel(args.cache_dir, args.tickers, args.include_crypto, args.start, args.end)
+    if close.empty or len(close) <= WARMUP + args.hold:
+        print("❌ not enough price history for a backtest")
+        return 1
+
+    bt = Backtest(close, volume, top_k=args.top_k, hold=args.hold, cost_bps=args.cost_bps)
+    report = bt.run(walk_forward=args.walk_forward, refit_every=args.refit_every,
+                    train_window=args.train_window, seed=args.seed)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""
+param_sweep.py — Phase-100
+
+Parallel grid / random search over the hand-picked scoring parameters:
+agent normalization ranges (backtest_engine.BOUNDS — volume spike,
+risk volatility band, technical RSI / MACD / MA-ratio ramps) and the
+AstraPrime agent weights.
+
+ • the panel is prepared ONCE in the parent (features, forward returns,
+   fixed agent columns on the rebalance dates) and copied into a single
+   multiprocessing.shared_memory block
+ • workers attach to that block by name in the pool initializer — only
+   the block name, array layout and small config dicts cross the process
+   boundary, never the panel
+ • each config re-scores the shared inputs, builds top-k portfolios and
+   is measured in-sample and on a trailing holdout slice
+ • output: ranked results table (in-sample metric, holdout alongside),
+   with the current hand-picked config as a reference row
+
+MomentumAgent's ±10% range is not swept: AstraPrime feeds it no
+roc_5 / roc_10 / slope_norm, so its score is constant for every ticker
+and the range cannot change a ranking.
+
+    python -m astra_modules.engine.param_sweep --mode random --samples 500
+    python -m astra_modules.engine.param_sweep --mode grid --synthetic 300 --output sweep.csv
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from astra_modules.engine.backtest_engine import (
+    BARS_PER_YEAR,
+    BOUNDS,
+    HOLD,
+    PRIME_WEIGHTS,
+    SCORE_INPUTS,
+    TOP_K,
+    WARMUP,
+    Backtest,
+    agent_scores,
+    load_panel,
+    portfolio_returns,
+    rank_vector,
+    return_stats,
+    synthetic_panel,
+    top_k_members,
+)
+from astra_modules.engine.score_matrix import AGENT_ORDER
+
+
+# Grid mode: candidate (low, high) values per swept agent range
+GRID = {
+    "volume": ((0.3, 0.5, 0.8), (1.5, 2.0, 3.0)),
+    "risk": ((0.005, 0.01, 0.02), (0.04, 0.06, 0.10)),
+    "rsi": ((20.0, 30.0), (70.0, 80.0)),
+    "macd": ((-2.0, -1.0, -0.5), (0.5, 1.0, 2.0)),
+    "ma_ratio": ((0.8, 0.9), (1.1, 1.2)),
+}
+
+# Random mode: uniform (low range, high range) per swept agent range
+RANGES = {
+    "volume": ((0.2, 1.0), (1.2, 4.0)),
+    "risk": ((0.0, 0.03), (0.03, 0.12)),
+    "rsi": ((10.0, 45.0), (55.0, 90.0)),
+    "macd": ((-3.0, -0.1), (0.1, 3.0)),
+    "ma_ratio": ((0.7, 0.98), (1.02, 1.3)),
+}
+
+# Columns not driven by BOUNDS — taken as-is from the prepared backtest
+FIXED_AGENTS = ("psych", "catalyst", "neural")
+
+METRICS = ("sharpe", "annual_return", "total_return", "max_drawdown", "hit_rate")
+WEIGHT_CONCENTRATION = 20.0     # Dirichlet concentration around PRIME_WEIGHTS
+HOLDOUT = 0.25                  # trailing fraction of rebalances kept out of the ranking
+SAMPLES = 200
+SHOW = 20
+
+
+# -------------------------------------------------------------
+# CONFIGS
+# -------------------------------------------------------------
+def baseline_config():
+    """The current hand-picked parameters."""
+    return {
+        "bounds": {name: list(BOUNDS[name]) for name in GRID},
+        "weights": dict(PRIME_WEIGHTS),
+    }
+
+
+def grid_configs(grid=None, weights=None):
+    """Every (low, high) combination in `grid` with fixed agent weights."""
+    grid = grid or GRID
+    names = list(grid)
+    axes = [itertools.product(lows, highs) for lows, highs in grid.values()]
+    for combo in itertools.product(*axes):
+        yield {
+            "bounds": {name: [float(lo), float(hi)] for name, (lo, hi) in zip(names, combo)},
+            "weights": dict(weights or PRIME_WEIGHTS),
+        }
+
+
+def random_configs(n, ranges=None, seed=None, sweep_weights=True):
+    """n configs: bounds uniform within `ranges`, weights Dirichlet around PRIME_WEIGHTS."""
+    ranges = ranges or RANGES
+    rng = np.random.default_rng(seed)
+    base = np.array([PRIME_WEIGHTS[name] for name in AGENT_ORDER], dtype=float)
+    for _ in range(n):
+        bounds = {
+            name: [float(rng.uniform(*low)), float(rng.uniform(*high))]
+            for name, (low, high) in ranges.items()
+        }
+        if sweep_weights:
+            w = rng.dirichlet(base / base.sum() * WEIGHT_CONCENTRATION)
+            weights = {name: float(x) for name, x in zip(AGENT_ORDER, w)}
+        else:
+            weights = dict(PRIME_WEIGHTS)
+        yield {"bounds": bounds, "weights": weights}
+
+
+# -------------------------------------------------------------
+# SHARED PANEL
+# -------------------------------------------------------------
+def _share(arrays):
+    """Copy {name: float64 array} into one SharedMemory block → (shm, layout)."""
+    layout, offset = [], 0
+    for name, arr in arrays.items():
+        layout.append((name, tuple(arr.shape), offset))
+        offset += arr.size * 8
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, shape, off), arr in zip(layout, arrays.values()):
+        np.ndarray(shape, dtype=np.float64, buffer=shm.buf, offset=off)[...] = arr
+    return shm, layout
+
+
+def _attach(name):
+    """Attach without registering with the resource tracker where supported (3.13+)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+# Worker state (set once per process by _init_worker)
+_SHM = None
+_PANEL = {}
+_PARAMS = {}
+
+
+def _init_worker(shm_name, layout, params):
+    global _SHM, _PANEL, _PARAMS
+    _SHM = _attach(shm_name)
+    _PANEL = {
+        name: np.ndarray(shape, dtype=np.float64, buffer=_SHM.buf, offset=off)
+        for name, shape, off in layout
+    }
+    _PARAMS = params
+
+
+def _release_worker():
+    """Drop the views and detach (in-process evaluation)."""
+    global _SHM, _PANEL
+    _PANEL = {}
+    if _SHM is not None:
+        _SHM.close()
+        _SHM = None
+
+
+def _evaluate(item):
+    """(config_id, config) → flat result row, scored on the shared panel."""
+    config_id, config = item
+    p = _PARAMS
+    R = _PANEL["R"]
+
+    S = agent_scores({name: _PANEL[name] for name in SCORE_INPUTS}, bounds=config["bounds"])
+    for name in FIXED_AGENTS:
+        j = AGENT_ORDER.index(name)
+        S[..., j] = _PANEL["fixed"][..., FIXED_AGENTS.index(name)]
+
+    scores = S @ rank_vector(config["weights"])
+    member = top_k_members(scores, R, p["top_k"])
+    net, bench, turnover = portfolio_returns(member, R, p["cost"])
+
+    split = p["split"]
+    periods_per_year = BARS_PER_YEAR / p["hold"]
+    picks = member[:split].sum()
+
+    row = {"id": config_id}
+    for name, (lo, hi) in config["bounds"].items():
+        row[f"{name}_low"], row[f"{name}_high"] = lo, hi
+    for name in AGENT_ORDER:
+        row[f"w_{name}"] = config["weights"].get(name, 0.0)
+    row.update(return_stats(net[:split], periods_per_year))
+    row["hit_rate"] = float((member[:split] & (R[:split] > 0)).sum() / picks) if picks else 0.0
+    row["beat_benchmark"] = float((net[:split] > bench[:split]).mean()) if split else 0.0
+    row["avg_turnover"] = float(turnover[1:split].mean()) if split > 1 else 0.0
+    if split < len(net):
+        holdout = return_stats(net[split:], periods_per_year)
+        row["holdout_sharpe"] = holdout["sharpe"]
+        row["holdout_return"] = holdout["total_return"]
+    return row
+
+
+# -------------------------------------------------------------
+# SWEEP
+# -------------------------------------------------------------
+def _collect(results, total, t0):
+    rows, step = [], max(1, total // 10)
+    for i, row in enumerate(results, start=1):
+        rows.append(row)
+        if i % step == 0 or i == total:
+            print(f"[sweep] {i}/{total} · {time.perf_counter() - t0:.1f}s")
+    return rows
+
+
+def sweep(close, volume, configs, top_k=TOP_K, hold=HOLD, warmup=WARMUP, cost_bps=0.0,
+          metric="sharpe", holdout=HOLDOUT, workers=None, include_baseline=True) -> pd.DataFrame:
+    """
+    Evaluate `configs` on a process pool sharing one prepared panel.
+    Returns the results table ranked by in-sample `metric` (best first).
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {METRICS}")
+
+    t0 = time.perf_counter()
+    bt = Backtest(close, volume, top_k=top_k, hold=hold, warmup=warmup, cost_bps=cost_bps).prepare()
+    fixed = np.stack([bt.S[..., AGENT_ORDER.index(name)] for name in FIXED_AGENTS], axis=-1)
+    P = len(bt.R)
+    split = P - int(P * holdout) if 0 < holdout < 1 else P
+
+    items = list(enumerate(configs, start=1))
+    if include_baseline:
+        items.insert(0, (0, baseline_config()))
+
+    shm, layout = _share({**bt.inputs, "fixed": fixed, "R": bt.R})
+    params = {"top_k": bt.top_k, "hold": bt.hold, "cost": bt.cost, "split": split}
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    print(f"[sweep] {len(items)} configs · {close.shape[1]} tickers × {P} rebalances · "
+          f"{shm.size / 1e6:.1f} MB shared · {workers} worker(s)")
+
+    t_prep = time.perf_counter() - t0
+    try:
+        if workers == 1:
+            _init_worker(shm.name, layout, params)
+            try:
+                rows = _collect(map(_evaluate, items), len(items), t0)
+            finally:
+                _release_worker()
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(shm.name, layout, params)) as pool:
+                chunksize = max(1, len(items) // (workers * 8))
+                rows = _collect(pool.map(_evaluate, items, chunksize=chunksize), len(items), t0)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    table = pd.DataFrame(rows)
+    table["baseline"] = table["id"] == 0 if include_baseline else False
+    table = table.sort_values(metric, ascending=False, kind="stable").reset_index(drop=True)
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+    table.attrs.update({
+        "metric": metric,
+        "rebalances": P,
+        "holdout_rebalances": P - split,
+        "seconds": {"prepare": t_prep, "total": time.perf_counter() - t0},
+    })
+    return table
+
+
+# -------------------------------------------------------------
+# CLI
+# -------------------------------------------------------------
+def print_table(table, show=SHOW):
+    metric = table.attrs.get("metric", "sharpe")
+    secs = table.attrs.get("seconds", {})
+    print("\n🧪 Astra Parameter Sweep")
+    print("--------------------------------------------------")
+    print(f"{len(table)} configs · ranked by in-sample {metric} · "
+          f"{table.attrs.get('holdout_rebalances', 0)} holdout rebalances · "
+          f"{secs.get('total', 0.0):.1f}s")
+
+    cols = ["rank", "id", "sharpe", "annual_return", "max_drawdown", "hit_rate"]
+    cols += [c for c in ("holdout_sharpe", "holdout_return") if c in table]
+    cols += [f"{n}_{s}" for n in GRID for s in ("low", "high")]
+    cols += [f"w_{n}" for n in AGENT_ORDER]
+
+    top = table.head(show)
+    base = table[table["baseline"]]
+    if len(base) and base.index[0] >= show:
+        top = pd.concat([top, base])
+    print(top[cols].to_string(index=False, float_format=lambda x: f"{x:.4g}"))
+    if len(base):
+        print(f"   baseline (hand-picked) ranks {int(base['rank'].iloc[0])}/{len(table)}")
+    print("--------------------------------------------------\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Astra scoring parameter sweep")
+    parser.add_argument("--mode", choices=("grid", "random"), default="random")
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="random mode: number of configs")
+    parser.add_argument("--max-configs", type=int, help="grid mode: random subset of the grid")
+    parser.add_argument("--fixed-weights", action="store_true", help="random mode: keep AstraPrime weights")
+    parser.add_argument("--metric", choices=METRICS, default="sharpe")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--tickers", nargs="*")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="N synthetic tickers instead of the cache")
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--hold", type=int, default=HOLD)
+    parser.add_argument("--cost-bps", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--show", type=int, default=SHOW)
+    parser.add_argument("--output", help="write the full table (.csv or .json)")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        close, volume = synthetic_panel(args.synthetic, args.years, seed=args.seed or 42)
+    else:
+        close, volume = load_panel(args.cache_dir, args.tickers, start=args.start, end=args.end)
+    if close.empty or len(close) <= WARMUP + args.hold:
+        print("❌ not enough price history for a sweep")
+        return 1
+
+    if args.mode == "grid":
+        configs = list(grid_configs())
+        if args.max_configs and args.max_configs < len(configs):
+            rng = np.random.default_rng(args.seed)
+            keep = np.sort(rng.choice(len(configs), args.max_configs, replace=False))
+            configs = [configs[i] for i in keep]
+    else:
+        configs = list(random_configs(args.samples, seed=args.seed, sweep_weights=not args.fixed_weights))
+
+    table = sweep(close, volume, configs, top_k=args.top_k, hold=args.hold, cost_bps=args.cost_bps,
+                  metric=args.metric, holdout=args.holdout, workers=args.workers)
+    print_table(table, args.show)
+
+    if args.output:
+        if args.output.endswith(".json"):
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"meta": table.attrs, "results": table.to_dict("records")}, f, indent=2, default=float)
+        else:
+            table.to_csv(args.output, index=False)
+        print(f"[sweep] results → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
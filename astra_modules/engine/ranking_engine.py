@@ -8,11 +8,28 @@ Ranks tickers based on:
  • Volatility Quality
  • Neural Probability
 Produces a single sortable numeric rank_score.
+Scores are combined as one (N × F) matrix · weight vector.
 """
 
+import numpy as np
+
+from astra_modules.engine.score_matrix import weight_vector
+
+
+# Rank fields + weights (column order of the rank matrix)
+RANK_FIELDS = ("astra_score", "momentum", "technical", "neural")
+RANK_WEIGHTS = {
+    "astra_score": 0.50,
+    "momentum": 0.20,
+    "technical": 0.20,
+    "neural": 0.10,
+}
+
+
 class RankingEngine:
-    def __init__(self):
-        pass
+    def __init__(self, weights=None):
+        self.weights = dict(weights or RANK_WEIGHTS)
+        self.weight_vector = weight_vector(self.weights, RANK_FIELDS)
 
     def safe(self, v, default=0.0):
         try:
@@ -45,6 +62,20 @@ class RankingEngine:
             "neural": self.safe(agents.get("neural", 0.5)),
         }
 
+    def rank_matrix(self, packets: dict):
+        """
+        Build the (N × F) rank matrix in RANK_FIELDS order.
+        Returns (tickers, matrix).
+        """
+        tickers = list(packets.keys())
+        M = np.empty((len(tickers), len(RANK_FIELDS)), dtype=float)
+
+        for i, ticker in enumerate(tickers):
+            s = self.extract_scores(packets[ticker])
+            M[i] = [s[f] for f in RANK_FIELDS]
+
+        return tickers, M
+
     def compute_rank_score(self, s):
         """
         Combine all model signals into one master rank score.
@@ -56,15 +87,19 @@ class RankingEngine:
          • Neural Prob      10%
         """
         try:
-            return float(
-                0.50 * s["astra_score"] +
-                0.20 * s["momentum"] +
-                0.20 * s["technical"] +
-                0.10 * s["neural"]
-            )
+            row = np.array([s[f] for f in RANK_FIELDS], dtype=float)
+            return float(row @ self.weight_vector)
         except Exception:
             return 0.0
 
+    def rank_entry(self, ticker, packet):
+        """Single ranked row (same shape as rank() output)."""
+        return {
+            "ticker": ticker,
+            "rank_score": self.compute_rank_score(self.extract_scores(packet)),
+            "packet": packet,
+        }
+
     def rank(self, packets: dict):
         """
         packets = {
@@ -81,17 +116,17 @@ class RankingEngine:
         """
         ranked = []
 
-        if not isinstance(packets, dict):
+        if not isinstance(packets, dict) or not packets:
             return ranked
 
-        for ticker, packet in packets.items():
-            s = self.extract_scores(packet)
-            rank_score = self.compute_rank_score(s)
+        tickers, M = self.rank_matrix(packets)
+        scores = M @ self.weight_vector
 
+        for ticker, rank_score in zip(tickers, scores):
             ranked.append({
                 "ticker": ticker,
-                "rank_score": rank_score,
-                "packet": packet,
+                "rank_score": float(rank_score),
+                "packet": packets[ticker],
             })
 
         # highest first
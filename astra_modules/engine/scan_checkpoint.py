@@ -0,0 +1,211 @@
+"""
+scan_checkpoint.py — Phase-100
+
+Per-ticker checkpoints for long universe scans.
+
+Layout (project root):
+    astra_checkpoints/
+        <scan_id>.jsonl
+
+Line 1 is the header (scan_id, screened ticker list, created_at);
+every following line is one finished ticker:
+    {"ticker": "AAPL", "status": "ok", "packet": {...}}
+    {"ticker": "XYZ",  "status": "fetch_failed"}
+and a final {"complete": true} once the scan ends.
+
+Lines are appended + flushed as each ticker finishes, so a crash
+or restart loses at most the tickers still in flight. Re-opening
+the same scan_id resumes from the recorded tickers — they are
+neither refetched nor rescored, except fetch_failed ones, which are
+retried. A torn last line is ignored.
+
+A finished scan's checkpoint is deleted by finish() (keep_finished=True
+keeps it, marked complete); either way it is never replayed —
+re-opening its scan_id starts that scan over. latest_incomplete()
+finds the interrupted scan (if any) a restarted service should resume.
+Interrupted checkpoints beyond the newest KEEP_CHECKPOINTS are pruned.
+"""
+
+import json
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from astra_modules.engine.scan_state import json_default
+
+
+CHECKPOINT_DIR = "astra_checkpoints"
+KEEP_CHECKPOINTS = 50
+
+# Per-ticker outcomes
+OK = "ok"
+FETCH_FAILED = "fetch_failed"
+SCORE_FAILED = "score_failed"
+
+
+def _get_checkpoint_root() -> Path:
+    """Directory of per-scan checkpoint files (astra_checkpoints/)."""
+    return Path(__file__).resolve().parents[2] / CHECKPOINT_DIR
+
+
+def new_scan_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+
+def _is_complete(path: Path) -> bool:
+    """True if the checkpoint's last line is the {"complete": true} marker."""
+    try:
+        with path.open("rb") as f:
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - 4096))
+            lines = f.read().splitlines()
+        return bool(lines) and json.loads(lines[-1]).get("complete", False)
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def latest_incomplete(prefix="", root=None, max_age=None):
+    """
+    scan_id of the newest unfinished checkpoint whose id starts with
+    `prefix` (and was written to within max_age seconds), else None.
+    """
+    root = Path(root) if root else _get_checkpoint_root()
+    if not root.is_dir():
+        return None
+    now = time.time()
+    candidates = sorted(root.glob(f"{prefix}*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in candidates:
+        if max_age is not None and now - path.stat().st_mtime > max_age:
+            break
+        if not _is_complete(path):
+            return path.stem
+    return None
+
+
+class ScanCheckpoint:
+    def __init__(self, scan_id=None, root=None, keep=KEEP_CHECKPOINTS, keep_finished=False):
+        self.scan_id = scan_id or new_scan_id()
+        self.root = Path(root) if root else _get_checkpoint_root()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / f"{self.scan_id}.jsonl"
+        self.keep = keep
+        self.keep_finished = keep_finished
+
+        self.tickers = None      # screened universe from the header
+        self.records = {}        # ticker -> {"status", "packet"}
+        self.complete = False
+
+        self._lock = threading.Lock()
+        self._fh = None
+        self._load()
+
+    # ---------------------------------------------------------
+    # LOAD (resume)
+    # ---------------------------------------------------------
+    def _load(self):
+        if not self.path.exists():
+            return
+
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    continue     # torn write from a crash
+
+                if "tickers" in rec and self.tickers is None:
+                    self.tickers = list(rec["tickers"])
+                elif rec.get("complete"):
+                    self.complete = True
+                elif "ticker" in rec:
+                    self.records[rec["ticker"]] = {
+                        "status": rec.get("status", OK),
+                        "packet": rec.get("packet"),
+                    }
+
+    @property
+    def resumed(self) -> bool:
+        return self.tickers is not None
+
+    def _settled(self, ticker) -> bool:
+        rec = self.records.get(ticker)
+        return rec is not None and rec["status"] != FETCH_FAILED
+
+    def settled_count(self) -> int:
+        """Recorded tickers a resume will not fetch again."""
+        return sum(1 for t in self.records if self._settled(t))
+
+    def remaining(self):
+        """Header tickers with no recorded outcome yet, plus fetch failures (retried)."""
+        return [t for t in (self.tickers or []) if not self._settled(t)]
+
+    def packets(self):
+        return {t: r["packet"] for t, r in self.records.items() if r["status"] == OK and r["packet"]}
+
+    # ---------------------------------------------------------
+    # APPEND
+    # ---------------------------------------------------------
+    def _append(self, rec):
+        line = json.dumps(rec, default=json_default) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self._fh = self.path.open("a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+
+    def begin(self, tickers):
+        """Write the header for a new scan (no-op when resuming)."""
+        if self.resumed:
+            return
+        self.tickers = list(tickers)
+        self._append({"scan_id": self.scan_id, "tickers": self.tickers, "created_at": time.time()})
+        self._prune()
+
+    def record(self, ticker, status=OK, packet=None):
+        rec = {"ticker": ticker, "status": status}
+        if packet is not None:
+            rec["packet"] = packet
+        self._append(rec)
+        self.records[ticker] = {"status": status, "packet": packet}
+
+    def finish(self):
+        """Mark the scan complete; the file is deleted unless keep_finished."""
+        if not self.complete:
+            if self.keep_finished:
+                self._append({"complete": True, "finished_at": time.time()})
+            self.complete = True
+        self.close()
+        if not self.keep_finished:
+            self._unlink()
+
+    def reset(self):
+        """Discard the recorded scan and start this scan_id over."""
+        self.close()
+        self._unlink()
+        self.tickers = None
+        self.records = {}
+        self.complete = False
+
+    def _unlink(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def _prune(self):
+        if not self.keep:
+            return
+        files = sorted(self.root.glob("*.jsonl"), key=lambda p: p.stat().st_mtime)
+        for p in files[:-self.keep]:
+            if p != self.path:
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
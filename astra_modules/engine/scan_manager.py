@@ -2,36 +2,116 @@
 scan_manager.py — Phase-90
 
 Unifies:
- • UniverseBuilder
- • SmartScan
- • HybridScan
+ • build_universe
+ • smart_scan
+ • hybrid_scan
  • fetch_unified
  • StateBundleBuilder
  • AstraPrime
  • RankingEngine
 
+Pipeline (Phase-100):
+ • fetch stage  — thread pool for network fetches (I/O bound)
+ • score stage  — worker pool for scans, bundles and AstraPrime (CPU bound)
+ • bounded queue between stages → backpressure when scoring falls behind
+ • rank stage   — runs over the streamed results
+Scan time is bounded by the slowest stage, not the sum of all stages.
+
+Two-stage screening (Prefilter):
+ • vectorized price / liquidity / volatility gates + cheap momentum
+   over cached columns for the whole universe
+ • only the top fraction (or what fits the time budget) is fetched + scored
+
+Incremental rescans (ScanStateStore):
+ • equities with no session since the last check are not fetched
+ • fetched tickers with unchanged bar + features + model are not rescored
+ • prior packets are reused for both; skip counts per reason in stats
+
+Checkpoint / resume (ScanCheckpoint):
+ • resumable scans (scan_id given) append every finished ticker (packet or failure)
+   to astra_checkpoints/<scan_id>.jsonl; the file is deleted when the scan finishes
+ • re-running with the same scan_id replays recorded tickers, scans only the rest
+
+Sharded scans (ShardQueue):
+ • submit_sharded() splits the screened universe onto a durable SQLite queue
+ • scan workers (any process on the host) lease shards → scan_shard() → partial results
+ • merge_shards() / scan_sharded() coordinate and merge into one ranking
+
+Instrumentation (ScanMetrics):
+ • monotonic spans per ticker per stage (fetch / signals / features / agents / score / rank)
+ • p50 / p95 / p99 latencies, tickers/sec, provider call counts
+ • one summary line per scan → astra_logs/scan_metrics.jsonl (System tab)
+
 Output:
  • Ranked predictions list for the Predictions Tab
+ • iter_scan() stream of (ticker, packet) as each ticker finishes
+ • stream_rankings() live, always-sorted ranking snapshots for the UI
+ • last_scan_stats (skips per reason + per-agent cache hit rates)
 """
 
-from astra_modules.universe.universe_builder import UniverseBuilder
-from astra_modules.fetch_core.fetch_unified import fetch_unified
-from astra_modules.scanners.smart_scan import SmartScan
-from astra_modules.scanners.hybrid_scan import HybridScan
+import bisect
+import queue
+import threading
+import time
+
+from astra_modules.universe.universe_builder import build_universe
+from astra_modules.fetch_core.fetch_unified import fetch_unified, add_agent_features
+from astra_modules.core.symbol_index import get_symbol_index
+from astra_modules.scanners.smart_scan import smart_scan
+from astra_modules.scanners.hybrid_scan import hybrid_scan
+from astra_modules.scanners.prefilter import Prefilter
 
 from astra_modules.core.astra_prime import AstraPrime
+from astra_modules.core.score_cache import MISS, frame_fingerprint, last_bar_timestamp
 from astra_modules.state.state_bundle_builder import StateBundleBuilder
-from astra_modules.ranking.ranking_engine import RankingEngine
+from astra_modules.engine.ranking_engine import RankingEngine
+from astra_modules.engine.scan_state import ScanStateStore, SKIP_UNCHANGED
+from astra_modules.engine.scan_metrics import ScanMetrics
+from astra_modules.engine.scan_checkpoint import ScanCheckpoint, new_scan_id, OK, FETCH_FAILED, SCORE_FAILED
+from astra_modules.engine.work_queue import ShardQueue, SHARD_SIZE, default_worker_id
+
+
+# Default per-stage concurrency
+FETCH_WORKERS = 8
+SCORE_WORKERS = 2
+QUEUE_SIZE = 32
+
+# Coordinator poll interval while shards are in flight (s)
+SHARD_POLL = 1.0
+
+# Queue end-of-stream marker
+_DONE = object()
 
 
 class ScanManager:
-    def __init__(self):
-        self.universe = UniverseBuilder()
-        self.smart = SmartScan()
-        self.hybrid = HybridScan()
+    def __init__(self, fetch_workers=FETCH_WORKERS, score_workers=SCORE_WORKERS, queue_size=QUEUE_SIZE,
+                 state=None, prefilter=True, time_budget=None):
         self.prime = AstraPrime()
         self.builder = StateBundleBuilder()
         self.rank_engine = RankingEngine()
+        self.last_scan_stats = {}
+        self.last_scan_id = None
+        self.symbols = get_symbol_index()
+
+        # Per-scan timing (reset by every iter_scan)
+        self.metrics = ScanMetrics()
+
+        # Persistent per-ticker state for incremental rescans
+        self.state = state if state is not None else ScanStateStore()
+
+        # Stage-1 screener (None/False disables) + scan time budget (s)
+        if prefilter is True:
+            prefilter = Prefilter()
+        self.prefilter = prefilter or None
+        self.time_budget = time_budget
+        self.seconds_per_ticker = None   # measured wall time per scanned ticker
+
+        # Stage concurrency
+        self.fetch_workers = max(1, int(fetch_workers))
+        self.score_workers = max(1, int(score_workers))
+        self.queue_size = max(1, int(queue_size))
+
+        self._stats_lock = threading.Lock()
 
     # -------------------------------------------------------------
     # SAFE HELPERS
@@ -41,47 +121,66 @@ class ScanManager:
             return default
         return val
 
+    def _count(self, stats, key, n=1):
+        with self._stats_lock:
+            stats[key] = stats.get(key, 0) + n
+
+    def _skip(self, stats, reason):
+        with self._stats_lock:
+            skipped = stats.setdefault("skipped", {})
+            skipped[reason] = skipped.get(reason, 0) + 1
+            if reason in (SKIP_UNCHANGED, "cached_packet"):     # same bar + features + model
+                stats["skipped_unchanged"] = stats.get("skipped_unchanged", 0) + 1
+
     # -------------------------------------------------------------
-    # MAIN SCAN PIPELINE
+    # STAGE 1 — FETCH (I/O)
     # -------------------------------------------------------------
-    def scan_universe(self):
-        """
-        Full end-to-end pipeline:
-          1) Build universe
-          2) Fetch OHLCV
-          3) Run SmartScan + HybridScan
-          4) Build state bundle
-          5) Run AstraPrime
-          6) Rank all results
-        """
-        tickers = self.universe.build_universe()
-        packets = {}
+    def fetch_stage(self, ticker):
+        """Returns (df, meta) or (None, None) if unusable."""
+        try:
+            out = fetch_unified(ticker)
+        except Exception:
+            return None, None
 
-        for ticker in tickers:
-            # --------------------------------------------
-            # FETCH DATA
-            # --------------------------------------------
-            df, meta = fetch_unified(ticker)
+        # fetch_unified returns the enriched frame; (df, meta) is accepted too
+        df, meta = out if isinstance(out, tuple) else (out, None)
+        if df is None or len(df) < 40:
+            return None, None
 
-            if df is None or len(df) < 40:
-                continue
+        # Agent columns (ma10 / ma30 / momentum / vol_spike), added before
+        # any fingerprint is taken so skip checks and state agree
+        if "ma10" not in df.columns:
+            df = add_agent_features(df)
+
+        if meta is None:
+            meta = {"last_price": float(df["close"].iloc[-1])}
+        return df, meta
 
-            # --------------------------------------------
-            # SCAN SIGNALS
-            # --------------------------------------------
+    # -------------------------------------------------------------
+    # STAGE 2 — SCAN + BUNDLE + ASTRAPRIME (CPU)
+    # -------------------------------------------------------------
+    def score_stage(self, ticker, df, meta, stats=None):
+        """Returns an AstraPrime packet or None."""
+        stats = stats if stats is not None else {}
+
+        # --------------------------------------------
+        # SCAN SIGNALS
+        # --------------------------------------------
+        with self.metrics.span("signals", ticker):
             try:
-                smart_out = self.smart.scan(ticker, df)
+                smart_out = smart_scan(ticker)
             except Exception:
                 smart_out = {}
 
             try:
-                hybrid_out = self.hybrid.scan(ticker, df)
+                hybrid_out = hybrid_scan(ticker)
             except Exception:
                 hybrid_out = {}
 
-            # --------------------------------------------
-            # BUILD BUNDLE
-            # --------------------------------------------
+        # --------------------------------------------
+        # BUILD BUNDLE
+        # --------------------------------------------
+        with self.metrics.span("features", ticker):
             bundle = self.builder.build_bundle(
                 ticker=ticker,
                 df=df,
@@ -90,10 +189,20 @@ class ScanManager:
                 catalyst_data=hybrid_out.get("catalyst"),
             )
 
-            # --------------------------------------------
-            # RUN ATRAPRIME
-            # --------------------------------------------
-            try:
+        # --------------------------------------------
+        # SKIP UNCHANGED TICKERS (same bar + features + signals + model)
+        # --------------------------------------------
+        fp = self.prime.packet_fingerprint(df, bundle["psychology"], bundle["catalyst"])
+        cached = self.prime.cache.get("packet", ticker, fp)
+        if cached is not MISS:
+            self._skip(stats, "cached_packet")
+            return cached
+
+        # --------------------------------------------
+        # RUN ATRAPRIME
+        # --------------------------------------------
+        try:
+            with self.metrics.span("agents", ticker):
                 packet = self.prime.run(
                     ticker=ticker,
                     df=df,
@@ -101,12 +210,407 @@ class ScanManager:
                     psychology_data=bundle["psychology"],
                     catalyst_data=bundle["catalyst"]
                 )
-            except Exception:
-                continue
+        except Exception:
+            return None
+
+        self.state.update(
+            ticker,
+            last_bar=last_bar_timestamp(df),
+            data_hash=frame_fingerprint(df),
+            model_key=self.prime.model_key(),
+            packet=packet,
+        )
+        return self.prime.cache.put("packet", ticker, fp, packet)
+
+    # -------------------------------------------------------------
+    # STREAMING PIPELINE
+    # -------------------------------------------------------------
+    def iter_scan(self, tickers=None, stats=None, screen=True, checkpoint=None):
+        """
+        Staged, parallel scan. Yields (ticker, packet) as soon as each
+        ticker clears the score stage (completion order, not input order).
+
+        fetch workers → bounded queue → score workers → results queue
+        A full queue blocks the fetchers (backpressure), so at most
+        queue_size fetched frames are held in memory at once.
+
+        screen=False skips the stage-1 prefilter (shards are screened
+        once by the coordinator, not again per worker).
+
+        checkpoint (ScanCheckpoint) records every finished ticker; when
+        it already holds a partial scan, the recorded packets are
+        yielded first and only the remaining tickers (and earlier
+        fetch failures) are fetched. A complete checkpoint is reset and
+        scanned again, never replayed.
+        """
+        stats = stats if stats is not None else {}
+
+        if checkpoint is not None and checkpoint.complete:
+            checkpoint.reset()
+
+        if checkpoint is not None and checkpoint.resumed:
+            # Resume: same screened universe as the interrupted run
+            tickers = list(checkpoint.tickers)
+        else:
+            if tickers is None:
+                tickers = build_universe()
+            tickers = list(tickers or [])
+
+            # Stage 1 — cheap vectorized screen over cached columns
+            if screen and self.prefilter is not None:
+                tickers, stats["prefilter"] = self.prefilter.screen(
+                    tickers, self.time_budget, self.seconds_per_ticker
+                )
+            if checkpoint is not None:
+                checkpoint.begin(tickers)
+
+        stats.setdefault("tickers", len(tickers))
+        model_key = self.prime.model_key()
+        self.metrics.reset()
+        t0 = time.monotonic()
+        completed = False
+
+        def record(ticker, status, packet=None):
+            if checkpoint is not None:
+                checkpoint.record(ticker, status, packet)
+
+        if checkpoint is not None and checkpoint.records:
+            stats["scan_id"] = checkpoint.scan_id
+            stats["resumed"] = checkpoint.settled_count()
+            for ticker, packet in checkpoint.packets().items():
+                self._count(stats, "scored")
+                self.metrics.mark(ticker)
+                yield ticker, packet
+            pending = checkpoint.remaining()
+        else:
+            pending = tickers
+
+        todo = queue.Queue()
+        for t in pending:
+            todo.put(t)
+
+        fetched = queue.Queue(maxsize=self.queue_size)
+        results = queue.Queue()
+        stop = threading.Event()
+
+        n_fetch = min(self.fetch_workers, max(1, len(tickers)))
+        fetch_left = [n_fetch]
+        fetch_lock = threading.Lock()
+
+        def put_blocking(q, item):
+            # Re-check stop so abandoned scans do not block forever
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fetch_worker():
+            try:
+                while not stop.is_set():
+                    try:
+                        ticker = todo.get_nowait()
+                    except queue.Empty:
+                        break
+
+                    # No session since last check → reuse without fetching
+                    reason, packet = self.state.pre_fetch_skip(ticker, model_key, self.symbols.is_crypto(ticker))
+                    if reason:
+                        self._skip(stats, reason)
+                        record(ticker, OK, packet)
+                        results.put((ticker, packet))
+                        continue
+
+                    with self.metrics.span("fetch", ticker):
+                        df, meta = self.fetch_stage(ticker)
+                    if df is None:
+                        self._count(stats, "fetch_failed")
+                        record(ticker, FETCH_FAILED)
+                        continue
+
+                    if self.prefilter is not None:
+                        self.prefilter.observe(ticker, df)
+
+                    # Same bar + features + model → reuse prior packet
+                    reason, packet = self.state.post_fetch_skip(ticker, frame_fingerprint(df), model_key)
+                    if reason:
+                        self.state.touch(ticker)
+                        self._skip(stats, reason)
+                        record(ticker, OK, packet)
+                        results.put((ticker, packet))
+                        continue
+
+                    if not put_blocking(fetched, (ticker, df, meta)):
+                        break
+            finally:
+                # Last fetcher out closes the stream for every scorer
+                with fetch_lock:
+                    fetch_left[0] -= 1
+                    last = fetch_left[0] == 0
+                if last:
+                    for _ in range(self.score_workers):
+                        put_blocking(fetched, _DONE)
+
+        def score_worker():
+            try:
+                while not stop.is_set():
+                    try:
+                        item = fetched.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if item is _DONE:
+                        break
+
+                    ticker, df, meta = item
+                    with self.metrics.span("score", ticker):
+                        packet = self.score_stage(ticker, df, meta, stats)
+                    if packet is None:
+                        self._count(stats, "score_failed")
+                        record(ticker, SCORE_FAILED)
+                        continue
+
+                    record(ticker, OK, packet)
+                    results.put((ticker, packet))
+            finally:
+                results.put(_DONE)
+
+        threads = [
+            threading.Thread(target=fetch_worker, name=f"scan-fetch-{i}", daemon=True)
+            for i in range(n_fetch)
+        ] + [
+            threading.Thread(target=score_worker, name=f"scan-score-{i}", daemon=True)
+            for i in range(self.score_workers)
+        ]
+        for th in threads:
+            th.start()
+
+        try:
+            finished = 0
+            while finished < self.score_workers:
+                item = results.get()
+                if item is _DONE:
+                    finished += 1
+                    continue
+                self._count(stats, "scored")
+                self.metrics.mark(item[0])
+                yield item
+            completed = True
+            if checkpoint is not None:
+                checkpoint.finish()
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+            # Throughput estimate for the next time-budgeted screen
+            if completed and pending:
+                per = (time.monotonic() - t0) / len(pending)
+                self.seconds_per_ticker = per if self.seconds_per_ticker is None else (
+                    0.7 * self.seconds_per_ticker + 0.3 * per
+                )
+
+            # Consumer stopped early (or finished) — release all workers
+            stop.set()
+            self.state.save()
+
+    def stream_rankings(self, tickers=None, stats=None, scan_id=None):
+        """
+        Progressive ranking for the Predictions tab.
+
+        Yields one snapshot per finished ticker:
+            {
+              "ticker": str, "packet": dict,      # latest result
+              "entry": {ticker, rank_score, packet},
+              "position": int,                    # where entry was inserted
+              "ranked": [ entry, ... ],           # sorted, best first (live)
+              "done": int, "failed": int, "total": int,
+              "elapsed": float,                   # seconds since scan start
+            }
+        Each result is inserted into the sorted list (bisect), so the
+        ranking is never recomputed from scratch. "ranked" is the same
+        list object on every step (no per-ticker copy) and keeps
+        changing after the next step — copy it to keep a snapshot, or
+        apply entry/position to a list of your own.
+
+        scan_id → checkpointed + resumable (see scan_universe).
+        """
+        if tickers is None:
+            tickers = build_universe()
+        tickers = list(tickers or [])
+
+        stats = stats if stats is not None else {}
+        checkpoint = ScanCheckpoint(scan_id) if scan_id else None
+        t0 = time.monotonic()
+        ranked = []
+        keys = []   # negated rank scores, ascending == best first
+
+        for done, (ticker, packet) in enumerate(self.iter_scan(tickers, stats, checkpoint=checkpoint), start=1):
+            with self.metrics.span("rank", ticker):
+                entry = self.rank_engine.rank_entry(ticker, packet)
+                pos = bisect.bisect_right(keys, -entry["rank_score"])
+                keys.insert(pos, -entry["rank_score"])
+                ranked.insert(pos, entry)
+
+            yield {
+                "ticker": ticker,
+                "packet": packet,
+                "entry": entry,
+                "position": pos,
+                "ranked": ranked,
+                "done": done,
+                "failed": stats.get("fetch_failed", 0) + stats.get("score_failed", 0),
+                "total": stats.get("tickers", len(tickers)),
+                "elapsed": time.monotonic() - t0,
+            }
+
+        self._write_metrics(stats)
+        self.last_scan_stats = stats
+
+    # -------------------------------------------------------------
+    # MAIN SCAN PIPELINE
+    # -------------------------------------------------------------
+    def scan_universe(self, tickers=None, scan_id=None, checkpoint_root=None, resumable=False):
+        """
+        Full end-to-end pipeline:
+          1) Build universe
+          2) Fetch OHLCV                      (fetch pool)
+          3) Run SmartScan + HybridScan       (score pool)
+          4) Build state bundle               (score pool)
+          5) Run AstraPrime                   (score pool)
+          6) Rank all results                 (streamed in)
 
+        Resumable scans (a scan_id passed, or resumable=True for a new
+        id; see last_scan_id) checkpoint every finished ticker. Calling
+        again with the same scan_id after a crash / restart resumes
+        where it stopped; the checkpoint is deleted once the scan
+        finishes. Plain scans write no checkpoint.
+        """
+        self.prime.cache.reset_stats()
+        checkpoint = ScanCheckpoint(scan_id, root=checkpoint_root) if scan_id or resumable else None
+        self.last_scan_id = checkpoint.scan_id if checkpoint is not None else new_scan_id()
+        stats = {"scan_id": self.last_scan_id}
+        packets = {}
+
+        for ticker, packet in self.iter_scan(tickers, stats, checkpoint=checkpoint):
             packets[ticker] = packet
 
+        stats.setdefault("skipped", {})
+        stats.setdefault("skipped_unchanged", 0)
+        stats["cache"] = self.prime.cache_stats()
+
         # --------------------------------------------
         # RANK OUTPUT
         # --------------------------------------------
-        return self.rank_engine.rank(packets)
+        with self.metrics.span("rank"):
+            ranked = self.rank_engine.rank(packets)
+
+        self._write_metrics(stats)
+        self.last_scan_stats = stats
+        return ranked
+
+    def _write_metrics(self, stats, kind="scan"):
+        """Summarize this scan's spans into stats["metrics"] + the JSONL file."""
+        self.metrics.finish()
+        summary = self.metrics.summary(
+            kind=kind,
+            scan_id=stats.get("scan_id"),
+            mode=stats.get("mode"),
+            universe=stats.get("tickers"),
+            skipped=stats.get("skipped", {}),
+            failed=stats.get("fetch_failed", 0) + stats.get("score_failed", 0),
+        )
+        stats["metrics"] = summary
+        self.metrics.write(summary)
+        return summary
+
+    # -------------------------------------------------------------
+    # SHARDED SCANS (multi-process, one host)
+    # -------------------------------------------------------------
+    def scan_shard(self, tickers, stats=None):
+        """Worker side: scan one leased shard → {ticker: packet}."""
+        stats = stats if stats is not None else {}
+        return dict(self.iter_scan(tickers, stats, screen=False))
+
+    def process_shard(self, shard, work_queue, worker_id):
+        """
+        Scan a leased shard and store its partial results, extending the
+        lease in the background so slow shards are not stolen mid-scan.
+        Returns True if the results were accepted.
+        """
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(work_queue.lease_seconds / 3):
+                work_queue.heartbeat(shard, worker_id)
+
+        beat = threading.Thread(target=heartbeat, name="scan-shard-heartbeat", daemon=True)
+        beat.start()
+
+        shard_stats = {"scan_id": shard["scan_id"]}
+        try:
+            packets = self.scan_shard(shard["tickers"], shard_stats)
+            self._write_metrics(shard_stats, kind=f"shard:{shard['shard_id']}")
+        except Exception:
+            work_queue.release(shard, worker_id)
+            return False
+        finally:
+            done.set()
+
+        return work_queue.complete(shard, worker_id, packets, shard_stats)
+
+    def submit_sharded(self, tickers=None, work_queue=None, shard_size=SHARD_SIZE, mode=None, stats=None):
+        """Coordinator side: screen the universe once and enqueue its shards."""
+        if tickers is None:
+            tickers = build_universe()
+        tickers = list(tickers or [])
+
+        stats = stats if stats is not None else {}
+        if self.prefilter is not None:
+            tickers, stats["prefilter"] = self.prefilter.screen(
+                tickers, self.time_budget, self.seconds_per_ticker
+            )
+        stats["tickers"] = len(tickers)
+
+        work_queue = work_queue or ShardQueue()
+        return work_queue.submit(tickers, shard_size=shard_size, mode=mode)
+
+    def merge_shards(self, scan_id, work_queue=None):
+        """Merge every finished shard's partial results into one ranking."""
+        work_queue = work_queue or ShardQueue()
+        return self.rank_engine.rank(work_queue.results(scan_id))
+
+    def scan_sharded(self, tickers=None, work_queue=None, shard_size=SHARD_SIZE, mode=None,
+                     work_locally=True, timeout=None, stats=None):
+        """
+        Coordinator: enqueue shards, wait for workers, merge the ranking.
+
+        work_locally=True → this process also leases shards of its own
+        scan, so a sharded scan completes even with no external workers.
+        Unfinished shards at `timeout` are left out of the ranking.
+        The scan's rows are purged from the queue once merged.
+        """
+        work_queue = work_queue or ShardQueue()
+        stats = stats if stats is not None else {}
+        scan_id = self.submit_sharded(tickers, work_queue, shard_size, mode, stats)
+        stats["scan_id"] = scan_id
+
+        worker_id = default_worker_id()
+        deadline = (time.monotonic() + timeout) if timeout else None
+
+        while not work_queue.is_finished(scan_id):
+            if deadline and time.monotonic() > deadline:
+                break
+
+            shard = work_queue.lease(worker_id, scan_id) if work_locally else None
+            if shard is None:
+                time.sleep(SHARD_POLL)
+                continue
+
+            self.process_shard(shard, work_queue, worker_id)
+
+        stats["shards"] = work_queue.progress(scan_id)
+        self.last_scan_stats = stats
+        ranked = self.merge_shards(scan_id, work_queue)
+        work_queue.purge(scan_id)
+        return ranked
@@ -0,0 +1,202 @@
+"""
+scan_metrics.py — Phase-100
+
+Per-stage timing + throughput instrumentation for ScanManager.
+
+ • span(stage, ticker)  — monotonic (perf_counter) timing per ticker per stage;
+                          spans nest, and every stage records its exclusive
+                          time (score excludes the signals / features /
+                          agents spans inside it), so stage totals add up
+ • latency histograms   — p50 / p95 / p99 / max per stage
+ • throughput           — tickers per second over scan wall time
+ • provider calls       — HTTP calls per data provider, counted against the
+                          scan whose span (on the calling thread) made them
+
+One summary line per scan is appended to astra_logs/scan_metrics.jsonl
+and rendered by the System tab.
+"""
+
+import json
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from astra_modules.engine.scan_state import json_default
+
+
+METRICS_FILE = "astra_logs/scan_metrics.jsonl"
+PERCENTILES = (50, 95, 99)
+SLOWEST_TICKERS = 10
+
+# Pipeline stages in display order
+STAGES = ("fetch", "signals", "features", "agents", "score", "rank")
+
+
+def _get_metrics_path() -> Path:
+    """JSONL sink for per-scan metrics, astra_logs/scan_metrics.jsonl."""
+    return Path(__file__).resolve().parents[2] / METRICS_FILE
+
+
+# -------------------------------------------------------------
+# PROVIDER CALL COUNTERS (incremented by fetch_unified)
+# -------------------------------------------------------------
+_provider_lock = threading.Lock()
+_provider_calls = Counter()
+
+# Per thread: stack of open spans [(ScanMetrics, [nested seconds])]
+_active = threading.local()
+
+
+def _span_stack():
+    stack = getattr(_active, "spans", None)
+    if stack is None:
+        stack = _active.spans = []
+    return stack
+
+
+def count_provider_call(provider: str, n: int = 1):
+    """Process-wide counter, plus the scan whose span is open on this thread."""
+    with _provider_lock:
+        _provider_calls[provider] += n
+    stack = _span_stack()
+    if stack:
+        stack[-1][0].count_provider(provider, n)
+
+
+def provider_calls() -> dict:
+    with _provider_lock:
+        return dict(_provider_calls)
+
+
+def latency_stats(values) -> dict:
+    """count / total / mean / pNN / max (milliseconds) for one stage."""
+    arr = np.asarray(values, dtype=float) * 1000.0
+    if arr.size == 0:
+        return {"count": 0}
+    pct = np.percentile(arr, PERCENTILES)
+    out = {
+        "count": int(arr.size),
+        "total_ms": float(arr.sum()),
+        "mean_ms": float(arr.mean()),
+        "max_ms": float(arr.max()),
+    }
+    out.update({f"p{p}_ms": float(v) for p, v in zip(PERCENTILES, pct)})
+    return out
+
+
+class ScanMetrics:
+    def __init__(self, path=None):
+        self.path = Path(path) if path else _get_metrics_path()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.started_wall = time.time()
+            self.finished = None
+            self.durations = defaultdict(list)    # stage -> [seconds]
+            self.spans = defaultdict(dict)         # ticker -> {stage: seconds}
+            self.tickers = set()
+            self.providers = Counter()
+
+    # ---------------------------------------------------------
+    # RECORDING
+    # ---------------------------------------------------------
+    def record(self, stage, seconds, ticker=None):
+        with self._lock:
+            self.durations[stage].append(seconds)
+            if ticker is not None:
+                spans = self.spans[ticker]
+                spans[stage] = spans.get(stage, 0.0) + seconds
+                self.tickers.add(ticker)
+
+    def count_provider(self, provider, n=1):
+        with self._lock:
+            self.providers[provider] += n
+
+    def mark(self, ticker):
+        """Count a ticker as processed (including skipped / resumed ones)."""
+        with self._lock:
+            self.tickers.add(ticker)
+
+    @contextmanager
+    def span(self, stage, ticker=None):
+        """Time a stage; time spent in spans nested inside it is excluded."""
+        stack = _span_stack()
+        frame = (self, [0.0])
+        stack.append(frame)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            stack.pop()
+            if stack:
+                stack[-1][1][0] += elapsed
+            self.record(stage, elapsed - frame[1][0], ticker)
+
+    def finish(self):
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    # ---------------------------------------------------------
+    # SUMMARY
+    # ---------------------------------------------------------
+    def summary(self, **extra) -> dict:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        wall = max(end - self.started, 1e-9)
+
+        with self._lock:
+            stages = {s: latency_stats(v) for s, v in self.durations.items()}
+            per_ticker = {t: sum(v.values()) for t, v in self.spans.items()}
+            n = len(self.tickers)
+            calls = dict(self.providers)
+
+        order = [s for s in STAGES if s in stages] + sorted(s for s in stages if s not in STAGES)
+        slowest = sorted(per_ticker.items(), key=lambda kv: kv[1], reverse=True)[:SLOWEST_TICKERS]
+
+        out = {
+            "timestamp": self.started_wall,
+            "wall_s": wall,
+            "tickers": n,
+            "tickers_per_sec": n / wall,
+            "stages": {s: stages[s] for s in order},
+            "provider_calls": calls,
+            "slowest": [{"ticker": t, "ms": ms * 1000.0} for t, ms in slowest],
+        }
+        out.update(extra)
+        return out
+
+    def write(self, summary=None, include_spans=False, **extra):
+        """Append one JSONL line (the summary, optionally all spans)."""
+        record = summary or self.summary(**extra)
+        if include_spans:
+            with self._lock:
+                record = dict(record, spans={t: dict(v) for t, v in self.spans.items()})
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=json_default) + "\n")
+        except Exception as e:
+            print(f"[scan_metrics] write failed: {e}")
+        return record
+
+
+def read_metrics(path=None, limit=50) -> list:
+    """Last `limit` scan summaries (oldest first)."""
+    path = Path(path) if path else _get_metrics_path()
+    if not path.exists():
+        return []
+    out = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in deque(f, maxlen=limit):
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue
+    return out
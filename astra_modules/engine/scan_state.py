@@ -0,0 +1,241 @@
+"""
+scan_state.py — Phase-100
+
+Persistent per-ticker scan state for incremental rescans.
+
+For every scanned ticker we keep:
+ • last_bar     — timestamp of the newest bar that was scored
+ • data_hash    — fingerprint of the trailing feature rows
+ • model_key    — fingerprint of neural checkpoint + agent weights
+ • checked_at   — unix time the ticker was last fetched
+ • packet       — the last AstraPrime packet
+
+A rescan only processes tickers whose data can have changed and
+reuses the stored packet for the rest. Skip reasons:
+ • market_closed   — equity, no trading session since its last bar
+                     was final (weekends, after the close) → not even
+                     fetched. Keyed on the bar, not the check time: a
+                     check at 16:01 that still sees yesterday's bar
+                     fetches again until today's bar arrives
+ • unchanged_data  — fetched, but same bar + features + model
+
+Several processes (scan service, scan workers, the app) can share the
+file: save() re-reads it under a file lock and keeps the newest entry
+per ticker (by checked_at) before replacing it.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone, time as dtime
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:     # non-POSIX: in-process locking only
+    fcntl = None
+
+try:
+    from zoneinfo import ZoneInfo
+    _MARKET_TZ = ZoneInfo("America/New_York")
+except Exception:  # tzdata missing → fall back to UTC-5
+    _MARKET_TZ = timezone(timedelta(hours=-5))
+
+
+SCAN_STATE_FILE = "astra_scan_state.json"
+
+# US equity regular session (exchange local time)
+SESSION_OPEN = dtime(9, 30)
+SESSION_CLOSE = dtime(16, 0)
+
+SKIP_MARKET_CLOSED = "market_closed"
+SKIP_UNCHANGED = "unchanged_data"
+
+
+# -----------------------------------------------------------
+# Internal helpers
+# -----------------------------------------------------------
+
+def bar_final_at(last_bar):
+    """
+    Unix time from which the bar stamped `last_bar` can no longer
+    change: the session close of its date for daily bars (midnight
+    stamps), the stamp itself for intraday bars (naive = UTC).
+    None if the stamp cannot be parsed.
+    """
+    try:
+        ts = datetime.fromisoformat(str(last_bar).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if ts.time() == dtime(0, 0):
+        return datetime.combine(ts.date(), SESSION_CLOSE, _MARKET_TZ).timestamp()
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _get_state_path() -> Path:
+    """Persisted per-ticker scan state, astra_scan_state.json at the project root."""
+    return Path(__file__).resolve().parents[2] / SCAN_STATE_FILE
+
+
+def json_default(o):
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+    return str(o)
+
+
+def session_elapsed(since: float, now: float | None = None) -> bool:
+    """
+    True if any part of a regular US equity session (Mon–Fri,
+    09:30–16:00 New York) lies between `since` and `now`.
+    Exchange holidays are not modelled (they just cost one fetch).
+    """
+    now = time.time() if now is None else now
+    if since is None:
+        return True
+    if now <= since:
+        return False
+
+    start = datetime.fromtimestamp(since, _MARKET_TZ)
+    end = datetime.fromtimestamp(now, _MARKET_TZ)
+
+    if (end - start) > timedelta(days=7):
+        return True
+
+    day = start.date()
+    while day <= end.date():
+        if day.weekday() < 5:
+            s_open = datetime.combine(day, SESSION_OPEN, _MARKET_TZ)
+            s_close = datetime.combine(day, SESSION_CLOSE, _MARKET_TZ)
+            if start < s_close and end > s_open:
+                return True
+        day += timedelta(days=1)
+
+    return False
+
+
+# -----------------------------------------------------------
+# Store
+# -----------------------------------------------------------
+
+class ScanStateStore:
+    """JSON-backed per-ticker scan state (one atomic write per scan)."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else _get_state_path()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.tickers = self._load()
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            tickers = data.get("tickers", {})
+            return tickers if isinstance(tickers, dict) else {}
+        except Exception as e:
+            print(f"[scan_state] load failed: {e}")
+            return {}
+
+    @staticmethod
+    def _merge(ours: dict, theirs: dict) -> dict:
+        """Union of both states, newest checked_at wins per ticker."""
+        merged = dict(theirs)
+        for ticker, entry in ours.items():
+            other = merged.get(ticker)
+            if other is None or (entry.get("checked_at") or 0) >= (other.get("checked_at") or 0):
+                merged[ticker] = entry
+        return merged
+
+    def save(self) -> None:
+        """Merge with the file on disk, then atomic write (pid tmp + rename)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            lockfile = None
+            try:
+                if fcntl is not None:
+                    lockfile = open(self.path.with_name(self.path.name + ".lock"), "a+b")
+                    fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+                self.tickers = self._merge(self.tickers, self._load())
+                payload = {"version": 1, "saved_at": time.time(), "tickers": self.tickers}
+
+                tmp = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+                with tmp.open("w", encoding="utf-8") as f:
+                    json.dump(payload, f, default=json_default)
+                os.replace(tmp, self.path)
+                self._dirty = False
+            except Exception as e:
+                print(f"[scan_state] save failed: {e}")
+            finally:
+                if lockfile is not None:
+                    fcntl.flock(lockfile, fcntl.LOCK_UN)
+                    lockfile.close()
+
+    # -------------------------------------------------------
+    # Accessors
+    # -------------------------------------------------------
+    def get(self, ticker):
+        with self._lock:
+            return self.tickers.get(ticker)
+
+    def update(self, ticker, last_bar, data_hash, model_key, packet, checked_at=None):
+        with self._lock:
+            self.tickers[ticker] = {
+                "last_bar": last_bar,
+                "data_hash": data_hash,
+                "model_key": model_key,
+                "checked_at": checked_at or time.time(),
+                "packet": packet,
+            }
+            self._dirty = True
+
+    def touch(self, ticker, checked_at=None):
+        """Record a fetch that found nothing new."""
+        with self._lock:
+            entry = self.tickers.get(ticker)
+            if entry is not None:
+                entry["checked_at"] = checked_at or time.time()
+                self._dirty = True
+
+    # -------------------------------------------------------
+    # Skip decisions
+    # -------------------------------------------------------
+    def pre_fetch_skip(self, ticker, model_key, is_crypto, now=None):
+        """
+        Before fetching: (reason, packet) if the ticker cannot have
+        new data, else (None, None).
+        """
+        entry = self.get(ticker)
+        if not entry or entry.get("packet") is None:
+            return None, None
+        if entry.get("model_key") != model_key:
+            return None, None
+        if is_crypto:
+            return None, None  # trades 24/7
+
+        final_at = bar_final_at(entry.get("last_bar"))
+        if final_at is not None and not session_elapsed(final_at, now):
+            return SKIP_MARKET_CLOSED, entry["packet"]
+
+        return None, None
+
+    def post_fetch_skip(self, ticker, data_hash, model_key):
+        """After fetching: (reason, packet) if data + model are unchanged."""
+        entry = self.get(ticker)
+        if not entry or entry.get("packet") is None or data_hash is None:
+            return None, None
+
+        if entry.get("data_hash") == data_hash and entry.get("model_key") == model_key:
+            return SKIP_UNCHANGED, entry["packet"]
+
+        return None, None
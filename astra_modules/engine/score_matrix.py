@@ -0,0 +1,239 @@
+"""
+score_matrix.py — Phase-100
+
+Matrix-form weighted scoring for AstraPrime + RankingEngine.
+
+Agent scores are held as an (N tickers × K agents) matrix and combined
+with weights in a single matrix product instead of per-ticker loops:
+ • S @ w           → (N,)       one weight vector
+ • S @ W.T         → (N, W)     many candidate weight vectors at once
+ • H @ W.T         → (T, N, W)  full history for the weight optimizer
+
+Used by:
+ • AstraPrime (live scoring + Phase-100 weight optimizer hook)
+ • RankingEngine (rank_score)
+ • learning_engine (weight search over history)
+"""
+
+import numpy as np
+
+
+# Canonical agent column order for every score matrix
+AGENT_ORDER = (
+    "momentum",
+    "volume",
+    "risk",
+    "psych",
+    "catalyst",
+    "technical",
+    "neural",
+)
+
+# Neutral score for missing / broken agent outputs
+NEUTRAL_SCORE = 0.5
+
+
+# -------------------------------------------------------------
+# SAFE HELPERS
+# -------------------------------------------------------------
+def to_scalar(v, default=NEUTRAL_SCORE):
+    """Collapse an agent output (float, list, array, tensor) to one float."""
+    try:
+        if v is None:
+            return default
+        arr = np.asarray(v, dtype=float).ravel()
+        if arr.size == 0 or not np.isfinite(arr[0]):
+            return default
+        return float(arr[0])
+    except Exception:
+        return default
+
+
+# -------------------------------------------------------------
+# WEIGHT VECTORS
+# -------------------------------------------------------------
+def weight_vector(weights: dict, order=AGENT_ORDER):
+    """Dict of agent weights → (K,) float vector in `order`."""
+    return np.array([float(weights.get(name, 0.0)) for name in order], dtype=float)
+
+
+def weights_to_dict(vector, order=AGENT_ORDER):
+    """(K,) weight vector → {agent: weight} dict."""
+    return {name: float(w) for name, w in zip(order, vector)}
+
+
+def normalize_weights(W):
+    """Scale weight vector(s) so each row sums to 1 (zero rows left as-is)."""
+    W = np.asarray(W, dtype=float)
+    total = W.sum(axis=-1, keepdims=True)
+    total = np.where(total == 0, 1.0, total)
+    return W / total
+
+
+def random_weight_grid(n_candidates, n_agents=len(AGENT_ORDER), seed=None, base=None, spread=None):
+    """
+    Draw (W, K) candidate weight vectors from a Dirichlet distribution.
+
+    base: optional (K,) centre vector — candidates are drawn around it,
+          `spread` controls concentration (higher = tighter).
+    """
+    rng = np.random.default_rng(seed)
+
+    if base is None:
+        alpha = np.ones(n_agents)
+    else:
+        base = normalize_weights(base)
+        alpha = np.maximum(base * (spread or 50.0), 1e-3)
+
+    return rng.dirichlet(alpha, size=int(n_candidates))
+
+
+# -------------------------------------------------------------
+# SCORE MATRIX
+# -------------------------------------------------------------
+def score_matrix(packets, order=AGENT_ORDER, field="agent_scores"):
+    """
+    Build the (N × K) agent score matrix from AstraPrime packets.
+
+    packets: {ticker: packet} or [packet, ...]
+    Returns (tickers, S)
+    """
+    if isinstance(packets, dict):
+        items = list(packets.items())
+    else:
+        items = [(p.get("ticker") if isinstance(p, dict) else None, p) for p in (packets or [])]
+
+    tickers = []
+    S = np.full((len(items), len(order)), NEUTRAL_SCORE, dtype=float)
+
+    for i, (ticker, packet) in enumerate(items):
+        tickers.append(ticker)
+        if not isinstance(packet, dict):
+            continue
+        agents = packet.get(field) or {}
+        for j, name in enumerate(order):
+            S[i, j] = to_scalar(agents.get(name), NEUTRAL_SCORE)
+
+    return tickers, S
+
+
+# -------------------------------------------------------------
+# WEIGHTED SCORING
+# -------------------------------------------------------------
+def weighted_scores(S, w):
+    """(…, N, K) @ (K,) → (…, N) weighted scores."""
+    return np.asarray(S, dtype=float) @ np.asarray(w, dtype=float)
+
+
+def evaluate_weight_grid(S, W):
+    """
+    Score every ticker under every candidate weight vector at once.
+
+    S: (N, K) or (T, N, K) score matrix / history
+    W: (M, K) candidate weight vectors
+    Returns (N, M) or (T, N, M)
+    """
+    W = np.atleast_2d(np.asarray(W, dtype=float))
+    return np.asarray(S, dtype=float) @ W.T
+
+
+def top_k_returns(S_hist, R_hist, W, top_k=10):
+    """
+    Mean forward return of the top-k portfolio for every candidate.
+
+    S_hist: (T, N, K) agent scores per date
+    R_hist: (T, N)    forward returns (NaN = not tradable that date)
+    W:      (M, K)    candidate weight vectors
+
+    Returns (M,) average top-k return per date across history.
+    """
+    S_hist = np.asarray(S_hist, dtype=float)
+    R_hist = np.asarray(R_hist, dtype=float)
+
+    valid = np.isfinite(R_hist)
+    scores = evaluate_weight_grid(S_hist, W)                       # (T, N, M)
+    scores = np.where(valid[..., None], scores, -np.inf)
+
+    k = int(max(1, min(top_k, S_hist.shape[1])))
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k, :]        # (T, k, M)
+
+    R = np.where(valid, R_hist, 0.0)
+    picked = np.take_along_axis(R[..., None], top, axis=1)         # (T, k, M)
+    picked_ok = np.take_along_axis(valid[..., None], top, axis=1)
+
+    n = picked_ok.sum(axis=1)                                      # (T, M)
+    per_date = np.where(n > 0, (picked * picked_ok).sum(axis=1) / np.maximum(n, 1), np.nan)
+    return np.nanmean(per_date, axis=0) if per_date.size else np.zeros(len(W))
+
+
+def information_coefficient(S_hist, R_hist, W):
+    """
+    Mean cross-sectional correlation between weighted score and forward
+    return, for every candidate at once.
+
+    The per-date agent/return covariances (T × K) and agent covariances
+    (T × K × K) are computed once; each candidate then costs only a few
+    K-length dot products, so thousands of candidates run in milliseconds.
+
+    Returns (M,) mean IC per candidate.
+    """
+    S_hist = np.asarray(S_hist, dtype=float)
+    R_hist = np.asarray(R_hist, dtype=float)
+    W = np.atleast_2d(np.asarray(W, dtype=float))
+
+    valid = np.isfinite(R_hist)
+    m = np.maximum(valid.sum(axis=1), 1)                                  # (T,)
+
+    S0 = S_hist * valid[..., None]
+    Sc = (S_hist - (S0.sum(axis=1) / m[:, None])[:, None, :]) * valid[..., None]
+    R0 = np.where(valid, R_hist, 0.0)
+    Rc = (R0 - (R0.sum(axis=1) / m)[:, None]) * valid
+
+    C = np.einsum("tnk,tn->tk", Sc, Rc) / m[:, None]                      # (T, K)
+    Sigma = np.einsum("tnk,tnl->tkl", Sc, Sc) / m[:, None, None]          # (T, K, K)
+    var_r = (Rc ** 2).sum(axis=1) / m                                     # (T,)
+
+    cov = C @ W.T                                                         # (T, M)
+    var_s = ((W @ Sigma) * W).sum(axis=-1)                                # (T, M)
+
+    denom = np.sqrt(var_s * var_r[:, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ic = np.where(denom > 0, cov / denom, np.nan)
+
+    if not np.isfinite(ic).any():
+        return np.zeros(len(W))
+    return np.nanmean(ic, axis=0)
+
+
+def optimize_weights(S_hist, R_hist, n_candidates=2000, top_k=10, seed=None, base=None,
+                     order=AGENT_ORDER, objective="ic"):
+    """
+    Random-search the weight simplex over a score/return history.
+
+    objective:
+     • "ic"    — mean cross-sectional correlation (fast, default)
+     • "top_k" — mean forward return of the top-k portfolio
+
+    Returns:
+        {
+          "weights": {agent: w},
+          "objective": float,
+          "candidates": int,
+        }
+    """
+    W = random_weight_grid(n_candidates, len(order), seed=seed)
+    if base is not None:
+        W = np.vstack([normalize_weights(base), W])
+
+    if objective == "top_k":
+        objective = top_k_returns(S_hist, R_hist, W, top_k=top_k)
+    else:
+        objective = information_coefficient(S_hist, R_hist, W)
+    objective = np.where(np.isfinite(objective), objective, -np.inf)
+    best = int(np.argmax(objective))
+
+    return {
+        "weights": weights_to_dict(W[best], order),
+        "objective": float(objective[best]) if np.isfinite(objective[best]) else 0.0,
+        "candidates": int(len(W)),
+    }
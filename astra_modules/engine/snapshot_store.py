@@ -0,0 +1,146 @@
+"""
+snapshot_store.py — Phase-100
+
+Versioned ranking snapshots shared between the background scan
+service (writer) and the Streamlit tabs (readers).
+
+Layout (project root):
+    astra_snapshots/
+        day/
+            latest.json          ← newest snapshot (partial or complete)
+            v000042.json         ← complete, versioned snapshots
+        swing/
+            ...
+
+Writes are atomic (tmp file + rename), so readers never see a torn
+file. read_latest() re-parses only when latest.json's mtime changes,
+so UI reruns cost one stat() call regardless of universe size.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from astra_modules.engine.scan_state import json_default
+
+
+SNAPSHOT_DIR = "astra_snapshots"
+KEEP_VERSIONS = 20
+MODES = ("day", "swing")
+
+
+def _get_snapshot_root() -> Path:
+    """Directory holding the versioned ranking snapshots (astra_snapshots/)."""
+    return Path(__file__).resolve().parents[2] / SNAPSHOT_DIR
+
+
+def _atomic_write(path: Path, payload: dict) -> None:
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, default=json_default)
+    os.replace(tmp, path)
+
+
+class SnapshotStore:
+    def __init__(self, root=None, keep=KEEP_VERSIONS):
+        self.root = Path(root) if root else _get_snapshot_root()
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._read_cache = {}   # mode -> (mtime_ns, snapshot)
+
+    def _mode_dir(self, mode) -> Path:
+        d = self.root / mode
+        d.mkdir(parents=True, exist_ok=True)
+        return d
+
+    # ---------------------------------------------------------
+    # WRITE (scan service)
+    # ---------------------------------------------------------
+    def next_version(self, mode) -> int:
+        versions = self.list_versions(mode)
+        return (versions[-1] + 1) if versions else 1
+
+    def write(self, mode, ranked, stats=None, complete=True, started_at=None):
+        """
+        Publish a ranking snapshot for `mode`.
+
+        complete=False → only latest.json is updated (progress view
+        while a scan is still running); complete=True also writes a
+        new versioned file and prunes old versions.
+        """
+        with self._lock:
+            d = self._mode_dir(mode)
+            version = self.next_version(mode)
+
+            snapshot = {
+                "mode": mode,
+                "version": version,
+                "complete": bool(complete),
+                "created_at": time.time(),
+                "started_at": started_at,
+                "count": len(ranked),
+                "stats": stats or {},
+                "ranked": ranked,
+            }
+
+            if complete:
+                _atomic_write(d / f"v{version:06d}.json", snapshot)
+                self._prune(mode)
+            _atomic_write(d / "latest.json", snapshot)
+
+        return snapshot
+
+    def _prune(self, mode):
+        versions = self.list_versions(mode)
+        for v in versions[:-self.keep] if self.keep else []:
+            try:
+                (self.root / mode / f"v{v:06d}.json").unlink()
+            except OSError:
+                pass
+
+    # ---------------------------------------------------------
+    # READ (UI)
+    # ---------------------------------------------------------
+    def list_versions(self, mode) -> list:
+        d = self.root / mode
+        if not d.exists():
+            return []
+        out = []
+        for p in d.glob("v*.json"):
+            try:
+                out.append(int(p.stem[1:]))
+            except ValueError:
+                continue
+        return sorted(out)
+
+    def read_latest(self, mode):
+        """Newest snapshot for `mode`, or None. Cached on file mtime."""
+        path = self.root / mode / "latest.json"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+        cached = self._read_cache.get(mode)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except Exception:
+            # Mid-rename or corrupt → keep serving the previous snapshot
+            return cached[1] if cached else None
+
+        self._read_cache[mode] = (mtime, snapshot)
+        return snapshot
+
+    def read_version(self, mode, version):
+        path = self.root / mode / f"v{int(version):06d}.json"
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
@@ -0,0 +1,277 @@
+"""
+work_queue.py — Phase-100
+
+Durable, broker-free shard queue for multi-process scans on one host.
+
+One SQLite file (project root, WAL mode) holds:
+    scans   — one row per sharded scan (scan_id, mode, shard count)
+    shards  — tickers per shard + lease / result columns
+
+Lifecycle of a shard:
+    pending → leased (worker_id, lease_until) → done (result JSON)
+                 └─ lease expired / failed → pending again (attempts + 1)
+    a pending / lease-expired shard with max_attempts used → failed
+    (applied by lease(), heartbeat() and progress(), so the
+    coordinator sees it finish even when no worker leases again)
+
+Leasing runs inside BEGIN IMMEDIATE, so any number of worker
+processes sharing the file on one host (or containers sharing a
+local volume) never lease the same shard twice. SQLite's WAL and
+file locking are not reliable on network filesystems (NFS, SMB):
+do not share the file across nodes. A worker that dies simply lets
+its lease expire.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from astra_modules.engine.scan_state import json_default
+
+
+QUEUE_DIR = "astra_queue"
+QUEUE_FILE = "scan_queue.db"
+
+SHARD_SIZE = 50
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+# Shard states
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def _get_queue_path() -> Path:
+    """SQLite shard queue file, astra_queue/scan_queue.db."""
+    return Path(__file__).resolve().parents[2] / QUEUE_DIR / QUEUE_FILE
+
+
+def split_shards(tickers, shard_size=SHARD_SIZE):
+    tickers = list(tickers or [])
+    size = max(1, int(shard_size))
+    return [tickers[i:i + size] for i in range(0, len(tickers), size)]
+
+
+class ShardQueue:
+    def __init__(self, path=None, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = Path(path) if path else _get_queue_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS scans (
+                    scan_id     TEXT PRIMARY KEY,
+                    mode        TEXT,
+                    created_at  REAL,
+                    shards      INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS shards (
+                    scan_id     TEXT,
+                    shard_id    INTEGER,
+                    tickers     TEXT,
+                    status      TEXT,
+                    worker      TEXT,
+                    lease_until REAL,
+                    attempts    INTEGER DEFAULT 0,
+                    result      TEXT,
+                    stats       TEXT,
+                    updated_at  REAL,
+                    PRIMARY KEY (scan_id, shard_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_shards_status ON shards(status, lease_until);
+                """
+            )
+
+    # ---------------------------------------------------------
+    # COORDINATOR
+    # ---------------------------------------------------------
+    def submit(self, tickers, shard_size=SHARD_SIZE, mode=None, scan_id=None):
+        """Split `tickers` into shards and enqueue them. Returns scan_id."""
+        scan_id = scan_id or uuid.uuid4().hex[:12]
+        shards = split_shards(tickers, shard_size)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO scans (scan_id, mode, created_at, shards) VALUES (?, ?, ?, ?)",
+                (scan_id, mode, now, len(shards)),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO shards (scan_id, shard_id, tickers, status, attempts, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, ?)",
+                [(scan_id, i, json.dumps(s), PENDING, now) for i, s in enumerate(shards)],
+            )
+            conn.execute("COMMIT")
+        return scan_id
+
+    def progress(self, scan_id):
+        """{"total", "pending", "leased", "done", "failed"} for a scan."""
+        out = {"total": 0, PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._fail_exhausted(conn, time.time(), scan_id)
+            conn.execute("COMMIT")
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM shards WHERE scan_id = ? GROUP BY status", (scan_id,)
+            ).fetchall()
+        for status, n in rows:
+            out[status] = n
+            out["total"] += n
+        return out
+
+    def is_finished(self, scan_id):
+        """Every shard done or failed (a scan with no shards is finished)."""
+        p = self.progress(scan_id)
+        return p[DONE] + p[FAILED] == p["total"]
+
+    def results(self, scan_id):
+        """Merged {ticker: packet} over every finished shard of a scan."""
+        packets = {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT result FROM shards WHERE scan_id = ? AND status = ? ORDER BY shard_id",
+                (scan_id, DONE),
+            ).fetchall()
+        for (raw,) in rows:
+            try:
+                packets.update(json.loads(raw or "{}"))
+            except Exception:
+                continue
+        return packets
+
+    def shard_stats(self, scan_id):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT shard_id, worker, attempts, stats FROM shards WHERE scan_id = ? AND status = ?",
+                (scan_id, DONE),
+            ).fetchall()
+        return [
+            {"shard": s, "worker": w, "attempts": a, **json.loads(st or "{}")}
+            for s, w, a, st in rows
+        ]
+
+    def purge(self, scan_id):
+        """Drop a scan and its shard results (after the coordinator merged them)."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM shards WHERE scan_id = ?", (scan_id,))
+            conn.execute("DELETE FROM scans WHERE scan_id = ?", (scan_id,))
+            conn.execute("COMMIT")
+
+    # ---------------------------------------------------------
+    # WORKERS
+    # ---------------------------------------------------------
+    def _fail_exhausted(self, conn, now, scan_id=None):
+        """Pending / lease-expired shards with no attempts left → failed (caller holds the write lock)."""
+        scan_clause = "AND scan_id = ?" if scan_id else ""
+        conn.execute(
+            f"""
+            UPDATE shards SET status = ?, updated_at = ?
+            WHERE (status = ? OR (status = ? AND lease_until < ?)) AND attempts >= ? {scan_clause}
+            """,
+            (FAILED, now, PENDING, LEASED, now, self.max_attempts) + ((scan_id,) if scan_id else ()),
+        )
+
+    def lease(self, worker_id, scan_id=None):
+        """
+        Atomically lease the oldest pending (or lease-expired) shard.
+        Returns {"scan_id", "shard_id", "tickers", "attempts"} or None.
+        """
+        now = time.time()
+        scan_clause = "AND scan_id = ?" if scan_id else ""
+        args = (PENDING, LEASED, now) + ((scan_id,) if scan_id else ())
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._fail_exhausted(conn, now, scan_id)
+            row = conn.execute(
+                f"""
+                SELECT scan_id, shard_id, tickers, attempts FROM shards
+                WHERE (status = ? OR (status = ? AND lease_until < ?)) {scan_clause}
+                ORDER BY updated_at, shard_id LIMIT 1
+                """,
+                args,
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            sid, shard_id, tickers, attempts = row
+            conn.execute(
+                "UPDATE shards SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE scan_id = ? AND shard_id = ?",
+                (LEASED, worker_id, now + self.lease_seconds, now, sid, shard_id),
+            )
+            conn.execute("COMMIT")
+
+        return {"scan_id": sid, "shard_id": shard_id, "tickers": json.loads(tickers), "attempts": attempts + 1}
+
+    def heartbeat(self, shard, worker_id):
+        """
+        Extend a lease while a long shard is still being scanned. False
+        if the lease was lost (re-leased, or expired on its last attempt
+        → failed).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._fail_exhausted(conn, now, shard["scan_id"])
+            cur = conn.execute(
+                "UPDATE shards SET lease_until = ? WHERE scan_id = ? AND shard_id = ? AND worker = ? AND status = ?",
+                (now + self.lease_seconds, shard["scan_id"], shard["shard_id"], worker_id, LEASED),
+            )
+            conn.execute("COMMIT")
+        return cur.rowcount > 0
+
+    def complete(self, shard, worker_id, packets, stats=None):
+        """Store a shard's partial results. False if the lease was lost."""
+        payload = json.dumps(packets, default=json_default)
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE shards SET status = ?, result = ?, stats = ?, lease_until = NULL, updated_at = ? "
+                "WHERE scan_id = ? AND shard_id = ? AND worker = ? AND status = ?",
+                (DONE, payload, json.dumps(stats or {}, default=json_default), time.time(),
+                 shard["scan_id"], shard["shard_id"], worker_id, LEASED),
+            )
+        return cur.rowcount > 0
+
+    def release(self, shard, worker_id):
+        """Give a shard back (worker error / shutdown) for another worker."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE shards SET status = ?, worker = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE scan_id = ? AND shard_id = ? AND worker = ? AND status = ?",
+                (PENDING, time.time(), shard["scan_id"], shard["shard_id"], worker_id, LEASED),
+            )
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
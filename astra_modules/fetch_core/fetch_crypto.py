@@ -11,6 +11,7 @@ import pandas as pd
 from astra_modules.api_keys import MORALIS_API_KEY
 from astra_modules.utils.safe_df import safe_df
 from astra_modules.utils.safe_api_wrapper import safe_api_call
+from astra_modules.core.symbol_index import get_symbol_index
 
 
 def _to_df_ohlcv(records):
@@ -46,7 +47,7 @@ def fetch_moralis(symbol, interval="1h"):
     if not MORALIS_API_KEY:
         return pd.DataFrame()
 
-    token = symbol.lower()
+    token = get_symbol_index().canonical(symbol).split("-")[0].lower()
     res_map = {
         "1m": "1",
         "5m": "5",
@@ -77,7 +78,9 @@ def fetch_moralis(symbol, interval="1h"):
 # CoinGecko (backup)
 # -------------------------------------------------------
 def fetch_coingecko(symbol, interval="1h"):
-    token = symbol.lower()
+    token = get_symbol_index().coingecko_id(symbol)
+    if not token:
+        return pd.DataFrame()
 
     days_map = {
         "1m": 1,
@@ -2,7 +2,7 @@
 fetch_unified.py — Phase-90 Rebuild
 -----------------------------------
 Unified data fetcher that:
- • Automatically detects stock vs crypto
+ • Routes stock vs crypto via the symbol index (one dict hit)
  • Builds full OHLCV DataFrame (not single row)
  • Calculates technical indicators (RSI, MACD, MA)
  • Generates sparkline + volatility + rate-of-change
@@ -22,19 +22,12 @@ from astra_modules.api_keys import (
     ALPHA_VANTAGE_API_KEY,
 )
 
-from astra_modules.guardian.guardian_v3 import guardian
-
-
-# ================================================================
-# HELPERS
-# ================================================================
-
-def _is_crypto(symbol: str):
-    if symbol is None:
-        return False
-    sym = symbol.upper()
-    crypto_list = ["BTC", "ETH", "SOL", "XRP", "ADA", "DOGE", "BNB", "USDT", "USDC"]
-    return sym in crypto_list or len(sym) > 4
+try:
+    from astra_modules.guardian.guardian_v3 import guardian
+except ImportError:     # guardian_v3 not present → minimal local validation
+    guardian = None
+from astra_modules.engine.scan_metrics import count_provider_call
+from astra_modules.core.symbol_index import get_symbol_index
 
 
 # ================================================================
@@ -74,6 +67,7 @@ def _fetch_stock_ohlcv_finnhub(symbol, days):
             f"https://finnhub.io/api/v1/stock/candle"
             f"?symbol={symbol}&resolution=D&from={start}&to={now}&token={FINNHUB_API_KEY}"
         )
+        count_provider_call("finnhub")
         r = requests.get(url, timeout=10).json()
         if r.get("s") != "ok":
             return pd.DataFrame()
@@ -99,30 +93,40 @@ def _fetch_stock_ohlcv_twelvedata(symbol, days):
             f"symbol={symbol}&interval=1day&apikey={TWELVEDATA_API_KEY}"
             f"&outputsize={days}"
         )
+        count_provider_call("twelvedata")
         r = requests.get(url, timeout=10).json()
-        values = r.get("values", [])
-        df = pd.DataFrame(values)
-        if df.empty:
-            return df
-        df = df.rename(columns={"datetime": "date"})
-        df["date"] = pd.to_datetime(df["date"])
-        df = df[["date", "open", "high", "low", "close", "volume"]].astype(float)
-        df["symbol"] = symbol
-        return df
+        return parse_twelvedata(r.get("values", []), symbol)
     except:
         return pd.DataFrame()
 
 
+def parse_twelvedata(values, symbol):
+    """TwelveData `values` rows (string fields) → OHLCV DataFrame."""
+    df = pd.DataFrame(values)
+    if df.empty:
+        return df
+    df = df.rename(columns={"datetime": "date"})
+    df["date"] = pd.to_datetime(df["date"])
+    df = df[["date", "open", "high", "low", "close", "volume"]]
+    df = df.astype({c: float for c in ("open", "high", "low", "close", "volume")})
+    df["symbol"] = symbol
+    return df
+
+
 # ================================================================
 # CRYPTO FETCHERS
 # ================================================================
 
 def _fetch_crypto_coingecko(symbol, days):
     try:
+        coin_id = get_symbol_index().coingecko_id(symbol)
+        if not coin_id:
+            return pd.DataFrame()
         url = (
             "https://api.coingecko.com/api/v3/coins/"
-            f"{symbol.lower()}/market_chart?vs_currency=usd&days={days}"
+            f"{coin_id}/market_chart?vs_currency=usd&days={days}"
         )
+        count_provider_call("coingecko")
         r = requests.get(url, timeout=10).json()
         prices = r.get("prices", [])
         if not prices:
@@ -135,7 +139,7 @@ def _fetch_crypto_coingecko(symbol, days):
         df["high"] = df["close"]
         df["low"] = df["close"]
         df["volume"] = 0
-        df["symbol"] = symbol.upper()
+        df["symbol"] = get_symbol_index().canonical(symbol)
         return df[["date", "open", "high", "low", "close", "volume", "symbol"]]
     except:
         return pd.DataFrame()
@@ -153,12 +157,14 @@ def fetch_unified(symbol, lookback=90):
         - sparkline list
         - volatility
         - price_change
+    Agent feature columns are added by the scan pipeline
+    (add_agent_features), not here.
     """
 
     df = pd.DataFrame()
 
     try:
-        if _is_crypto(symbol):
+        if get_symbol_index().is_crypto(symbol):
             df = _fetch_crypto_coingecko(symbol, lookback)
         else:
             df = _fetch_stock_ohlcv_finnhub(symbol, lookback)
@@ -168,7 +174,7 @@ def fetch_unified(symbol, lookback=90):
         df = pd.DataFrame()
 
     # Guardian validation
-    df = guardian.validate_dataframe(df, required_columns=["date", "close"])
+    df = _validate(df, required_columns=["date", "close"])
 
     if df.empty:
         return df
@@ -176,10 +182,23 @@ def fetch_unified(symbol, lookback=90):
     # Sort chronologically
     df = df.sort_values("date").reset_index(drop=True)
 
-    # ============================================================
-    # PHASE-90 ENRICHMENT
-    # ============================================================
+    return enrich_ohlcv(df)
+
+
+def _validate(df, required_columns):
+    if guardian is not None:
+        return guardian.validate_dataframe(df, required_columns=required_columns)
+    if not isinstance(df, pd.DataFrame) or any(c not in df.columns for c in required_columns):
+        return pd.DataFrame()
+    return df.dropna(subset=required_columns)
+
+
+# ================================================================
+# PHASE-90 ENRICHMENT
+# ================================================================
 
+def enrich_ohlcv(df):
+    """Indicators for charts + ranking (chronologically sorted df)."""
     closes = df["close"].astype(float)
 
     # RSI
@@ -207,3 +226,24 @@ def fetch_unified(symbol, lookback=90):
         df["price_change"] = 0
 
     return df
+
+
+def add_agent_features(df):
+    """
+    Columns read by StateBundleBuilder / AstraPrime:
+        ma10, ma30, momentum (10-bar ROC), vol_spike (volume / 20-bar mean)
+    """
+    closes = df["close"].astype(float)
+
+    df["ma10"] = closes.rolling(10, min_periods=1).mean()
+    df["ma30"] = closes.rolling(30, min_periods=1).mean()
+    df["momentum"] = closes.pct_change(10).fillna(0)
+
+    if "volume" in df:
+        volume = df["volume"].astype(float)
+        avg = volume.rolling(20, min_periods=1).mean().replace(0, np.nan)
+        df["vol_spike"] = (volume / avg).fillna(1.0)
+    else:
+        df["vol_spike"] = 1.0
+
+    return df
@@ -1,3 +1,3 @@
-from .learning_store import LearningStore
+from .learning_store import LearningStore, load_records
 
-__all__ = ["LearningStore"]
+__all__ = ["LearningStore", "load_records"]
@@ -2,19 +2,37 @@
 continual_trainer.py — Phase-90 Upgrade
 Reads from ReplayBuffer and trains the MicroNeuralModel.
 Supports hybrid supervised learning from PnL outcomes.
+
+Torch models train epoch-wise over the whole buffer (learning/
+epoch_trainer.py); models exposing only train_step(features, label)
+keep the per-sample path. Torch models are made trainable first
+(NeuralAgent.make_trainable: a registry-loaded shared model is
+read-only) and each run is saved as a ModelRegistry version
+(NeuralAgent.save_trained), which AstraPrime loads on start.
 """
 
 from typing import List, Dict, Any
 
+from astra_modules.learning.replay_buffer import ReplayBatch
+
+BATCH_SIZE = 256
+EPOCHS = 20
+MODEL_NAME = "neural_agent"     # AstraPrime's registry checkpoint
+
 
 class ContinualTrainer:
-    def __init__(self, neural_agent, replay_buffer):
+    def __init__(self, neural_agent, replay_buffer, model_name=MODEL_NAME):
         """
         neural_agent: NeuralAgent instance
         replay_buffer: ReplayBuffer instance
+        model_name: registry name trained weights are saved under
+                    (None → never saved)
         """
         self.agent = neural_agent
         self.buffer = replay_buffer
+        self.model_name = model_name
+        self.last_report = None
+        self.last_error = None      # message of the last failed train / train_step
 
     # ==================================================================
     # INTERNAL: CLEAN & VALIDATE TRAINING SAMPLES
@@ -23,13 +41,21 @@ class ContinualTrainer:
         """
         Converts replay buffer entries into valid training samples.
 
-        ReplayBuffer entries look like:
+        ReplayBuffer.sample() returns a ReplayBatch of arrays; rows
+        without an outcome yet are dropped. Legacy list batches look like:
         {
             "state": { "features": [...] },
             "prediction": float,
             "outcome": float   # PnL
         }
         """
+        if isinstance(batch, ReplayBatch):
+            batch = batch.labelled()
+            return [
+                {"features": f, "label": int(l)}
+                for f, l in zip(batch.features, batch.labels)
+            ]
+
         samples = []
 
         for exp in batch:
@@ -59,24 +85,72 @@ class ContinualTrainer:
 
         return samples
 
+    # ==================================================================
+    # EPOCH TRAINING (torch models)
+    # ==================================================================
+    def _is_torch_model(self, model):
+        return hasattr(model, "parameters") and hasattr(model, "state_dict")
+
+    def _fit(self, batch: ReplayBatch, epochs, batch_size, num_threads=None, val_fraction=None):
+        from astra_modules.learning.epoch_trainer import VAL_FRACTION, fit, format_report
+
+        batch = batch.labelled()
+        if batch.size == 0:
+            return "No valid samples with features/outcomes."
+
+        if hasattr(self.agent, "make_trainable"):
+            self.agent.make_trainable()
+        report = fit(
+            self.agent.model, batch.features, batch.labels,
+            optimizer=getattr(self.agent, "optimizer", None),
+            criterion=getattr(self.agent, "criterion", None),
+            epochs=epochs,
+            batch_size=batch_size,
+            val_fraction=VAL_FRACTION if val_fraction is None else val_fraction,
+            num_threads=num_threads,
+        )
+        if hasattr(self.agent, "model_version"):
+            self.agent.model_version += 1
+        if hasattr(self.agent, "checkpoint"):
+            self.agent.checkpoint = None
+        self.last_report = report
+        self._save(report)
+        return f"Trained on {report['train_samples']} samples: {format_report(report)}"
+
+    def _save(self, report):
+        """New registry version for the trained weights (a failed save keeps the training)."""
+        if not self.model_name or not hasattr(self.agent, "save_trained"):
+            return None
+        try:
+            return self.agent.save_trained(report, name=self.model_name)
+        except Exception as e:
+            print(f"[continual_trainer] checkpoint save failed: {e}")
+            return None
+
     # ==================================================================
     # TRAIN STEP
     # ==================================================================
-    def train_step(self, batch: List[dict]):
+    def train_step(self, batch=None):
         """
-        Perform one training pass over a sample batch.
+        Perform one training pass over a sample batch
+        (None → epoch training over the whole buffer).
         """
-
+        self.last_error = None
         try:
-            if not batch:
+            if batch is None:
+                return self.train()
+
+            if len(batch.indices if isinstance(batch, ReplayBatch) else batch) == 0:
                 return "No data to train on."
 
+            model = self.agent.model
+            if isinstance(batch, ReplayBatch) and self._is_torch_model(model):
+                return self._fit(batch, epochs=1, batch_size=BATCH_SIZE, val_fraction=0.0)
+
             samples = self._extract_training_samples(batch)
             if not samples:
                 return "No valid samples with features/outcomes."
 
-            model = self.agent.model
-
             trained = 0
             for s in samples:
                 features = s["features"]
@@ -89,19 +163,28 @@ class ContinualTrainer:
             return f"Trained on {trained} samples."
 
         except Exception as e:
+            self.last_error = str(e)
             return f"[Trainer] Error during train_step: {e}"
 
     # ==================================================================
     # PUBLIC TRAIN METHOD
     # ==================================================================
-    def train(self, batch_size: int = 64):
+    def train(self, batch_size: int = BATCH_SIZE, epochs: int = EPOCHS, num_threads=None):
         """
-        Main training loop. Pulls a sample batch from ReplayBuffer
-        and calls train_step().
+        Main training loop. Torch models: shuffled mini-batch epochs over
+        every labelled row in the ReplayBuffer, early-stopped on a
+        held-out slice. Other models: one sampled batch via train_step().
         """
+        self.last_error = None
         try:
-            batch = self.buffer.sample(batch_size)
-            return self.train_step(batch)
+            if not self._is_torch_model(self.agent.model):
+                return self.train_step(self.buffer.sample(batch_size))
+
+            batch = self.buffer.snapshot()
+            if batch.size == 0:
+                return "No data to train on."
+            return self._fit(batch, epochs=epochs, batch_size=batch_size, num_threads=num_threads)
 
         except Exception as e:
-            return f"[Trainer] Error getting batch: {e}"
+            self.last_error = str(e)
+            return f"[Trainer] Error during training: {e}"
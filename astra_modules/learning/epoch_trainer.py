@@ -0,0 +1,151 @@
+"""
+epoch_trainer.py — Phase-100
+Epoch-based mini-batch training over a whole replay buffer.
+
+ • features / targets become two contiguous float32 tensors, copied to
+   the model's device once (through pinned memory on CUDA)
+ • each epoch shuffles one index permutation and slices it into
+   batches — no per-sample Python objects
+ • a held-out slice drives early stopping (best weights restored)
+ • losses accumulate on-device; one report per fit with samples/sec
+ • torch.set_num_threads from num_threads or ASTRA_TORCH_THREADS
+
+Used by both ContinualTrainers (agents/ and learning/).
+"""
+
+import copy
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+
+EPOCHS = 20
+BATCH_SIZE = 256
+VAL_FRACTION = 0.1
+MIN_VAL_SAMPLES = 32        # below this, no held-out slice (no early stopping)
+PATIENCE = 3
+MIN_DELTA = 1e-5
+LEARNING_RATE = 1e-3
+
+
+def configure_threads(num_threads=None):
+    """Apply num_threads (or $ASTRA_TORCH_THREADS); returns the active count."""
+    n = num_threads or os.environ.get("ASTRA_TORCH_THREADS")
+    if n:
+        torch.set_num_threads(max(1, int(n)))
+    return torch.get_num_threads()
+
+
+def _model_device(model):
+    try:
+        return next(model.parameters()).device
+    except StopIteration:
+        return torch.device("cpu")
+
+
+def _to_device(array, device):
+    t = torch.from_numpy(np.ascontiguousarray(array, dtype=np.float32))
+    if device.type == "cuda":
+        return t.pin_memory().to(device, non_blocking=True)
+    return t
+
+
+def fit(model, features, targets, optimizer=None, criterion=None, epochs=EPOCHS,
+        batch_size=BATCH_SIZE, val_fraction=VAL_FRACTION, patience=PATIENCE,
+        num_threads=None, seed=None) -> dict:
+    """
+    Train `model` on (features, targets) arrays for up to `epochs`
+    passes. Returns a report:
+        {samples, train_samples, val_samples, epochs, best_epoch,
+         stopped_early, train_loss, val_loss, seconds, samples_per_sec,
+         threads}
+    """
+    threads = configure_threads(num_threads)
+    device = _model_device(model)
+    optimizer = optimizer or torch.optim.Adam(model.parameters(), lr=LEARNING_RATE)
+    criterion = criterion or nn.MSELoss()
+
+    X = _to_device(features, device)
+    y = _to_device(targets, device).reshape(len(X), -1)
+    n = len(X)
+
+    gen = torch.Generator()
+    if seed is not None:
+        gen.manual_seed(seed)
+
+    # Held-out slice (random rows; buffer order is ring order, not time)
+    n_val = int(n * val_fraction) if n * val_fraction >= MIN_VAL_SAMPLES else 0
+    perm = torch.randperm(n, generator=gen).to(device)
+    X_val, y_val = X[perm[:n_val]], y[perm[:n_val]]
+    X_tr, y_tr = X[perm[n_val:]], y[perm[n_val:]]
+    n_tr = len(X_tr)
+
+    best_loss, best_state, best_epoch = float("inf"), None, 0
+    bad_epochs = 0
+    train_loss = val_loss = None
+    epochs_run = 0
+    t0 = time.perf_counter()
+
+    for epoch in range(1, epochs + 1):
+        model.train()
+        order = torch.randperm(n_tr, generator=gen).to(device)
+        running = torch.zeros((), device=device)
+
+        for start in range(0, n_tr, batch_size):
+            idx = order[start:start + batch_size]
+            optimizer.zero_grad(set_to_none=True)
+            loss = criterion(model(X_tr[idx]), y_tr[idx])
+            loss.backward()
+            optimizer.step()
+            running += loss.detach() * len(idx)
+
+        epochs_run = epoch
+        train_loss = float(running) / max(1, n_tr)
+
+        if not n_val:
+            continue
+
+        model.eval()
+        with torch.no_grad():
+            val_loss = float(criterion(model(X_val), y_val))
+
+        if val_loss < best_loss - MIN_DELTA:
+            best_loss, best_epoch, bad_epochs = val_loss, epoch, 0
+            best_state = copy.deepcopy(model.state_dict())
+        else:
+            bad_epochs += 1
+            if bad_epochs >= patience:
+                break
+
+    seconds = time.perf_counter() - t0
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    model.eval()
+
+    return {
+        "samples": n,
+        "train_samples": n_tr,
+        "val_samples": n_val,
+        "epochs": epochs_run,
+        "best_epoch": best_epoch or epochs_run,
+        "stopped_early": epochs_run < epochs,
+        "train_loss": train_loss,
+        "val_loss": best_loss if best_state is not None else val_loss,
+        "seconds": seconds,
+        "samples_per_sec": n_tr * epochs_run / seconds if seconds > 0 else 0.0,
+        "threads": threads,
+    }
+
+
+def format_report(report: dict) -> str:
+    val = report.get("val_loss")
+    return (
+        f"{report['epochs']} epoch(s) over {report['train_samples']} samples "
+        f"(best {report['best_epoch']}{', early stop' if report['stopped_early'] else ''}) · "
+        f"train_loss={report['train_loss']:.6f}"
+        + (f" · val_loss={val:.6f}" if val is not None else "")
+        + f" · {report['samples_per_sec']:,.0f} samples/s on {report['threads']} thread(s)"
+    )
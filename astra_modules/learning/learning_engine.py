@@ -13,15 +13,24 @@
 #   ✔ Robust fallbacks if data missing
 #   ✔ Guardian-safe numeric conversions
 #   ✔ Ultra-fast training (vectorized Pandas)
+#   ✔ Online updates (Phase-100): streaming weighted means / variances /
+#     covariances per factor vs future_return (Chan–Welford merges,
+#     exponential time decay) — refresh_learning() is O(new records)
 #
 # =====================================================================
 
+import threading
+
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
 from astra_modules.learning.learning_store import load_records
-from astra_modules.guardian.guardian_v3 import guardian
+try:
+    from astra_modules.guardian.guardian_v3 import guardian
+except ImportError:     # guardian_v3 not present → minimal local cleanup
+    guardian = None
+from astra_modules.engine.score_matrix import AGENT_ORDER, optimize_weights
 
 
 # =====================================================================
@@ -36,10 +45,29 @@ LEARNING_STATE = {
     "confidence_weight": 0.20,
 
     "last_trained": None,
-    "samples_used": 0
+    "samples_used": 0,          # paired records folded in
+    "effective_samples": 0.0,   # their decayed total weight
+
+    # Phase-100 agent weights (AstraPrime), filled by search_agent_weights()
+    "agent_weights": None,
+    "agent_weight_objective": None,
 }
 
 
+# Factor columns (in weight order) and their sign (lower vol = better)
+FACTORS = (
+    ("momentum_weight", "momentum10", 1.0),
+    ("volatility_weight", "volatility20", -1.0),
+    ("trend_weight", "slope10", 1.0),
+    ("hybrid_weight", "hybrid_score", 1.0),
+    ("confidence_weight", "confidence", 1.0),
+)
+RECORD_COLUMNS = ["id", "timestamp", "ticker", "close"] + [col for _, col, _ in FACTORS]
+
+MIN_SAMPLES = 50
+DECAY_HALF_LIFE_DAYS = 30.0     # sample weight halves every 30 days
+
+
 # =====================================================================
 # SAFE NORMALIZATION
 # =====================================================================
@@ -54,85 +82,234 @@ def _safe_norm(series):
 
 # =====================================================================
 # COMPUTE TRAINING LABELS
-# Outcome = next-day return
+# Outcome = next-day return (next record of the same ticker)
 # =====================================================================
-def _compute_targets(df):
-    df = df.sort_values("timestamp")
-    df["next_close"] = df["close"].shift(-1)
+def _compute_targets(df, keep_last=False):
+    """
+    future_return per row from the ticker's next close. keep_last=True
+    also returns the last row of every ticker (target not known yet).
+    """
+    df = df.sort_values("timestamp", kind="stable")
+    key = df["ticker"] if "ticker" in df.columns else pd.Series("", index=df.index)
+    df["next_close"] = df.groupby(key, sort=False)["close"].shift(-1)
     df["future_return"] = (df["next_close"] - df["close"]) / df["close"]
+    last = df[df["next_close"].isna()]
     df = df.dropna(subset=["future_return"])
-    return df
+    return (df, last) if keep_last else df
 
 
 # =====================================================================
-# FIT WEIGHTS BASED ON HISTORICAL CORRELATION
+# STREAMING SUFFICIENT STATISTICS
 # =====================================================================
-def _fit_weights(df):
-    new_weights = {}
-
-    factors = {
-        "momentum_weight": df["momentum10"],
-        "volatility_weight": df["volatility20"] * -1,    # lower vol = better
-        "trend_weight": df["slope10"],
-        "hybrid_weight": df["hybrid_score"],
-        "confidence_weight": df["confidence"]
-    }
-
-    for weight_name, series in factors.items():
-        corr = df["future_return"].corr(series)
-        if pd.isna(corr):
-            corr = 0.0
-        new_weights[weight_name] = corr
-
-    # Normalize so weights sum to 1
-    total = sum(abs(v) for v in new_weights.values()) or 1
-    for k in new_weights:
-        new_weights[k] = float(new_weights[k] / total)
+class OnlineFactorStats:
+    """
+    Decayed weighted moments of the factor columns X (K) and y =
+    future_return:
+        W      total weight
+        mean   (K+1) means of [X, y]
+        m2     (K+1) Σw·(z − mean)²
+        cxy    (K)   Σw·(x − mean_x)(y − mean_y)
+    Batches merge in with Chan's parallel update; existing moments
+    decay by 0.5 ** (Δt / half_life) first, so old samples fade out
+    and Pearson corr_j = cxy_j / √(m2_j · m2_y) tracks recent data.
+    """
 
-    return new_weights
+    def __init__(self, k=len(FACTORS), half_life_days=DECAY_HALF_LIFE_DAYS):
+        self.k = k
+        self.half_life = half_life_days * 86400.0 if half_life_days else None
+        self.reset()
+
+    def reset(self):
+        self.W = 0.0
+        self.n = 0
+        self.mean = np.zeros(self.k + 1)
+        self.m2 = np.zeros(self.k + 1)
+        self.cxy = np.zeros(self.k)
+        self.last_ts = None
+
+    def _decay(self, dt):
+        if self.half_life is None or dt <= 0:
+            return 1.0
+        return 0.5 ** (dt / self.half_life)
+
+    def update(self, X, y, ts):
+        """Merge a batch: X (n, K), y (n,), ts (n,) epoch seconds."""
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        ts = np.asarray(ts, dtype=float)
+        if len(y) == 0:
+            return
+
+        t_end = float(ts.max())
+        if self.last_ts is not None:
+            t_end = max(t_end, self.last_ts)
+        w = 0.5 ** ((t_end - ts) / self.half_life) if self.half_life else np.ones(len(y))
+
+        # Batch moments
+        Z = np.column_stack([X, y])
+        Wb = w.sum()
+        mb = (w[:, None] * Z).sum(axis=0) / Wb
+        D = Z - mb
+        m2b = (w[:, None] * D * D).sum(axis=0)
+        cb = (w[:, None] * D[:, :-1] * D[:, -1:]).sum(axis=0)
+
+        # Decay existing moments to t_end, then merge
+        if self.W > 0:
+            f = self._decay(t_end - self.last_ts)
+            Wa, m2a, ca = self.W * f, self.m2 * f, self.cxy * f
+        else:
+            Wa, m2a, ca = 0.0, np.zeros_like(m2b), np.zeros_like(cb)
+
+        W = Wa + Wb
+        delta = mb - self.mean
+        self.mean = self.mean + delta * (Wb / W)
+        self.m2 = m2a + m2b + delta ** 2 * (Wa * Wb / W)
+        self.cxy = ca + cb + delta[:-1] * delta[-1] * (Wa * Wb / W)
+        self.W = W
+        self.n += len(y)
+        self.last_ts = t_end
+
+    def correlations(self):
+        denom = np.sqrt(self.m2[:-1] * self.m2[-1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.where(denom > 0, self.cxy / denom, 0.0)
+        return np.nan_to_num(corr)
+
+
+_STATS = OnlineFactorStats()
+_CURSOR = {"last_id": 0, "pending": None}   # pending = last row per ticker (no target yet)
+_LOCK = threading.RLock()
 
 
 # =====================================================================
-# MAIN TRAINING FUNCTION
+# FIT WEIGHTS BASED ON HISTORICAL CORRELATION
 # =====================================================================
-def train_learning_engine():
-    """
-    Loads last 90 days of records, learns correlations between
-    Astra’s signals and future performance.
-    """
+def _weights_from_corr(corr):
+    # Normalize so weights sum to 1
+    total = float(np.abs(corr).sum()) or 1
+    return {name: float(c / total) for (name, _, _), c in zip(FACTORS, corr)}
 
-    df = load_records(as_dataframe=True)
-    if df.empty or len(df) < 50:
-        return LEARNING_STATE  # Not enough data yet
 
-    # Guardian cleanup
-    df = guardian.sanitize_df(df)
+def _fit_weights(df):
+    stats = OnlineFactorStats(half_life_days=None)
+    _absorb(stats, df)
+    return _weights_from_corr(stats.correlations())
 
-    # Compute training targets (next-day returns)
-    df = _compute_targets(df)
-    if df.empty:
-        return LEARNING_STATE
 
-    # Drop rows with missing numeric data
-    numeric_cols = [
-        "momentum10", "volatility20", "slope10",
-        "hybrid_score", "confidence",
-        "future_return"
-    ]
+def _factor_matrix(df):
+    return np.column_stack([df[col].to_numpy(dtype=float) * sign for _, col, sign in FACTORS])
+
+
+def _absorb(stats, df):
+    """Paired rows (future_return known) → sufficient statistics."""
+    numeric_cols = [col for _, col, _ in FACTORS] + ["future_return"]
     df = df.dropna(subset=numeric_cols)
+    if df.empty:
+        return 0
+    stats.update(_factor_matrix(df), df["future_return"].to_numpy(dtype=float),
+                 df["timestamp"].to_numpy(dtype=float))
+    return len(df)
+
+
+def _prepare(df):
+    """Guardian cleanup + numeric coercion of the columns training uses."""
+    if guardian is not None:
+        df = guardian.sanitize_df(df)
+    else:
+        df = df.replace([np.inf, -np.inf], np.nan)
+    for col in ["timestamp", "close"] + [col for _, col, _ in FACTORS]:
+        if col not in df.columns:
+            df[col] = np.nan
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def _publish():
+    if _STATS.n < MIN_SAMPLES:
+        return LEARNING_STATE  # Not enough data yet
+    LEARNING_STATE.update(_weights_from_corr(_STATS.correlations()))
+    LEARNING_STATE["last_trained"] = datetime.utcnow().isoformat()
+    LEARNING_STATE["samples_used"] = _STATS.n
+    LEARNING_STATE["effective_samples"] = float(_STATS.W)
+    return LEARNING_STATE
 
+
+# =====================================================================
+# ONLINE UPDATE
+# =====================================================================
+def observe_records(df):
+    """
+    Fold new records (DataFrame / list of dicts, any order) into the
+    running statistics. Each record's target becomes known when its
+    ticker's next record arrives. Cost is O(len(df)).
+    """
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame.from_records(list(df))
     if df.empty:
         return LEARNING_STATE
 
-    # Fit new weights
-    new_weights = _fit_weights(df)
+    with _LOCK:
+        df = _prepare(df)
+        pending = _CURSOR["pending"]
+        if pending is not None and not pending.empty:
+            if "ticker" in df.columns and "ticker" in pending.columns:
+                carry = pending[pending["ticker"].isin(df["ticker"].unique())]
+                keep = pending.drop(carry.index)
+            else:
+                carry, keep = pending, pending.iloc[0:0]
+            df = pd.concat([carry, df], ignore_index=True)
+        else:
+            keep = None
+
+        paired, last = _compute_targets(df, keep_last=True)
+        _absorb(_STATS, paired)
+
+        last = last.drop(columns=["next_close", "future_return"])
+        _CURSOR["pending"] = last if keep is None or keep.empty else pd.concat([keep, last], ignore_index=True)
+        return _publish()
+
+
+def _advance_cursor(df):
+    """Drop already-seen rows, remember the highest row id."""
+    if "id" not in df.columns:
+        return df
+    df = df[df["id"] > _CURSOR["last_id"]]
+    if not df.empty:
+        _CURSOR["last_id"] = int(df["id"].max())
+    return df.drop(columns="id")
+
+
+def update_learning_engine():
+    """
+    Read only records stored since the last update (row ids above the
+    cursor — a late-committed batch with older timestamps is not skipped).
+    """
+    with _LOCK:
+        df = load_records(as_dataframe=True, after_id=_CURSOR["last_id"], columns=RECORD_COLUMNS)
+        if df.empty:
+            return LEARNING_STATE
+        df = _advance_cursor(df)
+        if df.empty:
+            return LEARNING_STATE
+        return observe_records(df)
 
-    # Update global state
-    LEARNING_STATE.update(new_weights)
-    LEARNING_STATE["last_trained"] = datetime.utcnow().isoformat()
-    LEARNING_STATE["samples_used"] = len(df)
 
-    return LEARNING_STATE
+# =====================================================================
+# MAIN TRAINING FUNCTION
+# =====================================================================
+def train_learning_engine():
+    """
+    Loads last 90 days of records, learns correlations between
+    Astra’s signals and future performance (full rebuild of the
+    running statistics; refresh_learning() continues incrementally).
+    """
+    with _LOCK:
+        _STATS.reset()
+        _CURSOR.update(last_id=0, pending=None)
+        df = load_records(as_dataframe=True, columns=RECORD_COLUMNS)
+        if df.empty:
+            return LEARNING_STATE  # Not enough data yet
+        return observe_records(_advance_cursor(df))
 
 
 # =====================================================================
@@ -169,6 +346,36 @@ def learning_signal(feature_row):
     return float(final)
 
 
+# =====================================================================
+# AGENT WEIGHT SEARCH (Phase-100)
+# Scores every candidate weight vector over the whole history in one
+# (T × N × K) @ (K × W) product instead of looping tickers in Python.
+# =====================================================================
+def search_agent_weights(score_history, return_history, n_candidates=2000, top_k=10, seed=None):
+    """
+    score_history: (T, N, K) agent scores in AGENT_ORDER
+    return_history: (T, N) forward returns aligned with score_history
+
+    The result is kept in LEARNING_STATE["agent_weights"]; ScanService
+    applies it to AstraPrime after the next scan.
+    """
+    score_history = np.asarray(score_history, dtype=float)
+    if score_history.ndim != 3 or score_history.shape[-1] != len(AGENT_ORDER):
+        return LEARNING_STATE
+
+    result = optimize_weights(
+        score_history,
+        return_history,
+        n_candidates=n_candidates,
+        top_k=top_k,
+        seed=seed,
+    )
+
+    LEARNING_STATE["agent_weights"] = result["weights"]
+    LEARNING_STATE["agent_weight_objective"] = result["objective"]
+    return LEARNING_STATE
+
+
 # =====================================================================
 # EXTERNAL API FOR RANKING ENGINE
 # =====================================================================
@@ -177,5 +384,11 @@ def get_learning_state():
 
 
 def refresh_learning():
-    """Train immediately and return updated weights."""
-    return train_learning_engine()
+    """
+    Fold in records stored since the last refresh and return updated
+    weights — O(new records), cheap enough to call after every scan.
+    The first call trains on the full window.
+    """
+    if _CURSOR["last_id"] == 0:
+        return train_learning_engine()
+    return update_learning_engine()
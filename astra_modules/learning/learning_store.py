@@ -1,62 +1,322 @@
 """
-learning_store.py — Astra Intelligence (Phase-50 Rebuild)
-Safe memory storage for learning data
+learning_store.py — Astra Intelligence (Phase-100 Rebuild)
+Append-only storage for learning data
+
+ • SQLite table, one row per record, indexed on timestamp
+ • add_record() buffers; rows are committed in batches
+   (BATCH_SIZE rows or FLUSH_SECONDS, whichever comes first)
+ • new record keys become new columns (schema grows, rows never rewritten)
+ • nested values (dict / list) are stored as JSON text; their columns
+   are remembered in json_columns and decoded again by load() / get_records()
+ • pruning beyond max_memory_days is one indexed DELETE, at most
+   once per PRUNE_INTERVAL — insert cost stays constant as history grows
+ • load_records(as_dataframe=True) reads straight into a DataFrame
+ • a failed commit puts the batch back at the front of the buffer
+   (retried by the next flush); flush() raises, add_record() keeps going
+ • compact() — flush + prune + WAL checkpoint, run hourly by the
+   job scheduler's maintenance.compaction job
+ • a closed store raises LearningStoreClosed instead of failing on a
+   missing connection
+
+A legacy learning_memory.json ({"records": [...]}) is imported once
+on first open.
 """
 
+import atexit
 import json
-import os
+import sqlite3
+import threading
 import time
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_FILE = "learning_memory.db"
+LEGACY_FILE = "learning_memory.json"
+
+BATCH_SIZE = 256
+FLUSH_SECONDS = 2.0
+PRUNE_INTERVAL = 3600
+
+
+def _get_store_path() -> Path:
+    """Default SQLite database, learning_memory.db at the project root."""
+    return Path(__file__).resolve().parents[2] / DEFAULT_FILE
+
+
+def _is_nested(value):
+    return isinstance(value, (dict, list, tuple))
+
+
+def _decode(value):
+    """JSON text written by _column() → dict / list (anything else unchanged)."""
+    if isinstance(value, str) and value[:1] in ("{", "["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _column(value):
+    """SQLite-storable value (nested structures as JSON text)."""
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if hasattr(value, "item"):          # numpy scalar
+        try:
+            return value.item()
+        except Exception:
+            pass
+    try:
+        return json.dumps(value, default=str)
+    except Exception:
+        return str(value)
+
+
+class LearningStoreClosed(RuntimeError):
+    """add_record() / flush() / load() after close()."""
 
-DEFAULT_FILE = "learning_memory.json"
 
 class LearningStore:
-    def __init__(self, file_path=DEFAULT_FILE, max_memory_days=90):
-        self.file_path = file_path
+    def __init__(self, file_path=None, max_memory_days=90, batch_size=BATCH_SIZE,
+                 flush_seconds=FLUSH_SECONDS):
+        self.file_path = Path(file_path) if file_path else _get_store_path()
         self.max_memory_days = max_memory_days
-        self.data = {"records": []}  # ensure dict structure
+        self.batch_size = max(1, int(batch_size))
+        self.flush_seconds = flush_seconds
+
+        self._lock = threading.RLock()
+        self._pending = []
+        self._first_pending = None
+        self._last_prune = 0.0
+
+        self._conn = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_records_ts ON records(timestamp)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS json_columns (name TEXT PRIMARY KEY)")
+        self._conn.commit()
+        self._read_schema()
+
+        self._import_legacy()
+        self._cleanup(force=True)
+        atexit.register(self.close)
+
+    # ---------------------------------------------------------
+    # SCHEMA
+    # ---------------------------------------------------------
+    def _read_schema(self):
+        self._columns = {row[1] for row in self._conn.execute("PRAGMA table_info(records)")}
+        self._json_columns = {row[0] for row in self._conn.execute("SELECT name FROM json_columns")}
 
-        # load existing memory safely
-        self._load()
-        self._cleanup()
+    def _ensure_columns(self, keys):
+        for key in keys:
+            if key not in self._columns:
+                name = key.replace('"', '""')
+                self._conn.execute(f'ALTER TABLE records ADD COLUMN "{name}"')
+                self._columns.add(key)
+
+    def _mark_json_columns(self, rows, keys):
+        nested = {k for k in keys if k not in self._json_columns and any(_is_nested(r.get(k)) for r in rows)}
+        if nested:
+            self._conn.executemany("INSERT OR IGNORE INTO json_columns (name) VALUES (?)", [(k,) for k in nested])
+            self._json_columns |= nested
+
+    def _import_legacy(self):
+        legacy = self.file_path.with_name(LEGACY_FILE)
+        if not legacy.exists() or self._conn.execute("SELECT 1 FROM records LIMIT 1").fetchone():
+            return
+        try:
+            with legacy.open("r") as f:
+                records = json.load(f).get("records", [])
+        except Exception:
+            return
+        with self._lock:
+            for r in records:
+                if isinstance(r, dict):
+                    self._pending.append(dict(r, timestamp=r.get("timestamp", time.time())))
+            self.flush()
+
+    # ---------------------------------------------------------
+    # WRITE PATH
+    # ---------------------------------------------------------
+    def add_record(self, record):
+        """Buffer a new learning record (O(1); committed in batches)."""
+        record = dict(record)
+        record["timestamp"] = time.time()
+        with self._lock:
+            self._check_open()
+            self._pending.append(record)
+            if self._first_pending is None:
+                self._first_pending = record["timestamp"]
+            due = (
+                len(self._pending) >= self.batch_size
+                or record["timestamp"] - self._first_pending >= self.flush_seconds
+            )
+            if due:
+                try:
+                    self.flush()
+                except Exception:
+                    pass        # logged by flush(); the batch stays buffered for the next one
+        return record
+
+    def add_records(self, records):
+        for r in records:
+            self.add_record(r)
+
+    def _check_open(self):
+        if self._conn is None:
+            raise LearningStoreClosed(f"{self.file_path} is closed")
+
+    def flush(self):
+        """
+        Commit buffered records in one transaction. On failure the
+        batch goes back to the front of the buffer (retried by the next
+        flush) and the error is raised.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            self._check_open()
+            pending, self._pending = self._pending, []
+            self._first_pending = None
+
+            # Group by key set → one executemany per record shape
+            groups = {}
+            for r in pending:
+                keys = tuple(k for k in r if k != "id")
+                groups.setdefault(keys, []).append(r)
 
-    def _load(self):
-        if os.path.exists(self.file_path):
             try:
-                with open(self.file_path, "r") as f:
-                    loaded = json.load(f)
-                    if isinstance(loaded, dict) and "records" in loaded:
-                        self.data = loaded
-                    else:
-                        self.data = {"records": []}
-            except Exception:
-                self.data = {"records": []}
-        else:
-            self.data = {"records": []}
+                for keys, rows in groups.items():
+                    self._ensure_columns(keys)
+                    self._mark_json_columns(rows, keys)
+                    cols = ", ".join('"' + k.replace('"', '""') + '"' for k in keys)
+                    marks = ", ".join("?" for _ in keys)
+                    self._conn.executemany(
+                        f"INSERT INTO records ({cols}) VALUES ({marks})",
+                        [tuple(_column(r.get(k)) for k in keys) for r in rows],
+                    )
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                self._read_schema()         # columns added in the rolled-back transaction are gone
+                self._pending[:0] = pending
+                self._first_pending = pending[0]["timestamp"]
+                print(f"[learning_store] flush failed, {len(pending)} records kept for retry: {e}")
+                raise
 
-    def _cleanup(self):
-        """Remove old records beyond max_memory_days."""
+            self._cleanup()
+            return len(pending)
+
+    def _cleanup(self, force=False):
+        """Drop records beyond max_memory_days (indexed range delete)."""
         now = time.time()
+        if not force and now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
         cutoff = now - self.max_memory_days * 86400
-        if isinstance(self.data, dict) and "records" in self.data:
-            self.data["records"] = [r for r in self.data["records"]
-                                    if r.get("timestamp", now) >= cutoff]
+        with self._lock:
+            self._conn.execute("DELETE FROM records WHERE timestamp < ?", (cutoff,))
+            self._conn.commit()
 
-    def add_record(self, record):
-        """Add a new learning record."""
-        record["timestamp"] = time.time()
-        if isinstance(self.data, dict) and "records" in self.data:
-            self.data["records"].append(record)
-        self._cleanup()
-        self._save()
+    def compact(self):
+        """Flush, prune and fold the WAL back into the main file (maintenance job)."""
+        self._check_open()
+        self.flush()
+        self._cleanup(force=True)
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # ---------------------------------------------------------
+    # READ PATH
+    # ---------------------------------------------------------
+    def load(self, as_dataframe=False, since=None, columns=None, after_id=None):
+        """
+        Records inside the retention window (or newer than `since`,
+        epoch seconds), oldest first, as dicts with nested values
+        decoded. as_dataframe=True → DataFrame straight from SQLite
+        (nested values stay JSON text).
+
+        after_id → only rows inserted after that row id (primary-key
+        range; unlike `since`, a batch committed late with older
+        timestamps is still returned).
+        """
+        self._check_open()
+        self.flush()
+        cutoff = since if since is not None else time.time() - self.max_memory_days * 86400
+        if columns:
+            cols = ", ".join('"' + c.replace('"', '""') + '"' for c in columns if c in self._columns)
+        else:
+            cols = "*"
+
+        if after_id is not None:
+            query = f"SELECT {cols or '*'} FROM records WHERE id > ? ORDER BY timestamp"
+            args = (int(after_id),)
+        else:
+            query = f"SELECT {cols or '*'} FROM records WHERE timestamp >= ? ORDER BY timestamp"
+            args = (cutoff,)
+        with self._lock:
+            cur = self._conn.execute(query, args)
+            names = [d[0] for d in cur.description]
+            df = pd.DataFrame.from_records(cur.fetchall(), columns=names)
+
+        if "id" in df.columns and not (columns and "id" in columns):
+            df = df.drop(columns="id")
+        if as_dataframe:
+            return df
+        decode = self._json_columns.intersection(df.columns)
+        return [
+            {k: (_decode(v) if k in decode else v) for k, v in row.items() if v is not None and v == v}
+            for row in df.to_dict("records")
+        ]
 
     def get_records(self):
-        if isinstance(self.data, dict) and "records" in self.data:
-            return self.data["records"]
-        return []
+        return self.load()
 
-    def _save(self):
-        try:
-            with open(self.file_path, "w") as f:
-                json.dump(self.data, f, indent=2)
-        except Exception:
-            pass
+    def count(self):
+        self._check_open()
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[learning_store] close: {len(self._pending)} unflushed records dropped: {e}")
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+# =====================================================================
+# MODULE-LEVEL STORE (learning_engine, trackers)
+# =====================================================================
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_learning_store() -> LearningStore:
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = LearningStore()
+    return _default_store
+
+
+def add_record(record):
+    return get_learning_store().add_record(record)
+
+
+def load_records(as_dataframe=False, since=None, columns=None, after_id=None):
+    return get_learning_store().load(as_dataframe=as_dataframe, since=since, columns=columns, after_id=after_id)
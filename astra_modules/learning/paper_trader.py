@@ -1,38 +1,100 @@
 """
-paper_trader.py — Phase-90
+paper_trader.py — Phase-100
 
 Simulated trading engine for Astra Intelligence.
 Tracks:
  • Trade entries
  • Exits
- • PnL
+ • PnL (realized + mark-to-market)
  • Outcome labels for NeuralAgent training
  • Storage inside ReplayBuffer
 
+Positions are columns, not dicts:
+ • entry price · size · side · open time · stop · target · expiry ·
+   ticker index live in preallocated NumPy arrays (doubled on demand,
+   closed slots reused) — thousands of concurrent positions, several
+   per ticker
+ • mark_to_market(prices) values every open position from ONE price
+   vector (aligned with self.symbols, or a {ticker: price} mapping)
+ • on_tick(prices) = mark + vectorized stop / target / expiry masks
+   + one batched close-out
+ • a close-out appends one columnar block to the closed log and one
+   add_batch() to the ReplayBuffer
+
 Supports:
- • open_trade()
- • close_trade()
- • get_open_positions()
- • get_closed_positions()
+ • open_trade() / open_trades()
+ • close_trade() / close_positions()
+ • mark_to_market() / on_tick() / auto_close_expired()
+ • get_open_positions() / get_closed_positions() / summary()
 
-Perfect for Phase-90 learning loop.
+All time arguments default to time.time(); pass `now` to simulate.
 """
 
+import threading
 import time
-from datetime import datetime
+
+import numpy as np
+
+
+INITIAL_CAPACITY = 1024
+MAX_CLOSED = 100_000        # closed trades kept in memory (oldest blocks dropped)
+MAX_MINUTES = 120
+
+LONG, SHORT = 1, -1
+
+EXIT_MANUAL = "manual"
+EXIT_STOP = "stop"
+EXIT_TARGET = "target"
+EXIT_EXPIRY = "expiry"
+
+# Position columns: name → (dtype, empty value)
+POSITION_COLUMNS = {
+    "id": (np.int64, 0),
+    "tix": (np.int32, -1),          # index into self.symbols / the price vector
+    "side": (np.int8, 0),
+    "entry": (np.float64, np.nan),
+    "size": (np.float64, 0.0),
+    "open_time": (np.float64, np.nan),
+    "stop": (np.float64, np.nan),   # NaN = none
+    "target": (np.float64, np.nan),
+    "expiry": (np.float64, np.inf),
+    "mark": (np.float64, np.nan),   # last marked price
+    "active": (np.bool_, False),
+}
+
+
+def _side(value):
+    if isinstance(value, str):
+        return SHORT if value.lower() in ("short", "sell") else LONG
+    return SHORT if value is not None and value < 0 else LONG
 
 
 class PaperTrader:
-    def __init__(self, buffer, guardian=None):
+    def __init__(self, buffer, guardian=None, capacity=INITIAL_CAPACITY):
         """
         buffer: ReplayBuffer instance
         guardian: optional GuardianV3 for safe operations
+        capacity: initial position slots (grows as needed)
         """
         self.buffer = buffer
         self.guardian = guardian
 
-        self.open_positions = {}     # {ticker: {...}}
-        self.closed_positions = []   # list of closed trade dicts
+        self.symbols = []           # ticker index → symbol (price-vector order)
+        self._symbol_ids = {}
+        self._lock = threading.RLock()
+
+        self._pos = {}
+        self._contexts = []
+        self._capacity = 0
+        self._high = 0              # slots [0, _high) have been used
+        self._free = []
+        self._next_id = 1
+        self._grow(max(1, int(capacity)))
+
+        self._closed = []           # columnar blocks, oldest first
+        self._n_closed = 0
+        self._closed_total = 0
+        self.realized_pnl = 0.0
 
     # ---------------------------------------------------------------------
     # Safe helper
@@ -47,108 +109,405 @@ class PaperTrader:
             return None
 
     # ---------------------------------------------------------------------
-    # OPEN TRADE
+    # Storage
     # ---------------------------------------------------------------------
-    def open_trade(self, ticker, price, context=None):
+    def _grow(self, capacity):
+        old = self._capacity
+        for name, (dtype, empty) in POSITION_COLUMNS.items():
+            col = np.full(capacity, empty, dtype=dtype)
+            if old:
+                col[:old] = self._pos[name]
+            self._pos[name] = col
+        self._contexts.extend([None] * (capacity - old))
+        self._capacity = capacity
+
+    def _take_slots(self, k):
+        reused = self._free[-k:] if k else []
+        del self._free[len(self._free) - len(reused):]
+        fresh = k - len(reused)
+        if self._high + fresh > self._capacity:
+            self._grow(max(2 * self._capacity, self._high + fresh))
+        slots = np.concatenate([np.asarray(reused, dtype=np.int64),
+                                np.arange(self._high, self._high + fresh, dtype=np.int64)])
+        self._high += fresh
+        return slots
+
+    def _ticker_ids(self, tickers):
+        ids = np.empty(len(tickers), dtype=np.int32)
+        for j, t in enumerate(tickers):
+            i = self._symbol_ids.get(t)
+            if i is None:
+                i = self._symbol_ids[t] = len(self.symbols)
+                self.symbols.append(t)
+            ids[j] = i
+        return ids
+
+    def register_symbols(self, tickers):
+        """Fix the price-vector position of `tickers` up front (e.g. a feed's column order)."""
+        with self._lock:
+            return self._ticker_ids(list(tickers))
+
+    def price_vector(self, prices):
         """
-        Opens a paper trade for a ticker.
-        context = AstraPrime packet or metadata
+        (len(symbols),) float array from a {ticker: price} mapping / Series,
+        or an array already aligned with self.symbols. Missing → NaN.
         """
-        ts = int(time.time())
+        n = len(self.symbols)
+        if hasattr(prices, "keys"):
+            vec = np.full(n, np.nan)
+            for sym, i in self._symbol_ids.items():
+                px = prices.get(sym)
+                if px is not None:
+                    vec[i] = px
+            return vec
+        vec = np.asarray(prices, dtype=np.float64).ravel()
+        if len(vec) < n:
+            vec = np.concatenate([vec, np.full(n - len(vec), np.nan)])
+        return vec[:n]
 
-        trade = {
-            "ticker": ticker,
-            "entry_price": price,
-            "open_time": ts,
-            "context": context or {},
-        }
+    def _active_slots(self):
+        return np.flatnonzero(self._pos["active"][:self._high])
 
-        self.open_positions[ticker] = trade
-        return trade
+    def _slots_of(self, ids):
+        """Slot of each open position id (-1 when not open)."""
+        live = self._active_slots()
+        out = np.full(len(ids), -1, dtype=np.int64)
+        if len(live) == 0:
+            return out
+        live_ids = self._pos["id"][live]
+        order = np.argsort(live_ids)
+        pos = np.minimum(np.searchsorted(live_ids[order], ids), len(live) - 1)
+        hit = live_ids[order][pos] == ids
+        out[hit] = live[order][pos[hit]]
+        return out
 
     # ---------------------------------------------------------------------
-    # CLOSE TRADE
+    # OPEN TRADE
     # ---------------------------------------------------------------------
-    def close_trade(self, ticker, exit_price):
+    def open_trades(self, tickers, prices, sizes=1.0, sides=LONG, stops=None,
+                    targets=None, max_minutes=None, contexts=None, now=None):
+        """
+        Opens len(tickers) positions in one pass. prices / sizes / sides /
+        stops / targets broadcast (stops & targets are price levels, NaN =
+        none); max_minutes sets an expiry. Returns position ids (-1 where
+        the entry price was missing or non-positive).
         """
-        Closes a trade and computes outcome.
-        Also stores sample to ReplayBuffer.
+        tickers = list(tickers)
+        m = len(tickers)
+        now = time.time() if now is None else float(now)
+
+        def col(values, fill):
+            return np.broadcast_to(np.asarray(fill if values is None else values, dtype=np.float64), (m,))
+
+        prices = col(prices, np.nan)
+        ok = np.isfinite(prices) & (prices > 0)
+        ids = np.full(m, -1, dtype=np.int64)
+        if not ok.any():
+            return ids
+
+        if isinstance(sides, (str, int, np.integer)):
+            side = np.full(m, _side(sides), dtype=np.int8)
+        else:
+            side = np.array([_side(s) for s in sides], dtype=np.int8)
+
+        with self._lock:
+            k = int(ok.sum())
+            slots = self._take_slots(k)
+            new_ids = np.arange(self._next_id, self._next_id + k, dtype=np.int64)
+            self._next_id += k
+            ids[ok] = new_ids
+
+            p = self._pos
+            p["id"][slots] = new_ids
+            p["tix"][slots] = self._ticker_ids([t for t, keep in zip(tickers, ok) if keep])
+            p["side"][slots] = side[ok]
+            p["entry"][slots] = prices[ok]
+            p["size"][slots] = col(sizes, 1.0)[ok]
+            p["open_time"][slots] = now
+            p["stop"][slots] = col(stops, np.nan)[ok]
+            p["target"][slots] = col(targets, np.nan)[ok]
+            p["expiry"][slots] = np.inf if max_minutes is None else now + col(max_minutes, np.inf)[ok] * 60
+            p["mark"][slots] = prices[ok]
+            p["active"][slots] = True
+
+            contexts = [None] * m if contexts is None else list(contexts)
+            for slot, ctx in zip(slots.tolist(), (c for c, keep in zip(contexts, ok) if keep)):
+                self._contexts[slot] = ctx or {}
+        return ids
+
+    def open_trade(self, ticker=None, price=None, context=None, *, symbol=None, direction="long",
+                   meta=None, size=1.0, stop=None, target=None, max_minutes=None, now=None):
+        """
+        Opens a paper trade for a ticker.
+        context = AstraPrime packet or metadata (alias: meta)
+        symbol / direction are accepted as aliases (MainAgent call style).
         """
-        if ticker not in self.open_positions:
+        ticker = ticker if ticker is not None else symbol
+        ids = self.open_trades([ticker], price, size, direction, stop, target, max_minutes,
+                               [context if context is not None else meta], now)
+        if ids[0] < 0:
             return None
+        with self._lock:
+            return self._open_record(int(self._slots_of(ids)[0]))
 
-        trade = self.open_positions.pop(ticker)
-        entry = trade["entry_price"]
-        pnl = exit_price - entry
-        label = 1 if pnl > 0 else 0
+    # ---------------------------------------------------------------------
+    # CLOSE TRADE
+    # ---------------------------------------------------------------------
+    def _close(self, slots, exit_prices, reasons, now):
+        """Batched close-out of `slots` → columnar block (also logged + replayed)."""
+        p = self._pos
+        side = p["side"][slots].astype(np.float64)
+        entry = p["entry"][slots]
+        size = p["size"][slots]
+        pnl = side * (exit_prices - entry) * size
 
-        closed = {
-            "ticker": ticker,
-            "entry": entry,
-            "exit": exit_price,
+        contexts = [self._contexts[s] or {} for s in slots.tolist()]
+        block = {
+            "id": p["id"][slots].copy(),
+            "tix": p["tix"][slots].copy(),
+            "side": p["side"][slots].copy(),
+            "entry": entry.copy(),
+            "exit": np.asarray(exit_prices, dtype=np.float64).copy(),
+            "size": size.copy(),
             "pnl": pnl,
-            "label": label,
-            "open_time": trade["open_time"],
-            "close_time": int(time.time()),
-            "context": trade.get("context", {}),
+            "return": side * (exit_prices / entry - 1),
+            "open_time": p["open_time"][slots].copy(),
+            "close_time": np.full(len(slots), now),
+            "reason": np.broadcast_to(np.asarray(reasons, dtype=object), (len(slots),)).copy(),
+            "context": contexts,
         }
 
-        # Store closed trade
-        self.closed_positions.append(closed)
+        # Free the slots
+        for name, (_, empty) in POSITION_COLUMNS.items():
+            p[name][slots] = empty
+        for s in slots.tolist():
+            self._contexts[s] = None
+        self._free.extend(slots.tolist())
+
+        # Closed log (bounded)
+        self._closed.append(block)
+        self._n_closed += len(slots)
+        self._closed_total += len(slots)
+        while len(self._closed) > 1 and self._n_closed - len(self._closed[0]["id"]) >= MAX_CLOSED:
+            self._n_closed -= len(self._closed.pop(0)["id"])
+        self.realized_pnl += float(pnl.sum())
 
-        # ---------------------------------------------------------
-        # Store learning sample in ReplayBuffer
-        # ---------------------------------------------------------
-        packet = trade.get("context", {})
-        vector = packet.get("neural_vector")
+        self._replay(block)
+        return block
 
-        if vector is not None:
-            sample = {
+    def _replay(self, block):
+        """Learning samples for closed trades whose context carries a neural_vector."""
+        rows = [j for j, ctx in enumerate(block["context"]) if ctx.get("neural_vector") is not None]
+        if not rows:
+            return
+        vectors = [block["context"][j]["neural_vector"] for j in rows]
+        predictions = [block["context"][j].get("prediction", 0.0) for j in rows]
+        pnl = block["pnl"][rows]
+
+        if hasattr(self.buffer, "add_batch"):
+            self.safe(self.buffer.add_batch, vectors, predictions, pnl)
+            return
+        for j, vector in zip(rows, vectors):
+            self.safe(self.buffer.push, {
                 "vector": vector,
-                "label": label,
-                "ticker": ticker,
-                "pnl": pnl,
-                "timestamp": trade["open_time"],
-            }
-            self.safe(self.buffer.push, sample)
+                "label": 1 if block["pnl"][j] > 0 else 0,
+                "ticker": self.symbols[block["tix"][j]],
+                "pnl": float(block["pnl"][j]),
+                "timestamp": float(block["open_time"][j]),
+            })
+
+    def close_positions(self, ids, exit_prices, reason=EXIT_MANUAL, now=None):
+        """Closes positions by id at the given prices (broadcast); returns closed trades."""
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        exit_prices = np.broadcast_to(np.asarray(exit_prices, dtype=np.float64), ids.shape)
+        ids, first = np.unique(ids, return_index=True)
+        exit_prices = exit_prices[first]
+        now = time.time() if now is None else float(now)
+        with self._lock:
+            slots = self._slots_of(ids)
+            ok = (slots >= 0) & np.isfinite(exit_prices)
+            if not ok.any():
+                return []
+            block = self._close(slots[ok], exit_prices[ok], reason, now)
+        return self._records(block)
+
+    def close_trade(self, ticker, exit_price, now=None):
+        """
+        Closes the ticker's open position(s) and computes the outcome.
+        Also stores samples to ReplayBuffer. Returns the most recently
+        opened one's closed record.
+        """
+        with self._lock:
+            i = self._symbol_ids.get(ticker)
+            if i is None:
+                return None
+            live = self._active_slots()
+            slots = live[self._pos["tix"][live] == i]
+            if len(slots) == 0:
+                return None
+            now = time.time() if now is None else float(now)
+            block = self._close(slots, np.full(len(slots), float(exit_price)), EXIT_MANUAL, now)
+        return self._records(block)[int(np.argmax(block["id"]))]
+
+    # ---------------------------------------------------------------------
+    # MARK-TO-MARKET / TICKS
+    # ---------------------------------------------------------------------
+    def mark_to_market(self, prices):
+        """
+        Values every open position from one price vector (positions
+        without a price keep their last mark). Returns summary().
+        """
+        with self._lock:
+            vec = self.price_vector(prices)
+            live = self._active_slots()
+            px = vec[self._pos["tix"][live]]
+            ok = np.isfinite(px)
+            self._pos["mark"][live[ok]] = px[ok]
+            return self.summary()
+
+    def on_tick(self, prices, now=None):
+        """
+        One market tick: mark every position, then close (at the tick
+        price) all that hit their stop, target or expiry.
+        Returns {"stop", "target", "expiry"} close counts + summary().
+        """
+        now = time.time() if now is None else float(now)
+        with self._lock:
+            vec = self.price_vector(prices)
+            p = self._pos
+            live = self._active_slots()
+            px = vec[p["tix"][live]]
+            ok = np.isfinite(px)
+            p["mark"][live[ok]] = px[ok]
 
-        return closed
+            long = p["side"][live] > 0
+            stop, target = p["stop"][live], p["target"][live]
+            with np.errstate(invalid="ignore"):
+                hit_stop = ok & np.where(long, px <= stop, px >= stop)
+                hit_target = ok & ~hit_stop & np.where(long, px >= target, px <= target)
+            expired = ok & ~hit_stop & ~hit_target & (now >= p["expiry"][live])
+
+            done = hit_stop | hit_target | expired
+            counts = {"stop": int(hit_stop.sum()), "target": int(hit_target.sum()), "expiry": int(expired.sum())}
+            if done.any():
+                reasons = np.where(hit_stop, EXIT_STOP, np.where(hit_target, EXIT_TARGET, EXIT_EXPIRY))[done]
+                self._close(live[done], px[done], reasons, now)
+            return {**counts, **self.summary()}
 
     # ---------------------------------------------------------------------
     # GETTERS
     # ---------------------------------------------------------------------
+    def _open_record(self, slot):
+        p = self._pos
+        side = int(p["side"][slot])
+        entry, mark, size = float(p["entry"][slot]), float(p["mark"][slot]), float(p["size"][slot])
+        stop, target, expiry = float(p["stop"][slot]), float(p["target"][slot]), float(p["expiry"][slot])
+        return {
+            "id": int(p["id"][slot]),
+            "ticker": self.symbols[p["tix"][slot]],
+            "direction": "long" if side > 0 else "short",
+            "entry_price": entry,
+            "size": size,
+            "open_time": float(p["open_time"][slot]),
+            "stop": None if np.isnan(stop) else stop,
+            "target": None if np.isnan(target) else target,
+            "expiry": None if np.isinf(expiry) else expiry,
+            "mark": mark,
+            "unrealized_pnl": side * (mark - entry) * size,
+            "context": self._contexts[slot],
+        }
+
+    def _records(self, block):
+        out = []
+        for j in range(len(block["id"])):
+            pnl = float(block["pnl"][j])
+            out.append({
+                "id": int(block["id"][j]),
+                "ticker": self.symbols[block["tix"][j]],
+                "direction": "long" if block["side"][j] > 0 else "short",
+                "entry": float(block["entry"][j]),
+                "exit": float(block["exit"][j]),
+                "size": float(block["size"][j]),
+                "pnl": pnl,
+                "return": float(block["return"][j]),
+                "label": 1 if pnl > 0 else 0,
+                "open_time": float(block["open_time"][j]),
+                "close_time": float(block["close_time"][j]),
+                "reason": block["reason"][j],
+                "context": block["context"][j],
+            })
+        return out
+
     def get_open_positions(self):
         """Return list of current open paper trades"""
-        return list(self.open_positions.values())
+        with self._lock:
+            return [self._open_record(s) for s in self._active_slots().tolist()]
+
+    def get_closed_positions(self, limit=None):
+        """Return list of historical completed trades (newest `limit` when given)"""
+        with self._lock:
+            blocks = list(self._closed)
+        out = []
+        for block in reversed(blocks):
+            out[:0] = self._records(block)
+            if limit is not None and len(out) >= limit:
+                return out[-limit:]
+        return out
 
-    def get_closed_positions(self):
-        """Return list of historical completed trades"""
-        return list(self.closed_positions)
+    @property
+    def open_positions(self):
+        """{ticker: latest open trade} (legacy view)."""
+        return {t["ticker"]: t for t in self.get_open_positions()}
+
+    @property
+    def closed_positions(self):
+        return self.get_closed_positions()
+
+    def summary(self):
+        """Open count, exposure, unrealized / realized PnL."""
+        with self._lock:
+            p = self._pos
+            live = self._active_slots()
+            side = p["side"][live]
+            size, mark, entry = p["size"][live], p["mark"][live], p["entry"][live]
+            return {
+                "open": int(len(live)),
+                "closed": int(self._closed_total),
+                "exposure": float(np.abs(size * mark).sum()),
+                "unrealized_pnl": float((side * (mark - entry) * size).sum()),
+                "realized_pnl": float(self.realized_pnl),
+            }
 
     # ---------------------------------------------------------------------
     # UTILITY
     # ---------------------------------------------------------------------
-    def auto_close_expired(self, price_lookup, max_minutes=120):
+    def auto_close_expired(self, price_lookup, max_minutes=MAX_MINUTES, now=None):
         """
-        Optional utility: auto-close any trades older than max_minutes.
-        price_lookup(ticker) must return current price.
-
-        Useful for future Phase-100 auto-trading.
+        Auto-close any trades older than max_minutes.
+        price_lookup: callable ticker → current price (called once per
+        expired ticker, not per position), a {ticker: price} mapping, or
+        a price vector aligned with self.symbols.
         """
-        now = int(time.time())
-        to_close = []
-
-        for ticker, trade in list(self.open_positions.items()):
-            age_min = (now - trade["open_time"]) / 60
-            if age_min >= max_minutes:
-                to_close.append(ticker)
+        now = time.time() if now is None else float(now)
+        with self._lock:
+            p = self._pos
+            live = self._active_slots()
+            expired = live[(now - p["open_time"][live]) / 60 >= max_minutes]
+            if len(expired) == 0:
+                return []
 
-        results = []
-        for t in to_close:
-            px = price_lookup(t)
-            if px:
-                closed = self.close_trade(t, px)
-                if closed:
-                    results.append(closed)
+            if callable(price_lookup):
+                vec = np.full(len(self.symbols), np.nan)
+                for i in np.unique(p["tix"][expired]).tolist():
+                    px = price_lookup(self.symbols[i])
+                    if px:
+                        vec[i] = px
+            else:
+                vec = self.price_vector(price_lookup)
 
-        return results
+            px = vec[p["tix"][expired]]
+            ok = np.isfinite(px) & (px > 0)
+            if not ok.any():
+                return []
+            block = self._close(expired[ok], px[ok], EXIT_EXPIRY, now)
+        return self._records(block)
@@ -4,22 +4,50 @@ Astra 7.0 - Performance & Learning Tracker
 Lightweight event logger so Astra can learn over time.
 
 Stores a rolling history of prediction events in:
-    asra_learning.json   (project root)
+    astra_learning.json   (project root)
 
 Used for:
 - accuracy tracking
 - learning curves
 - future reinforcement logic
+
+Write-behind (Phase-100):
+- events live in an in-process ring buffer (MAX_EVENTS), loaded once
+- the file is rewritten in batches: every FLUSH_EVERY events or
+  FLUSH_INTERVAL seconds (background flusher), and at exit
+- a flush holds an exclusive lock on astra_learning.json.lock, re-reads
+  the file and appends only this process's new events to it, so
+  processes sharing the file never drop each other's events; the file
+  I/O runs outside the buffer lock (readers never wait on it) and a
+  failed write puts the events back in the buffer
+- accuracy counters and cumulative hit counts are maintained per event;
+  accuracy stats are O(1) and learning-curve points are extended by the
+  new outcomes only (rebuilt from the cumulative counts when the window
+  slides), so readers never touch disk
 """
 
+import atexit
 import json
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:     # non-POSIX: in-process locking only
+    fcntl = None
+
 
 MEMORY_FILE = "astra_learning.json"
 MAX_EVENTS = 2000  # cap to avoid unbounded growth
 
+FLUSH_EVERY = 50        # buffered events before a rewrite
+FLUSH_INTERVAL = 5.0    # seconds before buffered events are written anyway
+
 
 # -----------------------------------------------------------
 # Internal helpers
@@ -44,6 +72,8 @@ def _load_memory() -> dict:
     try:
         with path.open("r", encoding="utf-8") as f:
             data = json.load(f)
+        if not isinstance(data, dict):
+            data = {}
         if "events" not in data or not isinstance(data["events"], list):
             data["events"] = []
         return data
@@ -53,12 +83,246 @@ def _load_memory() -> dict:
 
 
 def _save_memory(data: dict) -> None:
+    """Atomic rewrite (tmp file + rename): a crash never leaves half a file. Raises on failure."""
     path = _get_memory_path()
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
     try:
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"[performance_tracker] save failed: {e}")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class _FileLock:
+    """Exclusive flock on <memory file>.lock (no-op without fcntl)."""
+
+    def __enter__(self):
+        self._fh = None
+        if fcntl is not None:
+            self._fh = open(_get_memory_path().with_name(MEMORY_FILE + ".lock"), "a+b")
+            fcntl.flock(self._fh, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fh is not None:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+            self._fh.close()
+
+
+def _is_correct(evt: dict) -> bool:
+    return evt.get("outcome") == evt.get("prediction")
+
+
+# -----------------------------------------------------------
+# In-process event buffer
+# -----------------------------------------------------------
+
+class _EventBuffer:
+    """
+    Rolling event history kept in memory.
+
+    events    — last MAX_EVENTS events (file order)
+    _outcomes — correct/incorrect flag for each retained event that
+                has an outcome, kept in step with `events`
+    _cum      — running hit count up to and including each _outcomes
+                entry (window hits = difference of two entries)
+    _seen     — outcomes appended since the last reset (absolute index
+                of the next one)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()     # one writer per process
+        self._loaded = False
+        self._extra = {}            # other top-level keys of the file, preserved
+        self.events = deque(maxlen=MAX_EVENTS)
+        self._outcomes = deque()
+        self._cum = deque()
+        self._seen = 0
+        self._correct = 0
+        self._pending = 0
+        self._unsaved = []          # events added since the last flush
+        self._first_pending = None
+        self._stats_cache = {}
+        self._curve_cache = {}
+        self._flusher = None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._reset(_load_memory())
+        self._loaded = True
+        atexit.register(self.flush)
+
+    def _reset(self, data):
+        """Replace the retained history with `data` (file contents)."""
+        self.events.clear()
+        self._outcomes.clear()
+        self._cum.clear()
+        self._seen = 0
+        self._correct = 0
+        self._curve_cache.clear()
+        for evt in data.pop("events", []):
+            if isinstance(evt, dict):
+                self._append(evt)
+        self._extra = data
+
+    # ---------------------------------------------------------
+    # WRITE PATH
+    # ---------------------------------------------------------
+    def _append(self, evt):
+        if len(self.events) == self.events.maxlen:
+            old = self.events[0]
+            if old.get("outcome") is not None:
+                self._correct -= self._outcomes.popleft()
+                self._cum.popleft()
+        self.events.append(evt)
+        if evt.get("outcome") is not None:
+            hit = _is_correct(evt)
+            self._outcomes.append(hit)
+            self._cum.append((self._cum[-1] if self._cum else 0) + hit)
+            self._seen += 1
+            self._correct += hit
+        self._stats_cache.clear()
+
+    def add(self, evt):
+        with self._lock:
+            self._ensure_loaded()
+            self._append(evt)
+            self._unsaved.append(evt)
+            self._pending += 1
+            now = time.monotonic()
+            if self._first_pending is None:
+                self._first_pending = now
+            due = (
+                self._pending >= FLUSH_EVERY
+                or now - self._first_pending >= FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+        else:
+            self._start_flusher()
+
+    def flush(self):
+        """
+        Append buffered events to the file (re-read under the file
+        lock, so other processes' events are kept) and pick up theirs.
+        The batch is taken under the buffer lock but written outside
+        it; if the write fails the batch is queued again.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                unsaved, self._unsaved = self._unsaved, []
+                self._pending = 0
+                self._first_pending = None
+
+            try:
+                with _FileLock():
+                    data = _load_memory()
+                    data["events"] = (data["events"] + unsaved)[-MAX_EVENTS:]
+                    _save_memory(data)
+            except Exception as e:
+                with self._lock:
+                    self._unsaved[:0] = unsaved
+                    self._pending += len(unsaved)
+                    self._first_pending = self._first_pending or time.monotonic()
+                print(f"[performance_tracker] save failed, {len(unsaved)} events kept for retry: {e}")
+                return 0
+
+            with self._lock:
+                # Merged file + whatever was added while it was written
+                self._reset(data)
+                for evt in self._unsaved:
+                    self._append(evt)
+        return len(unsaved)
+
+    def _start_flusher(self):
+        """Daemon thread: writes stragglers FLUSH_INTERVAL after they arrive."""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(FLUSH_INTERVAL)
+                with self._lock:
+                    idle = not self._pending
+                if idle:
+                    return
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name="performance-tracker-flush", daemon=True)
+        self._flusher.start()
+
+    # ---------------------------------------------------------
+    # READ PATH (memory only)
+    # ---------------------------------------------------------
+    def _window_start(self, window):
+        """Index into _outcomes of the window's first outcome (window <= 0 → all)."""
+        n = len(self._outcomes)
+        return max(0, n - window) if window > 0 else 0
+
+    def _hits_before(self, start):
+        """Running hit count just before _outcomes[start]."""
+        if start >= len(self._outcomes):
+            return self._cum[-1] if self._cum else 0
+        return self._cum[start] - self._outcomes[start]
+
+    def accuracy_stats(self, window):
+        with self._lock:
+            self._ensure_loaded()
+            cached = self._stats_cache.get(window)
+            if cached is not None:
+                return dict(cached)
+
+            n = len(self._outcomes)
+            start = self._window_start(window)
+            if start == 0:
+                n_with_outcome, correct = n, self._correct
+            else:
+                n_with_outcome = n - start
+                correct = self._cum[-1] - self._hits_before(start)
+
+            stats = {
+                "total": len(self.events),
+                "with_outcome": n_with_outcome,
+                "correct": correct,
+                "accuracy": correct / n_with_outcome if n_with_outcome else None,
+            }
+            self._stats_cache[window] = stats
+            return dict(stats)
+
+    def learning_curve(self, window):
+        """
+        Running accuracy over the window's outcomes. Cached per window
+        with the absolute index of its first outcome: while that stays
+        put only the new outcomes are appended as points; once the
+        window slides the points are rebuilt from the running counts.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            start = self._window_start(window)
+            first = self._seen - (len(self._outcomes) - start)
+            cached = self._curve_cache.get(window)
+            if cached is None or cached[0] != first:
+                cached = (first, [])
+                self._curve_cache[window] = cached
+
+            points = cached[1]
+            base = self._hits_before(start)
+            new = islice(self._cum, start + len(points), None)
+            for i, hits in enumerate(new, start=len(points) + 1):
+                points.append({"index": i, "accuracy": (hits - base) / i})
+            return [dict(p) for p in points]
+
+
+_buffer = _EventBuffer()
 
 
 # -----------------------------------------------------------
@@ -86,11 +350,9 @@ def record_performance(
         e.g. "BUY", "SELL", "HOLD" when you later verify result
         (can be None at first)
 
-    This is intentionally VERY lightweight.
+    This is intentionally VERY lightweight: the event goes into the
+    in-memory buffer; the file is rewritten in batches.
     """
-    data = _load_memory()
-    events = data.get("events", [])
-
     evt = {
         "ts": datetime.utcnow().isoformat(),
         "ticker": str(ticker).upper(),
@@ -100,15 +362,12 @@ def record_performance(
         "outcome": actual_outcome,
         "profit_pct": profit_pct,
     }
+    _buffer.add(evt)
 
-    events.append(evt)
 
-    # keep only last MAX_EVENTS
-    if len(events) > MAX_EVENTS:
-        events = events[-MAX_EVENTS:]
-
-    data["events"] = events
-    _save_memory(data)
+def flush_performance() -> int:
+    """Write buffered events now (returns how many were pending)."""
+    return _buffer.flush()
 
 
 def get_accuracy_stats(window: int = 200) -> dict:
@@ -122,38 +381,7 @@ def get_accuracy_stats(window: int = 200) -> dict:
       "accuracy": float or None
     }
     """
-    data = _load_memory()
-    events = data.get("events", [])
-
-    if not events:
-        return {
-            "total": 0,
-            "with_outcome": 0,
-            "correct": 0,
-            "accuracy": None,
-        }
-
-    # last `window` events that actually have an outcome
-    with_outcome = [e for e in events if e.get("outcome") is not None][-window:]
-    n_with_outcome = len(with_outcome)
-
-    if n_with_outcome == 0:
-        return {
-            "total": len(events),
-            "with_outcome": 0,
-            "correct": 0,
-            "accuracy": None,
-        }
-
-    correct = sum(1 for e in with_outcome if e.get("outcome") == e.get("prediction"))
-    accuracy = correct / n_with_outcome if n_with_outcome else None
-
-    return {
-        "total": len(events),
-        "with_outcome": n_with_outcome,
-        "correct": correct,
-        "accuracy": accuracy,
-    }
+    return _buffer.accuracy_stats(window)
 
 
 def get_learning_curve_points(window: int = 200) -> list[dict]:
@@ -167,22 +395,4 @@ def get_learning_curve_points(window: int = 200) -> list[dict]:
           ...
         ]
     """
-    data = _load_memory()
-    events = [e for e in data.get("events", []) if e.get("outcome") is not None]
-
-    if not events:
-        return []
-
-    events = events[-window:]
-    points = []
-    correct = 0
-
-    for i, e in enumerate(events, start=1):
-        if e.get("outcome") == e.get("prediction"):
-            correct += 1
-        points.append({
-            "index": i,
-            "accuracy": correct / i
-        })
-
-    return points
+    return _buffer.learning_curve(window)
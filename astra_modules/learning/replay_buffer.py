@@ -1,73 +1,549 @@
 """
-replay_buffer.py — Phase-90 Upgrade
+replay_buffer.py — Phase-100 Upgrade
 Stores structured learning experiences for Astra’s hybrid learning loop:
 (state → prediction → outcome)
-Safe, stable, and fully compatible with ContinualTrainer + NeuralAgent.
+
+ • preallocated NumPy ring buffer: fixed-width float32 feature matrix
+   plus label / prediction / outcome columns — add() is one row write,
+   add_batch() one locked block write
+ • uniform sampling is one vectorized index draw
+ • optional prioritized mode: sum-tree over priorities, stratified
+   sampling + importance weights, batched priority updates
+ • sample() returns a ReplayBatch of contiguous arrays (torch.from_numpy
+   ready) — no per-sample Python objects
+
+Persistence (path=...):
+ • the columns live in one memory-mapped file behind a small header
+   (magic · version · feature_dim · capacity · write count · column
+   layout), so a restarted process reattaches instantly and reads are
+   zero-copy views of the page cache
+ • appends and reads from several processes (remote trainer, scan
+   service) are serialized with flock on a sidecar .lock file; the
+   write count lives in the header, so every process sees new rows
+ • prioritized sampling rebuilds its sum tree from the mapped priority
+   column, so priority updates made by another process are honoured
+ • open_replay_buffer() → shared file astra_replay/replay_buffer.bin
+
+Unknown outcomes (trade still open) are stored as NaN; labels follow
+outcome > 0 once known.
 """
 
-from collections import deque
-import random
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:     # non-POSIX: in-process locking only
+    fcntl = None
+
+
+DEFAULT_CAPACITY = 5000
+DEFAULT_FEATURES = 8        # width used when the first state has no vector
+
+PRIORITY_ALPHA = 0.6
+PRIORITY_BETA = 0.4
+PRIORITY_EPS = 1e-3
+
+REPLAY_FILE = "astra_replay/replay_buffer.bin"
+
+# Header: magic · version · feature_dim · capacity · write count, then the JSON column layout
+MAGIC = b"ASTRARB\x00"
+VERSION = 1
+HEADER_SIZE = 512
+_HEADER = struct.Struct("<8sIIQQ")
+_COUNT_OFFSET = 24
+_ALIGN = 64
+
+COLUMNS = (
+    ("features", "<f4"),        # (capacity, feature_dim)
+    ("labels", "<f4"),
+    ("predictions", "<f4"),
+    ("outcomes", "<f4"),
+    ("priorities", "<f8"),
+)
+
+
+def _get_replay_path() -> Path:
+    """Shared memory-mapped buffer file, astra_replay/replay_buffer.bin."""
+    return Path(__file__).resolve().parents[2] / REPLAY_FILE
+
+
+def _layout(capacity, feature_dim):
+    """[(name, dtype, shape, offset)] and total file size."""
+    out, offset = [], HEADER_SIZE
+    for name, dtype in COLUMNS:
+        shape = (capacity, feature_dim) if name == "features" else (capacity,)
+        out.append((name, dtype, shape, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset = -(-offset // _ALIGN) * _ALIGN
+    return out, offset
+
+
+class ReplayBatch(NamedTuple):
+    features: np.ndarray        # (n, feature_dim) float32
+    labels: np.ndarray          # (n,) float32, NaN = no outcome yet
+    predictions: np.ndarray     # (n,) float32
+    outcomes: np.ndarray        # (n,) float32, NaN = no outcome yet
+    indices: np.ndarray         # (n,) int64 buffer slots (update_priorities / set_outcome)
+    weights: np.ndarray         # (n,) float32 importance weights (1.0 when uniform)
+
+    @property
+    def size(self):
+        return len(self.indices)
+
+    def labelled(self):
+        """Rows with a known outcome."""
+        keep = ~np.isnan(self.outcomes)
+        return ReplayBatch(*(a[keep] for a in self))
+
 
+def _empty_batch(feature_dim):
+    f = np.empty(0, dtype=np.float32)
+    return ReplayBatch(np.empty((0, feature_dim), dtype=np.float32), f, f, f,
+                       np.empty(0, dtype=np.int64), f)
 
+
+# ==================================================================
+# SUM TREE (prioritized mode)
+# ==================================================================
+class SumTree:
+    """
+    Binary sum tree in one array: leaves at [cap, 2·cap), node i holds
+    tree[2i] + tree[2i+1], tree[1] is the total. Updates and prefix-sum
+    lookups are vectorized across a whole batch, one level per step.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = 1 << max(0, int(capacity) - 1).bit_length()
+        self.depth = self.capacity.bit_length() - 1
+        self.tree = np.zeros(2 * self.capacity, dtype=np.float64)
+
+    @property
+    def total(self):
+        return float(self.tree[1])
+
+    def leaves(self, idx):
+        return self.tree[np.asarray(idx) + self.capacity]
+
+    def build(self, values):
+        """Replace every leaf with `values` (zero beyond) and recompute the tree level by level."""
+        self.tree[:] = 0.0
+        self.tree[self.capacity:self.capacity + len(values)] = values
+        size = self.capacity
+        while size > 1:
+            half = size // 2
+            self.tree[half:size] = self.tree[size:2 * size:2] + self.tree[size + 1:2 * size:2]
+            size = half
+
+    def update(self, idx, values):
+        pos = np.asarray(idx, dtype=np.int64) + self.capacity
+        self.tree[pos] = values
+        for _ in range(self.depth):
+            pos = np.unique(pos >> 1)
+            self.tree[pos] = self.tree[2 * pos] + self.tree[2 * pos + 1]
+
+    def find(self, values):
+        """Leaf index whose prefix-sum interval contains each value."""
+        values = np.array(values, dtype=np.float64)
+        pos = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = self.tree[2 * pos]
+            right = values > left
+            values = np.where(right, values - left, values)
+            pos = 2 * pos + right
+        return pos - self.capacity
+
+
+# ==================================================================
+# REPLAY BUFFER
+# ==================================================================
 class ReplayBuffer:
-    def __init__(self, capacity: int = 5000):
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, feature_dim: int = None,
+                 prioritized: bool = False, alpha: float = PRIORITY_ALPHA,
+                 beta: float = PRIORITY_BETA, seed=None, path=None):
         """
         capacity: maximum stored experiences.
-        Oldest entries are automatically discarded.
+        Oldest entries are automatically overwritten.
+
+        feature_dim: vector width; inferred from the first added state
+        when None. Shorter vectors are zero-padded, longer truncated.
+
+        path: memory-mapped backing file (created or reattached);
+        capacity / feature_dim of an existing file win.
         """
-        self.buffer = deque(maxlen=capacity)
+        self.capacity = max(1, int(capacity))
+        self.feature_dim = feature_dim
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.path = Path(path) if path else None
+
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(seed)
+        self._mm = None
+        self._lockfile = None
+        self._count = np.zeros(1, dtype=np.uint64)     # header view when mapped
+        self.features = self.labels = self.predictions = self.outcomes = self.priorities = None
+
+        self._tree = None
+        self._tree_count = 0
+        self._max_priority = 1.0
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if fcntl is not None:
+                self._lockfile = open(self.path.with_name(self.path.name + ".lock"), "a+b")
+            with self._locked():
+                if self._valid_file():
+                    self._attach()
+                elif feature_dim is not None:
+                    self._allocate(feature_dim)
+        elif feature_dim is not None:
+            self._allocate(feature_dim)
+
+    # ==================================================================
+    # STORAGE
+    # ==================================================================
+    @contextmanager
+    def _locked(self, shared=False):
+        """Thread lock, plus flock across processes when file-backed."""
+        with self._lock:
+            if self._lockfile is None:
+                yield
+                return
+            fcntl.flock(self._lockfile, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lockfile, fcntl.LOCK_UN)
+
+    def _valid_file(self):
+        try:
+            with self.path.open("rb") as f:
+                head = f.read(HEADER_SIZE)
+            magic, version, dim, cap, _ = _HEADER.unpack_from(head)
+            layout = json.loads(head[_HEADER.size:].rstrip(b"\x00"))
+        except Exception:
+            return False
+        _, size = _layout(cap, dim)
+        return (
+            magic == MAGIC
+            and version == VERSION
+            and layout == [[n, d] for n, d in COLUMNS]
+            and self.path.stat().st_size >= size
+        )
+
+    def _map(self, capacity, feature_dim):
+        """Column arrays as zero-copy views of the mapped file."""
+        self.capacity, self.feature_dim = int(capacity), int(feature_dim)
+        layout, size = _layout(self.capacity, self.feature_dim)
+        with self.path.open("r+b") as f:
+            self._mm = mmap.mmap(f.fileno(), size)
+        for name, dtype, shape, offset in layout:
+            setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=self._mm, offset=offset))
+        self._count = np.ndarray((1,), dtype="<u8", buffer=self._mm, offset=_COUNT_OFFSET)
+
+    def _attach(self):
+        with self.path.open("rb") as f:
+            _, _, dim, cap, _ = _HEADER.unpack(f.read(_HEADER.size))
+        self._map(cap, dim)
+        n = self._size
+        if n:
+            self._max_priority = max(1.0, float(self.priorities[:n].max()))
+
+    def _allocate(self, feature_dim):
+        if self.path is None:
+            self.feature_dim = int(feature_dim)
+            self.features = np.zeros((self.capacity, self.feature_dim), dtype=np.float32)
+            self.labels = np.full(self.capacity, np.nan, dtype=np.float32)
+            self.predictions = np.zeros(self.capacity, dtype=np.float32)
+            self.outcomes = np.full(self.capacity, np.nan, dtype=np.float32)
+            self.priorities = np.zeros(self.capacity, dtype=np.float64)
+            return
+
+        # New file: size it, map it, initialise columns, then write the header
+        _, size = _layout(self.capacity, int(feature_dim))
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("wb") as f:
+            f.truncate(size)
+        os.replace(tmp, self.path)
+        self._map(self.capacity, feature_dim)
+        self.labels.fill(np.nan)
+        self.outcomes.fill(np.nan)
+        layout = json.dumps([[n, d] for n, d in COLUMNS]).encode()
+        self._mm[:_HEADER.size + len(layout)] = (
+            _HEADER.pack(MAGIC, VERSION, self.feature_dim, self.capacity, 0) + layout
+        )
+        self._mm.flush()
+
+    def _reattach(self):
+        """Pick up a file another process created after this one started."""
+        if self.features is None and self.path is not None and self._valid_file():
+            self._attach()
+
+    @property
+    def _size(self):
+        return min(int(self._count[0]), self.capacity)
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+            if self._lockfile is not None:
+                self._lockfile.close()
+                self._lockfile = None
+
+    @staticmethod
+    def _vector(state):
+        if isinstance(state, dict):
+            state = state.get("features", state.get("neural_vector"))
+        if state is None:
+            return None
+        return np.asarray(state, dtype=np.float32).ravel()
 
     # ==================================================================
     # ADD EXPERIENCE
     # ==================================================================
     def add(self, state, prediction, outcome):
         """
-        Stores one complete learning sample.
+        Stores one complete learning sample; returns its buffer slot.
 
         Expected structure:
-            state = { "features": [...] }
+            state = { "features": [...] }   (or "neural_vector", or the vector itself)
             prediction = float
-            outcome = float  (PnL or reward)
+            outcome = float  (PnL or reward; None while the trade is open)
         """
+        try:
+            vec = self._vector(state)
+            with self._locked():
+                self._reattach()
+                if self.features is None:
+                    self._allocate(len(vec) if vec is not None and len(vec) else DEFAULT_FEATURES)
+
+                count = int(self._count[0])
+                i = count % self.capacity
+                row = self.features[i]
+                row[:] = 0.0
+                if vec is not None:
+                    n = min(len(vec), self.feature_dim)
+                    row[:n] = vec[:n]
 
+                self.predictions[i] = float(prediction) if prediction is not None else np.nan
+                self._set_outcome(i, outcome)
+                self.priorities[i] = self._max_priority
+                self._count[0] = count + 1
+                return i
+
+        except Exception as e:
+            print(f"[ReplayBuffer] Error adding experience: {e}")
+            return None
+
+    def add_batch(self, states, predictions, outcomes):
+        """
+        Stores M samples in one locked write; returns their buffer slots.
+
+        states: (M, D) array or sequence of vectors (ragged rows are
+        zero-padded / truncated like add()); predictions / outcomes:
+        length-M sequences (NaN outcome = still open).
+        """
         try:
-            # Ensure state exists
-            safe_state = state.copy() if isinstance(state, dict) else {}
+            rows = [self._vector(s) for s in states]
+            m = len(rows)
+            if m == 0:
+                return np.empty(0, dtype=np.int64)
+            predictions = np.nan_to_num(np.asarray(predictions, dtype=np.float32).reshape(m))
+            outcomes = np.asarray(outcomes, dtype=np.float32).reshape(m)
 
-            # Guarantee standardized feature vector
-            if "features" not in safe_state:
-                safe_state["features"] = [0.0] * 8
+            with self._locked():
+                self._reattach()
+                if self.features is None:
+                    first = rows[0]
+                    self._allocate(len(first) if first is not None and len(first) else DEFAULT_FEATURES)
 
-            exp = {
-                "state": safe_state,
-                "prediction": float(prediction),
-                "outcome": float(outcome)
-            }
+                block = np.zeros((m, self.feature_dim), dtype=np.float32)
+                for j, vec in enumerate(rows):
+                    if vec is not None:
+                        n = min(len(vec), self.feature_dim)
+                        block[j, :n] = vec[:n]
 
-            self.buffer.append(exp)
+                # More rows than capacity: only the newest `capacity` survive
+                keep = slice(max(0, m - self.capacity), m)
+                count = int(self._count[0])
+                idx = (count + np.arange(m, dtype=np.int64)[keep]) % self.capacity
+                self.features[idx] = block[keep]
+                self.predictions[idx] = predictions[keep]
+                self.outcomes[idx] = outcomes[keep]
+                self.labels[idx] = np.where(np.isnan(outcomes[keep]), np.nan, (outcomes[keep] > 0).astype(np.float32))
+                self.priorities[idx] = self._max_priority
+                self._count[0] = count + m
+                return idx
 
         except Exception as e:
-            print(f"[ReplayBuffer] Error adding experience: {e}")
+            print(f"[ReplayBuffer] Error adding batch: {e}")
+            return None
+
+    def push(self, sample: dict):
+        """PaperTrader format: {"vector", "label", "pnl", ...}."""
+        outcome = sample.get("pnl")
+        if outcome is None and sample.get("label") is not None:
+            outcome = 1.0 if sample["label"] else -1.0
+        return self.add(sample.get("vector"), sample.get("prediction", 0.0), outcome)
+
+    def _set_outcome(self, i, outcome):
+        if outcome is None or np.isnan(outcome):
+            self.outcomes[i] = np.nan
+            self.labels[i] = np.nan
+        else:
+            self.outcomes[i] = float(outcome)
+            self.labels[i] = 1.0 if outcome > 0 else 0.0
+
+    def set_outcome(self, index, outcome):
+        """Fill in the outcome of a stored experience (e.g. when its trade closes)."""
+        with self._locked():
+            self._set_outcome(index, outcome)
 
     # ==================================================================
     # SAMPLE BATCH
     # ==================================================================
-    def sample(self, batch_size: int = 64):
+    def _gather(self, idx, weights):
+        return ReplayBatch(
+            self.features[idx],
+            self.labels[idx],
+            self.predictions[idx],
+            self.outcomes[idx],
+            idx,
+            weights,
+        )
+
+    def _sync_tree(self):
+        """
+        Bring the sum tree up to date with the priority column.
+
+        In memory only this process writes, so rows appended since the
+        last sample are enough. File-backed, other processes may have
+        appended rows or rewritten priorities (update_priorities), so
+        the tree is rebuilt from the mapped column — one vectorized
+        pass over `capacity` leaves.
         """
-        Randomly samples training data.
+        count = int(self._count[0])
+        if self._tree is None:
+            self._tree = SumTree(self.capacity)
+            self._tree_count = 0
+        if self.path is not None:
+            n = self._size
+            self._tree.build(self.priorities[:n])
+            if n:
+                self._max_priority = max(self._max_priority, float(self.priorities[:n].max()))
+            self._tree_count = count
+            return
+        if count < self._tree_count or count - self._tree_count >= self.capacity:
+            self._tree = SumTree(self.capacity)
+            slots = np.arange(self._size)
+        else:
+            slots = np.arange(self._tree_count, count) % self.capacity
+        if len(slots):
+            self._tree.update(slots, self.priorities[slots])
+        self._tree_count = count
 
-        If buffer is smaller than batch size,
-        return everything (safe fallback).
+    def sample(self, batch_size: int = 64) -> ReplayBatch:
+        """
+        Samples training data as contiguous arrays.
+
+        Uniform: without replacement; if the buffer is smaller than the
+        batch size, everything is returned (safe fallback).
+        Prioritized: stratified over the sum tree, with importance weights.
         """
         try:
-            if len(self.buffer) == 0:
-                return []
+            with self._locked(shared=not self.prioritized):
+                self._reattach()
+                n = self._size
+                if n == 0 or self.features is None:
+                    return _empty_batch(self.feature_dim or DEFAULT_FEATURES)
 
-            if len(self.buffer) <= batch_size:
-                return list(self.buffer)
+                k = min(int(batch_size), n)
+                if not self.prioritized:
+                    idx = np.arange(n) if n <= batch_size else self._rng.choice(n, k, replace=False)
+                    return self._gather(idx, np.ones(len(idx), dtype=np.float32))
 
-            return random.sample(self.buffer, batch_size)
+                self._sync_tree()
+                total = self._tree.total
+                targets = (np.arange(k) + self._rng.random(k)) * (total / k)
+                idx = np.minimum(self._tree.find(targets), n - 1)
+                probs = self._tree.leaves(idx) / total
+                weights = (n * np.maximum(probs, 1e-12)) ** -self.beta
+                weights /= weights.max()
+                return self._gather(idx, weights.astype(np.float32))
 
         except Exception as e:
             print(f"[ReplayBuffer] Error during sampling: {e}")
-            return []
+            return _empty_batch(self.feature_dim or DEFAULT_FEATURES)
+
+    def snapshot(self) -> ReplayBatch:
+        """
+        Every stored row as one batch (for epoch training), in slot order.
+
+        Slots [0, n) are always the filled ones (the ring only wraps once
+        it is full), so the columns are slice views of the buffer — no
+        copy. They alias live storage: copy before holding them across
+        later add() calls.
+        """
+        with self._locked(shared=True):
+            self._reattach()
+            n = self._size
+            if n == 0 or self.features is None:
+                return _empty_batch(self.feature_dim or DEFAULT_FEATURES)
+            return ReplayBatch(
+                self.features[:n],
+                self.labels[:n],
+                self.predictions[:n],
+                self.outcomes[:n],
+                np.arange(n, dtype=np.int64),
+                np.ones(n, dtype=np.float32),
+            )
+
+    def update_priorities(self, indices, errors):
+        """Prioritized mode: new priority = (|error| + eps) ** alpha per slot."""
+        if not self.prioritized or self.features is None:
+            return
+        indices = np.asarray(indices, dtype=np.int64)
+        prio = (np.abs(np.asarray(errors, dtype=np.float64)) + PRIORITY_EPS) ** self.alpha
+        with self._locked():
+            self._sync_tree()
+            self.priorities[indices] = prio
+            self._tree.update(indices, prio)
+            self._max_priority = max(self._max_priority, float(prio.max(initial=0.0)))
+
+    # ==================================================================
+    # INSPECTION
+    # ==================================================================
+    def size(self):
+        if self.features is None and self.path is not None:
+            with self._locked(shared=True):
+                self._reattach()
+        return self._size
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        with self._locked():
+            self._count[0] = 0
+            if self.features is not None:
+                self.labels.fill(np.nan)
+                self.outcomes.fill(np.nan)
+            self._tree = None
+            self._tree_count = 0
+            self._max_priority = 1.0
+
+
+def open_replay_buffer(path=None, **kwargs) -> ReplayBuffer:
+    """File-backed buffer (default: the shared astra_replay/replay_buffer.bin)."""
+    return ReplayBuffer(path=path or _get_replay_path(), **kwargs)
@@ -1,33 +1,54 @@
 """
-scheduler.py — Phase-90
+scheduler.py — Phase-100
 
 Background training scheduler for Astra Intelligence.
 Supports:
- • timed training loops (every X minutes)
+ • timed training (IntervalTrigger, every interval_minutes)
  • condition-based training (buffer size threshold)
- • daily training routines
+ • daily full retraining (CronTrigger, midnight UTC)
 
-Used by Learning Center + background agent.
+start() registers both on a JobScheduler (system/job_scheduler), so
+nothing has to poll run_if_due(): training runs on the scheduler's
+worker pool, never overlaps itself, and a midnight run missed while
+the process was down is caught up on the next start.
+
+run_if_due() / force_train() / run_daily() remain for manual use
+(Learning Center buttons).
 """
 
-import time
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, time as dtime
+
+from astra_modules.system.job_scheduler import JobScheduler, IntervalTrigger, CronTrigger
+
+
+DAILY_CRON = "0 0 * * *"      # midnight UTC
+INTERVAL_JITTER = 30          # seconds
+DAILY_JITTER = 120
 
 
 class LearningScheduler:
-    def __init__(self, trainer, buffer, guardian=None):
+    def __init__(self, trainer, buffer, guardian=None, scheduler=None,
+                 interval_minutes=30, min_buffer_samples=50, daily_cron=DAILY_CRON):
         """
-        trainer: ContinualTrainer instance
-        buffer: ReplayBuffer instance
-        guardian: optional GuardianV3 for safety
+        trainer:   ContinualTrainer instance
+        buffer:    ReplayBuffer instance
+        guardian:  optional GuardianV3 for safety
+        scheduler: optional shared JobScheduler (start() creates one otherwise)
         """
         self.trainer = trainer
         self.buffer = buffer
         self.guardian = guardian
+        self.scheduler = scheduler
+        self._owns_scheduler = False
 
         self.last_train_time = None
-        self.interval_minutes = 30     # default every 30 minutes
-        self.min_buffer_samples = 50   # minimum samples required
+        self.last_daily_time = None
+        self.interval_minutes = interval_minutes       # default every 30 minutes
+        self.min_buffer_samples = min_buffer_samples   # minimum samples required
+        self.daily_cron = daily_cron
+
+        self._train_lock = threading.Lock()
 
     # -------------------------------------------------------------
     # SAFE WRAPPER
@@ -43,44 +64,57 @@ class LearningScheduler:
     # -------------------------------------------------------------
     # CORE SCHEDULE CHECKER
     # -------------------------------------------------------------
+    def has_samples(self):
+        size = self.safe(self.buffer.size) or 0
+        return size >= self.min_buffer_samples
+
     def should_train(self):
         """
         Returns True if:
          • enough buffer samples exist
          • it's been interval_minutes since last run
         """
-        size = self.safe(self.buffer.size) or 0
-        if size < self.min_buffer_samples:
+        if not self.has_samples():
             return False
 
-        now = datetime.utcnow()
-
         if self.last_train_time is None:
             return True
 
-        delta = now - self.last_train_time
-        if delta >= timedelta(minutes=self.interval_minutes):
-            return True
-
-        return False
+        delta = datetime.utcnow() - self.last_train_time
+        return delta.total_seconds() >= self.interval_minutes * 60
 
     # -------------------------------------------------------------
     # TRAINING EXECUTOR
     # -------------------------------------------------------------
+    def _train(self, reason):
+        """One train_step; concurrent callers get trained=False instead of a second run."""
+        if not self._train_lock.acquire(blocking=False):
+            return {"trained": False, "reason": "Training already running"}
+        try:
+            out = self.safe(self.trainer.train_step)
+            self.last_train_time = datetime.utcnow()
+        finally:
+            self._train_lock.release()
+
+        return {
+            "trained": bool(out),
+            "timestamp": str(self.last_train_time),
+            "reason": reason,
+        }
+
     def run_if_due(self):
         """
         Run training ONLY if the system decides it's time.
         """
         if not self.should_train():
             return {"trained": False, "reason": "Not due or insufficient samples"}
+        return self._train("Due")
 
-        out = self.safe(self.trainer.train_step)
-        self.last_train_time = datetime.utcnow()
-
-        return {
-            "trained": bool(out),
-            "timestamp": str(self.last_train_time),
-        }
+    def run_scheduled(self):
+        """Interval job: the trigger already decided it's time, only check samples."""
+        if not self.has_samples():
+            return {"trained": False, "reason": "Insufficient samples"}
+        return self._train("Scheduled")
 
     # -------------------------------------------------------------
     # FORCE TRAINING
@@ -89,26 +123,65 @@ class LearningScheduler:
         """
         Manual / emergency “train now”.
         """
-        out = self.safe(self.trainer.train_step)
-        self.last_train_time = datetime.utcnow()
-
-        return {
-            "trained": bool(out),
-            "timestamp": str(self.last_train_time),
-            "reason": "Manual"
-        }
+        return self._train("Manual")
 
     # -------------------------------------------------------------
-    # DAILY SCHEDULE (RUN AT MIDNIGHT UTC)
+    # DAILY RETRAINING (MIDNIGHT UTC)
     # -------------------------------------------------------------
+    def daily_train(self):
+        out = self._train("Daily")
+        if out["trained"]:
+            self.last_daily_time = datetime.utcnow()
+        return out
+
     def run_daily(self):
         """
-        Use in future daemon:
-         • At midnight UTC each day
-         • Perform full retraining
+        Run the daily retraining if it hasn't run since the last
+        midnight UTC — any time of day, not only in a 00:00 window.
         """
-        now = datetime.utcnow()
-        if now.hour == 0 and now.minute < 5:
-            return self.force_train()
+        midnight = datetime.combine(datetime.utcnow().date(), dtime(0, 0))
+        if self.last_daily_time is not None and self.last_daily_time >= midnight:
+            return {"trained": False, "reason": "Already trained today"}
+        return self.daily_train()
 
-        return {"trained": False, "reason": "Not daily window"}
+    # -------------------------------------------------------------
+    # JOB SCHEDULER
+    # -------------------------------------------------------------
+    def register(self, scheduler):
+        """Add the interval + daily training jobs to `scheduler`."""
+        seconds = self.interval_minutes * 60
+        scheduler.add_job(
+            "learning.interval", self.run_scheduled,
+            IntervalTrigger(seconds), jitter=min(INTERVAL_JITTER, seconds / 10),
+        )
+        scheduler.add_job(
+            "learning.daily", self.daily_train,
+            CronTrigger(self.daily_cron), jitter=DAILY_JITTER, catch_up="coalesce",
+        )
+        self.scheduler = scheduler
+        return scheduler
+
+    def start(self):
+        """Schedule training in the background (creates a JobScheduler if none was given)."""
+        if self.scheduler is None:
+            self.scheduler = JobScheduler()
+            self._owns_scheduler = True
+        self.register(self.scheduler)
+        if not self.scheduler.is_running():
+            self.scheduler.start()
+        return self
+
+    def stop(self):
+        if self.scheduler is None:
+            return
+        if self._owns_scheduler:
+            self.scheduler.stop()
+        else:
+            self.scheduler.remove_job("learning.interval")
+            self.scheduler.remove_job("learning.daily")
+
+    def report(self):
+        """Job stats (runs, misses, durations) for the training jobs."""
+        if self.scheduler is None:
+            return {}
+        return {k: v for k, v in self.scheduler.report().items() if k.startswith("learning.")}
@@ -11,6 +11,8 @@
 import random
 import datetime
 
+from astra_modules.core.symbol_index import get_symbol_index
+
 
 # ===============================================================
 # 1. BASE UNIVERSES — these are NOT fixed, they are *starting pools*
@@ -83,8 +85,9 @@ def get_screener_list():
     selected_momo = rotate_list(MOMENTUM_LIST, 20)
     selected_crypto = rotate_list(CRYPTO_POOL, 20)
 
+    index = get_symbol_index()
     tickers = list(set(selected_large + selected_mid + selected_momo))
-    cryptos = list(set(selected_crypto))
+    cryptos = list({index.canonical(c) for c in selected_crypto})
 
     return {
         "stocks": tickers,
@@ -0,0 +1,211 @@
+"""
+prefilter.py — Phase-100
+Stage-1 screener: cheap, vectorized gates before the full agent pipeline.
+
+Works from a small per-ticker table of cached columns:
+    last_close · dollar_volume (20-day avg) · volatility (20-day std)
+    roc_5 · roc_20
+seeded from astra_cache/*.parquet and refreshed by ScanManager after
+every fetch. All gates and the momentum score run as array ops across
+the whole universe; only the top fraction (or as many tickers as the
+time budget allows) go on to fetch → features → agents.
+
+Rows older than ROW_TTL are stale: the ticker is passed through like
+an unknown one, so a ticker that once failed a gate is re-fetched and
+re-evaluated instead of being filtered out forever.
+"""
+
+import math
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from astra_modules.core.symbol_index import get_symbol_index
+
+
+CACHE_DIR = "astra_cache"
+
+COLUMNS = ["last_close", "dollar_volume", "volatility", "roc_5", "roc_20", "updated"]
+
+# Default gates
+MIN_PRICE = 2.0
+MIN_DOLLAR_VOLUME = 5_000_000
+MAX_VOLATILITY = 0.10
+KEEP_FRACTION = 0.30
+MIN_KEEP = 10
+ROW_TTL = 24 * 3600      # seconds before a cached row is re-evaluated
+
+# Trailing bars needed for every cached column
+LOOKBACK = 21
+
+
+def _get_cache_dir() -> Path:
+    """Parquet OHLCV cache the prefilter screens from (astra_cache/)."""
+    return Path(__file__).resolve().parents[2] / CACHE_DIR
+
+
+def _key(ticker) -> str:
+    """Canonical symbol, so astra_cache/BTCUSD.parquet and BTC-USD share a row."""
+    return get_symbol_index().canonical(ticker)
+
+
+def summarize_ohlcv(df):
+    """
+    One cached row from an OHLCV frame (any column case).
+    Returns dict or None if the frame is unusable.
+    """
+    try:
+        cols = {c.lower(): c for c in df.columns}
+        close = df[cols["close"]].astype(float).to_numpy()[-LOOKBACK:]
+        volume = df[cols["volume"]].astype(float).to_numpy()[-LOOKBACK:] if "volume" in cols else None
+    except Exception:
+        return None
+
+    if close.size < 6 or not np.isfinite(close[-1]) or close[-1] <= 0:
+        return None
+
+    rets = np.diff(close) / close[:-1]
+    dollar_volume = float(np.nanmean(close * volume)) if volume is not None else np.nan
+
+    return {
+        "last_close": float(close[-1]),
+        "dollar_volume": dollar_volume,
+        "volatility": float(np.nanstd(rets[-20:])) if rets.size else np.nan,
+        "roc_5": float(close[-1] / close[-6] - 1),
+        "roc_20": float(close[-1] / close[0] - 1),
+    }
+
+
+class Prefilter:
+    def __init__(self, cache_dir=None, min_price=MIN_PRICE, min_dollar_volume=MIN_DOLLAR_VOLUME,
+                 max_volatility=MAX_VOLATILITY, keep_fraction=KEEP_FRACTION, min_keep=MIN_KEEP,
+                 row_ttl=ROW_TTL):
+        self.cache_dir = Path(cache_dir) if cache_dir else _get_cache_dir()
+        self.min_price = min_price
+        self.min_dollar_volume = min_dollar_volume
+        self.max_volatility = max_volatility
+        self.keep_fraction = keep_fraction
+        self.min_keep = min_keep
+        self.row_ttl = row_ttl
+
+        self._lock = threading.Lock()
+        self._rows = {}          # ticker -> dict of COLUMNS
+        self._table = None       # cached DataFrame view of _rows
+        self._seeded = False
+
+    # ---------------------------------------------------------
+    # CACHED COLUMNS
+    # ---------------------------------------------------------
+    def seed_from_cache(self):
+        """Load the cached columns for every astra_cache/*.parquet once."""
+        if self._seeded:
+            return
+        self._seeded = True
+
+        if not self.cache_dir.exists():
+            return
+
+        for path in self.cache_dir.glob("*.parquet"):
+            try:
+                row = summarize_ohlcv(pd.read_parquet(path))
+            except Exception:
+                row = None
+            if row:
+                row["updated"] = path.stat().st_mtime
+                with self._lock:
+                    self._rows.setdefault(_key(path.stem), row)
+                    self._table = None
+
+    def observe(self, ticker, df):
+        """Refresh a ticker's cached row from freshly fetched data."""
+        row = summarize_ohlcv(df)
+        if not row:
+            return
+        row["updated"] = pd.Timestamp.utcnow().timestamp()
+        with self._lock:
+            self._rows[_key(ticker)] = row
+            self._table = None
+
+    def table(self):
+        with self._lock:
+            if self._table is None:
+                self._table = pd.DataFrame.from_dict(self._rows, orient="index", columns=COLUMNS)
+            return self._table
+
+    # ---------------------------------------------------------
+    # STAGE 1
+    # ---------------------------------------------------------
+    def momentum_score(self, t):
+        """Cheap risk-adjusted momentum: blended ROC / volatility."""
+        vol = np.maximum(t["volatility"].to_numpy(dtype=float), 1e-4)
+        roc = 0.5 * t["roc_5"].to_numpy(dtype=float) + 0.5 * t["roc_20"].to_numpy(dtype=float)
+        return np.nan_to_num(roc / vol, nan=-np.inf)
+
+    def screen(self, tickers, time_budget=None, seconds_per_ticker=None):
+        """
+        Returns (selected_tickers, report).
+
+        time_budget (s) + seconds_per_ticker → cap on how many tickers
+        stage 2 can process; otherwise keep_fraction of the survivors.
+        Tickers with no cached row yet, or only a stale one (older than
+        row_ttl), are passed through (so they get fetched and cached
+        again) ahead of ranked survivors, but within the time budget:
+        the overflow is reported as deferred.
+        """
+        self.seed_from_cache()
+        tickers = list(dict.fromkeys(str(t).upper() for t in tickers))
+        table = self.table()
+
+        if self.row_ttl:
+            updated = table["updated"].to_numpy(dtype=float)
+            fresh = table.index.to_numpy()[np.nan_to_num(updated, nan=0.0) >= time.time() - self.row_ttl]
+        else:
+            fresh = table.index.to_numpy()
+
+        keys = [_key(t) for t in tickers]
+        known_mask = np.isin(keys, fresh)
+        known = [t for t, k in zip(tickers, known_mask) if k]
+        unknown = [t for t, k in zip(tickers, known_mask) if not k]
+
+        t = table.loc[[k for k, m in zip(keys, known_mask) if m]]
+        price = t["last_close"].to_numpy(dtype=float)
+        dvol = t["dollar_volume"].to_numpy(dtype=float)
+        vol = t["volatility"].to_numpy(dtype=float)
+
+        price_ok = price >= self.min_price
+        liquid_ok = np.nan_to_num(dvol, nan=0.0) >= self.min_dollar_volume
+        vol_ok = np.nan_to_num(vol, nan=np.inf) <= self.max_volatility
+        passed = price_ok & liquid_ok & vol_ok
+
+        score = np.where(passed, self.momentum_score(t), -np.inf)
+        order = np.argsort(-score, kind="stable")[: int(passed.sum())]
+        survivors = [known[i] for i in order]
+
+        # Pass-throughs count against the time budget like any other ticker;
+        # unknowns beyond it wait for the next scan (deferred)
+        keep = max(self.min_keep, math.ceil(self.keep_fraction * len(survivors)))
+        deferred = 0
+        if time_budget and seconds_per_ticker:
+            capacity = int(time_budget / seconds_per_ticker)
+            deferred = max(0, len(unknown) - capacity)
+            unknown = unknown[:capacity]
+            keep = min(keep, capacity - len(unknown))
+
+        selected = unknown + survivors[:keep]
+
+        report = {
+            "universe": len(tickers),
+            "unknown": len(unknown) + deferred,
+            "deferred": deferred,
+            "stale": int(np.isin(keys, table.index.to_numpy()).sum() - len(known)),
+            "failed_price": int((~price_ok).sum()),
+            "failed_liquidity": int((~liquid_ok).sum()),
+            "failed_volatility": int((~vol_ok).sum()),
+            "passed_gates": int(passed.sum()),
+            "selected": len(selected),
+            "time_budget": time_budget,
+        }
+        return selected, report
@@ -13,6 +13,25 @@ Consolidates all inputs for AstraPrime:
 import numpy as np
 
 
+# Neural input vector layout (StateBundleBuilder + AstraPrime build it in
+# this order; NeuralAgent is sized from it and registry checkpoints carry it)
+NEURAL_FEATURES = (
+    "rsi_scaled",
+    "macd",
+    "ma_ratio",
+    "momentum",
+    "volatility",
+    "vol_spike",
+    "psych_score",
+    "catalyst_score",
+    "last_price_k",
+    "ret_mean_5",
+    "ret_mean_20",
+    "ret_last",
+)
+NEURAL_INPUT_SIZE = len(NEURAL_FEATURES)
+
+
 class StateBundleBuilder:
     def __init__(self):
         pass
@@ -126,3 +145,22 @@ class StateBundleBuilder:
             },
             "neural_vector": vector,
         }
+
+    # -------------------------------------------------------------
+    # AGENT INPUTS
+    # -------------------------------------------------------------
+    def agent_inputs(self, bundle):
+        """Per-agent input dicts (same keys AstraPrime feeds each agent)."""
+        tech = bundle.get("technical", {})
+        return {
+            "momentum": {"momentum": bundle.get("momentum", 0.0)},
+            "volume": {"vol_spike": bundle.get("vol_spike", 1.0)},
+            "risk": {"volatility": bundle.get("volatility", 0.02)},
+            "psych": {"psych_score": bundle.get("psychology", 0.5)},
+            "catalyst": {"catalyst_score": bundle.get("catalyst", 0.0)},
+            "technical": {
+                "rsi": tech.get("rsi", 50),
+                "macd": tech.get("macd", 0),
+                "ma_ratio": tech.get("ma_ratio", 1.0),
+            },
+        }
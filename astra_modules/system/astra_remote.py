@@ -7,7 +7,6 @@ Guardian-supervised remote API for autonomous learning and training control.
 import os
 import sys
 import json
-import threading
 from http.server import BaseHTTPRequestHandler, HTTPServer
 
 # === Force project root onto sys.path ===
@@ -17,7 +16,14 @@ if BASE_DIR not in sys.path:
 
 from astra_modules.guardian.guardian_v6 import GuardianV6
 from astra_modules.agents.neural_agent import NeuralAgent
-from astra_modules.agents.continual_trainer import ContinualTrainer
+from astra_modules.agents.continual_trainer import ContinualTrainer, MODEL_NAME
+from astra_modules.system.job_scheduler import JobScheduler, IntervalTrigger, register_maintenance_jobs
+
+TRAINING_JOB = "remote.training"
+TRAINING_INTERVAL = 10       # seconds between continual training steps
+
+# ASTRA_SEED_SYNTHETIC=1 → train on random in-memory samples (smoke tests)
+SEED_SYNTHETIC = os.getenv("ASTRA_SEED_SYNTHETIC", "0") == "1"
 
 
 class AstraRemote:
@@ -25,19 +31,38 @@ class AstraRemote:
         self.base_path = base_path
         self.guardian = GuardianV6(base_path)
         self.agent = NeuralAgent(self.guardian)
-        self.trainer = ContinualTrainer(self.guardian, self.agent)
+        if not SEED_SYNTHETIC:
+            self.agent.load(name=MODEL_NAME)    # resume from the promoted checkpoint
+        self.trainer = ContinualTrainer(self.guardian, self.agent, seed_synthetic=SEED_SYNTHETIC)
+        self.scheduler = JobScheduler()
         self.guardian._write_log("🌐 Astra Remote Controller initialized (Phase-101).")
 
     # ------------------------------------------------------------------
 
-    def background_training_loop(self, interval=10):
-        """Background continual training loop."""
-        import time
-        self.guardian._write_log(f"🧠 Background learning loop started (interval={interval}s).")
+    def start_background_jobs(self, interval=TRAINING_INTERVAL):
+        """Continual training every `interval` seconds + maintenance, on the job scheduler."""
+        self._add_training_job(interval, run_now=True)
+        register_maintenance_jobs(self.scheduler, self.base_path)
+        self.scheduler.start()
+        self.guardian._write_log(f"🧠 Background learning jobs started (interval={interval}s).")
+        return self.scheduler
+
+    def background_training_loop(self, interval=TRAINING_INTERVAL):
+        """Blocking form of start_background_jobs() (runs until the scheduler stops)."""
+        self.start_background_jobs(interval)
+        self.scheduler.join()
 
-        while True:
-            self.trainer.step(iterations=3)
-            time.sleep(interval)
+    def _add_training_job(self, interval=TRAINING_INTERVAL, run_now=False):
+        self.scheduler.add_job(
+            TRAINING_JOB, self.trainer.step, IntervalTrigger(interval),
+            kwargs={"iterations": 3}, run_now=run_now,
+        )
+
+    def trigger_training(self):
+        """Run a training step now unless one is already running."""
+        if TRAINING_JOB not in self.scheduler.jobs:
+            self._add_training_job()
+        return self.scheduler.run_now(TRAINING_JOB) is not None
 
 
 # ----------------------------------------------------------------------
@@ -56,8 +81,13 @@ class RequestHandler(BaseHTTPRequestHandler):
             self._respond(200, response)
 
         elif self.path == "/train":
-            threading.Thread(target=self.server.controller.trainer.step, daemon=True).start()
-            self._respond(200, {"status": "ok", "message": "Training cycle triggered"})
+            if self.server.controller.trigger_training():
+                self._respond(200, {"status": "ok", "message": "Training cycle triggered"})
+            else:
+                self._respond(409, {"status": "busy", "message": "Training cycle already running"})
+
+        elif self.path == "/jobs":
+            self._respond(200, self.server.controller.scheduler.report())
 
         else:
             self._respond(404, {"error": "Unknown endpoint"})
@@ -84,12 +114,8 @@ if __name__ == "__main__":
     base_path = os.getcwd()
     controller = AstraRemote(base_path)
 
-    # Launch background learning
-    loop_thread = threading.Thread(
-        target=controller.background_training_loop,
-        daemon=True
-    )
-    loop_thread.start()
+    # Launch background learning + maintenance jobs
+    controller.start_background_jobs()
 
     # Start API server
     server = AstraRemoteServer(controller)
@@ -101,5 +127,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         controller.guardian._write_log("🛑 Astra Remote shutting down.")
         print("\n🛑 Astra Remote shutting down.")
+        controller.scheduler.stop(wait=False)
         server.server_close()
 
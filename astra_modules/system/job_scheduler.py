@@ -0,0 +1,578 @@
+"""
+job_scheduler.py — Phase-100
+
+In-process job scheduler for Astra background work (training,
+rescans, cache compaction, integrity checks).
+
+ • one timer heap of (due, seq, job) and one dispatcher thread that
+   sleeps on a Condition until the earliest due time — nothing polls
+ • IntervalTrigger(seconds) and CronTrigger("min hour dom month dow")
+   (UTC by default; *, a-b, a,b and */n steps, @hourly / @daily ...)
+ • due jobs run on a bounded ThreadPoolExecutor (max_workers)
+ • overlap prevention: a job that is still running when it fires
+   again is skipped, never queued behind itself — so the pool queue
+   holds at most one entry per job
+ • jitter: every fire is delayed by uniform(0, jitter) seconds so jobs
+   on the same schedule don't stampede; the base schedule never drifts
+ • missed runs (process down, machine asleep, pool saturated) are
+   handled per job: "coalesce" runs once, "all" replays each missed
+   fire (≤ MAX_CATCHUP), "skip" drops fires later than grace seconds.
+   Last-run times persist in astra_scheduler_state.json, so a daily
+   job missed while the process was down runs on the next start
+   (saves re-read the file under a file lock and merge, so processes
+   sharing it never drop each other's jobs)
+ • report() → runs / failures / skipped / missed + duration stats
+
+Run standalone (rescans + maintenance):
+    python -m astra_modules.system.job_scheduler
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:     # non-POSIX: in-process locking only
+    fcntl = None
+
+# === Force project root onto sys.path ===
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from astra_modules.engine.scan_metrics import latency_stats
+
+
+SCHEDULER_STATE_FILE = "astra_scheduler_state.json"
+
+MAX_WORKERS = int(os.getenv("ASTRA_SCHEDULER_WORKERS", "2"))
+
+CATCH_UP_POLICIES = ("coalesce", "all", "skip")
+MAX_CATCHUP = 24          # replayed fires per dispatch ("all")
+DEFAULT_GRACE = 60.0      # seconds late before a fire counts as missed
+DURATION_WINDOW = 500     # durations kept per job for report()
+
+# Maintenance schedules (see register_maintenance_jobs)
+COMPACTION_CRON = "17 * * * *"
+INTEGRITY_CRON = "30 3 * * *"
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (low, high) per cron field: minute, hour, day of month, month, day of week
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+CRON_SEARCH_DAYS = 366 * 5
+
+
+# -----------------------------------------------------------
+# Internal helpers
+# -----------------------------------------------------------
+
+def _get_state_path() -> Path:
+    """Last-run times per job, astra_scheduler_state.json at the project root."""
+    return Path(__file__).resolve().parents[2] / SCHEDULER_STATE_FILE
+
+
+def _write_log(msg):
+    timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
+    print(f"{timestamp} [job_scheduler] {msg}")
+
+
+def _iso(ts):
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+
+
+# ===========================================================
+# TRIGGERS
+# ===========================================================
+
+class IntervalTrigger:
+    """Fire every `seconds`, measured from the previous fire time."""
+
+    def __init__(self, seconds):
+        self.seconds = float(seconds)
+        if self.seconds <= 0:
+            raise ValueError("interval must be positive")
+
+    def next_after(self, ts):
+        return ts + self.seconds
+
+    def __repr__(self):
+        return f"every {self.seconds:g}s"
+
+
+def _parse_cron_field(text, low, high, dow=False):
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+            if step <= 0:
+                raise ValueError(f"bad cron step in {text!r}")
+        if part == "*":
+            start, stop = low, high
+        elif "-" in part:
+            start, stop = (int(p) for p in part.split("-", 1))
+        else:
+            start = int(part)
+            stop = high if step > 1 else start
+        if start < low or stop > (7 if dow else high) or start > stop:
+            raise ValueError(f"cron field {text!r} outside {low}-{high}")
+        values.update(range(start, stop + 1, step))
+    if dow and 7 in values:        # 7 = Sunday, like 0
+        values.discard(7)
+        values.add(0)
+    return frozenset(values)
+
+
+class CronTrigger:
+    """5-field cron expression evaluated in `tz` (UTC by default)."""
+
+    def __init__(self, expr, tz=timezone.utc):
+        self.expr = expr.strip()
+        self.tz = tz
+        fields = CRON_ALIASES.get(self.expr, self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_cron_field(f, lo, hi, dow=(i == 4))
+            for i, (f, (lo, hi)) in enumerate(zip(fields, CRON_FIELDS))
+        )
+        # Classic cron: if both day fields are restricted, either may match
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+        self._sorted_hours = sorted(self.hours)
+        self._sorted_minutes = sorted(self.minutes)
+
+    def _day_matches(self, dt):
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, ts):
+        """First matching minute strictly after `ts` (unix seconds)."""
+        dt = datetime.fromtimestamp(ts, self.tz).replace(second=0, microsecond=0)
+        dt += timedelta(minutes=1)
+        limit = dt + timedelta(days=CRON_SEARCH_DAYS)
+
+        while dt < limit:
+            if dt.month not in self.months:
+                year, month = divmod(dt.month, 12)
+                dt = dt.replace(year=dt.year + year, month=month + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            hour = next((h for h in self._sorted_hours if h >= dt.hour), None)
+            if hour is None:
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if hour != dt.hour:
+                dt = dt.replace(hour=hour, minute=0)
+            minute = next((m for m in self._sorted_minutes if m >= dt.minute), None)
+            if minute is None:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            return dt.replace(minute=minute).timestamp()
+
+        raise ValueError(f"cron expression {self.expr!r} never fires")
+
+    def __repr__(self):
+        return f"cron {self.expr!r}"
+
+
+# ===========================================================
+# JOB
+# ===========================================================
+
+class Job:
+    def __init__(self, name, func, trigger, args=(), kwargs=None, jitter=0.0,
+                 catch_up="coalesce", grace=DEFAULT_GRACE):
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"catch_up must be one of {CATCH_UP_POLICIES}")
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.jitter = float(jitter)
+        self.catch_up = catch_up
+        self.grace = float(grace)
+
+        self.next_base = None     # schedule time, without jitter
+        self.next_run = None      # next_base + jitter draw
+        self.running = False
+        self.removed = False
+
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0          # fired while the previous run was active
+        self.missed = 0           # fires dropped or coalesced by catch-up
+        self.last_run = None
+        self.last_duration = None
+        self.last_error = None
+        self.durations = deque(maxlen=DURATION_WINDOW)
+
+    def stats(self) -> dict:
+        return {
+            "trigger": repr(self.trigger),
+            "catch_up": self.catch_up,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "missed": self.missed,
+            "last_run": _iso(self.last_run),
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "next_run": _iso(self.next_run),
+            "duration": latency_stats(list(self.durations)),
+        }
+
+
+# ===========================================================
+# SCHEDULER
+# ===========================================================
+
+class JobScheduler:
+    def __init__(self, max_workers=MAX_WORKERS, state_path=None, persist=True):
+        """
+        max_workers: size of the worker pool shared by all jobs
+        state_path:  JSON file with each job's last run (catch-up)
+        persist:     False → no state file (tests, replays)
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.state_path = Path(state_path) if state_path else _get_state_path()
+        self.persist = persist
+
+        self.jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self._pool = None
+        self._state = self._load_state() if persist else {}
+        self._state_lock = threading.Lock()
+
+    # -------------------------------------------------------------
+    # STATE (last run per job)
+    # -------------------------------------------------------------
+    def _load_state(self) -> dict:
+        try:
+            with self.state_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, name, ts):
+        if not self.persist:
+            return
+        with self._state_lock:
+            lockfile = None
+            try:
+                if fcntl is not None:
+                    lockfile = open(self.state_path.with_name(self.state_path.name + ".lock"), "a+b")
+                    fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+                # Other processes' jobs live in the same file → merge, newest run wins
+                state = self._load_state()
+                for job, last in self._state.items():
+                    state[job] = max(last, state.get(job) or 0.0)
+                state[name] = max(ts, state.get(name) or 0.0)
+                self._state = state
+
+                tmp = self.state_path.with_suffix(self.state_path.suffix + f".{os.getpid()}.tmp")
+                with tmp.open("w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.state_path)
+            except OSError as e:
+                _write_log(f"state save failed: {e}")
+            finally:
+                if lockfile is not None:
+                    fcntl.flock(lockfile, fcntl.LOCK_UN)
+                    lockfile.close()
+
+    # -------------------------------------------------------------
+    # REGISTRATION
+    # -------------------------------------------------------------
+    def add_job(self, name, func, trigger, args=(), kwargs=None, jitter=0.0,
+                catch_up="coalesce", grace=DEFAULT_GRACE, run_now=False):
+        """
+        Register (or replace) a job. The first fire is:
+         • now, if run_now
+         • trigger.next_after(last persisted run) — possibly in the
+           past, which is what triggers catch-up after a restart
+         • otherwise trigger.next_after(now)
+        """
+        job = Job(name, func, trigger, args, kwargs, jitter, catch_up, grace)
+        now = time.time()
+        last = self._state.get(name)
+        if run_now:
+            first = now
+        elif last is not None:
+            first = trigger.next_after(float(last))
+        else:
+            first = trigger.next_after(now)
+
+        with self._cond:
+            old = self.jobs.get(name)
+            if old is not None:
+                old.removed = True
+            self.jobs[name] = job
+            self._push(job, first)
+        return job
+
+    def remove_job(self, name):
+        with self._cond:
+            job = self.jobs.pop(name, None)
+            if job is not None:
+                job.removed = True
+                self._cond.notify()
+        return job is not None
+
+    def _push(self, job, base):
+        """Schedule `job` at base + jitter (caller holds the lock)."""
+        job.next_base = base
+        job.next_run = base + (random.uniform(0.0, job.jitter) if job.jitter else 0.0)
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+        self._cond.notify()
+
+    # -------------------------------------------------------------
+    # DISPATCHER
+    # -------------------------------------------------------------
+    def _due_fires(self, job, now):
+        """Base fire times ≤ now, starting at job.next_base (capped)."""
+        fires = [job.next_base]
+        while len(fires) <= MAX_CATCHUP:
+            nxt = job.trigger.next_after(fires[-1])
+            if nxt > now:
+                return fires, nxt
+            fires.append(nxt)
+        # Too far behind to enumerate — resume from now
+        return fires, job.trigger.next_after(now)
+
+    def _dispatch(self, job, now):
+        """Decide how often `job` runs for this wake-up; reschedule it."""
+        fires, next_base = self._due_fires(job, now)
+        late = now - fires[0]
+
+        if job.running:
+            job.skipped += len(fires)
+            count = 0
+        else:
+            if job.catch_up == "all":
+                count = min(len(fires), MAX_CATCHUP)
+            elif job.catch_up == "skip" and late > job.grace:
+                count = 0
+            else:
+                count = 1
+            job.missed += len(fires) - count
+
+        self._push(job, next_base)
+        if count:
+            job.running = True
+            self._pool.submit(self._run, job, count)
+
+    def _loop(self):
+        with self._cond:
+            while not self._stop:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, job = self._heap[0]
+                now = time.time()
+                if due > now:
+                    self._cond.wait(due - now)
+                    continue
+                heapq.heappop(self._heap)
+                if job.removed or self.jobs.get(job.name) is not job or job.next_run != due:
+                    continue
+                self._dispatch(job, now)
+
+    # -------------------------------------------------------------
+    # EXECUTION
+    # -------------------------------------------------------------
+    def _run(self, job, count=1):
+        try:
+            for _ in range(count):
+                started = time.time()
+                t0 = time.perf_counter()
+                try:
+                    job.func(*job.args, **job.kwargs)
+                    job.last_error = None
+                except Exception as e:
+                    job.failures += 1
+                    job.last_error = str(e)
+                    _write_log(f"{job.name} failed: {e}")
+                finally:
+                    elapsed = time.perf_counter() - t0
+                    job.runs += 1
+                    job.last_run = started
+                    job.last_duration = elapsed
+                    job.durations.append(elapsed)
+                    self._save_state(job.name, started)
+        finally:
+            with self._cond:
+                job.running = False
+
+    def run_now(self, name):
+        """
+        Run a job immediately on the pool, outside its schedule.
+        Returns the Future, or None when the job is already running.
+        """
+        with self._cond:
+            job = self.jobs[name]
+            if job.running:
+                job.skipped += 1
+                return None
+            job.running = True
+            return self._ensure_pool().submit(self._run, job)
+
+    # -------------------------------------------------------------
+    # LIFECYCLE
+    # -------------------------------------------------------------
+    def _ensure_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="astra-job")
+        return self._pool
+
+    def start(self):
+        """Start the dispatcher thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return self
+        with self._cond:
+            self._stop = False
+            self._ensure_pool()
+        self._thread = threading.Thread(target=self._loop, name="astra-job-scheduler", daemon=True)
+        self._thread.start()
+        _write_log(f"started ({len(self.jobs)} jobs, {self.max_workers} workers)")
+        return self
+
+    def stop(self, wait=True):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        if self._pool:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+        _write_log("stopped")
+
+    def join(self, timeout=None):
+        """Block until the dispatcher stops."""
+        if self._thread:
+            self._thread.join(timeout)
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    # -------------------------------------------------------------
+    # REPORTING
+    # -------------------------------------------------------------
+    def report(self) -> dict:
+        with self._cond:
+            jobs = list(self.jobs.values())
+        return {job.name: job.stats() for job in jobs}
+
+    def format_report(self) -> str:
+        lines = [f"{'job':<22} {'runs':>5} {'fail':>5} {'skip':>5} {'miss':>5} "
+                 f"{'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}  next run"]
+        for name, s in sorted(self.report().items()):
+            d = s["duration"]
+            lines.append(
+                f"{name:<22} {s['runs']:>5} {s['failures']:>5} {s['skipped']:>5} {s['missed']:>5} "
+                f"{d.get('p50_ms', 0):>9.1f} {d.get('p95_ms', 0):>9.1f} {d.get('max_ms', 0):>9.1f}  "
+                f"{s['next_run']}"
+            )
+        return "\n".join(lines)
+
+
+# ===========================================================
+# MAINTENANCE JOBS
+# ===========================================================
+
+def compact_caches():
+    """Prune the event memory, compact the learning store, flush performance events."""
+    from astra_modules.utils.memory_engine import memory_engine
+    from astra_modules.learning.learning_store import get_learning_store
+    from astra_modules.learning.performance_tracker import flush_performance
+
+    memory_engine.prune(force=True)
+    get_learning_store().compact()
+    flush_performance()
+
+
+def check_integrity(base_path=None):
+    """Directory + import integrity pass (IntegrityBuilder)."""
+    from astra_modules.system.integrity_builder import IntegrityBuilder
+
+    IntegrityBuilder(base_path or BASE_DIR).run_full_integrity_check()
+
+
+def register_maintenance_jobs(scheduler, base_path=None, compaction=COMPACTION_CRON,
+                              integrity=INTEGRITY_CRON):
+    """Hourly cache compaction + nightly integrity check."""
+    scheduler.add_job("maintenance.compaction", compact_caches, CronTrigger(compaction), jitter=60)
+    scheduler.add_job("maintenance.integrity", check_integrity, CronTrigger(integrity),
+                      kwargs={"base_path": base_path}, jitter=300)
+    return scheduler
+
+
+# ----------------------------------------------------------------------
+# Main Entry
+# ----------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Astra in-process job scheduler (rescans + maintenance).")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="worker pool size")
+    parser.add_argument("--no-scan", action="store_true", help="don't schedule rescans")
+    parser.add_argument("--report-interval", type=float, default=600.0,
+                        help="print the job report every N seconds (0 = never)")
+    args = parser.parse_args(argv)
+
+    scheduler = JobScheduler(max_workers=args.workers)
+    register_maintenance_jobs(scheduler)
+    if not args.no_scan:
+        from astra_modules.system.scan_service import ScanService
+        ScanService().schedule_jobs(scheduler)
+    if args.report_interval > 0:
+        scheduler.add_job("scheduler.report", lambda: print(scheduler.format_report()),
+                          IntervalTrigger(args.report_interval))
+
+    scheduler.start()
+    try:
+        while scheduler.is_running():
+            scheduler.join(1.0)
+    except KeyboardInterrupt:
+        print("\n🛑 Astra Job Scheduler shutting down.")
+        scheduler.stop(wait=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Astra Scan Service – Phase-101
+------------------------------
+Background scan daemon. Runs ScanManager on a schedule (separately
+for day and swing modes) and publishes versioned ranking snapshots
+to the SnapshotStore. The Predictions + Dashboard tabs only read the
+latest snapshot, so Streamlit reruns never trigger a scan.
+
+Run standalone:
+    python -m astra_modules.system.scan_service
+or in-process (daemon thread) via ScanService().start(), or as a
+rescan job on a shared JobScheduler via schedule_jobs(scheduler).
+
+Scans never run concurrently: both modes share one ScanManager (agent
+cache, scan state, metrics), so due modes are scanned one after the
+other and run_once() holds a lock.
+
+After every published scan, learning_engine.refresh_learning() folds
+the learning records stored since the previous scan into the factor
+weights (O(new records); ASTRA_SCAN_LEARN=0 turns it off), and agent
+weights found by search_agent_weights() are applied to AstraPrime.
+
+ASTRA_SCAN_SHARDED=1 → the service acts as coordinator: each scan is
+split onto the ShardQueue, scan_worker processes (and this one) lease
+and scan shards, and the merged ranking is published as the snapshot.
+"""
+
+import os
+import sys
+import time
+import threading
+from datetime import datetime
+
+# === Force project root onto sys.path ===
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from astra_modules.engine.scan_manager import ScanManager
+from astra_modules.engine.snapshot_store import SnapshotStore
+from astra_modules.engine.scan_checkpoint import latest_incomplete, new_scan_id
+from astra_modules.engine.work_queue import ShardQueue, SHARD_SIZE as DEFAULT_SHARD_SIZE
+from astra_modules.learning.learning_engine import refresh_learning
+from astra_modules.universe.universe_builder import build_universe
+from astra_modules.system.job_scheduler import IntervalTrigger
+
+
+# Seconds between scans per mode (matches Dashboard refresh intervals)
+SCHEDULE = {
+    "day": 300,
+    "swing": 3600,
+}
+
+# Publish partial (in-progress) snapshots at most this often
+PARTIAL_INTERVAL = 1.0
+
+# Max random delay per rescan when run as JobScheduler jobs (seconds)
+RESCAN_JITTER = 15.0
+
+# Coordinator mode (see module docstring)
+SHARDED = os.getenv("ASTRA_SCAN_SHARDED", "0") == "1"
+SHARD_SIZE = int(os.getenv("ASTRA_SCAN_SHARD_SIZE", DEFAULT_SHARD_SIZE))
+
+# Incremental learning refresh after each published scan
+LEARN = os.getenv("ASTRA_SCAN_LEARN", "1") == "1"
+
+
+class ScanService:
+    def __init__(self, manager=None, store=None, schedule=None, universes=None, sharded=SHARDED,
+                 work_queue=None, learn=LEARN):
+        """
+        manager:   ScanManager (shared agent cache + scan state)
+        store:     SnapshotStore
+        schedule:  {mode: seconds between scans}
+        universes: {mode: callable returning the ticker list}
+        sharded:   coordinate a ShardQueue scan instead of scanning in-process
+        learn:     refresh learning_engine after every published scan
+        """
+        self.manager = manager or ScanManager()
+        self.store = store or SnapshotStore()
+        self.schedule = dict(schedule or SCHEDULE)
+        self.universes = universes or {}
+        self.sharded = sharded
+        self.work_queue = work_queue or (ShardQueue() if sharded else None)
+        self.learn = learn
+        self._agent_weights = None      # last learned weights applied to AstraPrime
+
+        self.next_run = {mode: 0.0 for mode in self.schedule}
+        self.last_result = {}
+        self._scan_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _write_log(self, msg):
+        timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
+        print(f"{timestamp} [scan_service] {msg}")
+
+    # -------------------------------------------------------------
+    # ONE SCAN
+    # -------------------------------------------------------------
+    def run_once(self, mode):
+        """Scan the mode's universe and publish snapshots; returns the final one."""
+        with self._scan_lock:
+            return self._scan(mode)
+
+    def _scan(self, mode):
+        universe_fn = self.universes.get(mode, build_universe)
+        tickers = universe_fn() or []
+
+        started = time.time()
+        last_publish = 0.0
+        ranked = []
+        stats = {"mode": mode}
+
+        if self.sharded:
+            ranked = self.manager.scan_sharded(
+                tickers, self.work_queue, shard_size=SHARD_SIZE, mode=mode, stats=stats
+            )
+            return self._publish(mode, ranked, stats, started)
+
+        # A restarted service resumes the mode's interrupted scan (if it
+        # is no older than one schedule period) instead of refetching
+        # the whole universe; finished scans are never reused
+        scan_id = latest_incomplete(f"{mode}-", max_age=self.schedule.get(mode)) or f"{mode}-{new_scan_id()}"
+
+        for snap in self.manager.stream_rankings(tickers, stats, scan_id=scan_id):
+            ranked = snap["ranked"]
+            now = time.monotonic()
+            if now - last_publish >= PARTIAL_INTERVAL:
+                self.store.write(mode, ranked, stats=dict(stats), complete=False, started_at=started)
+                last_publish = now
+
+        return self._publish(mode, ranked, stats, started)
+
+    def _publish(self, mode, ranked, stats, started):
+        stats["cache"] = self.manager.prime.cache_stats()
+        stats["duration"] = time.time() - started
+        snapshot = self.store.write(mode, ranked, stats=stats, complete=True, started_at=started)
+
+        self.last_result[mode] = {
+            "version": snapshot["version"],
+            "count": snapshot["count"],
+            "duration": stats["duration"],
+        }
+        self._write_log(
+            f"{mode} scan v{snapshot['version']} published "
+            f"({snapshot['count']} ranked in {stats['duration']:.1f}s)"
+        )
+        if self.learn:
+            self._refresh_learning()
+        return snapshot
+
+    def _refresh_learning(self):
+        """New learning records → learning_engine weights (never fails the scan)."""
+        try:
+            state = refresh_learning()
+        except Exception as e:
+            self._write_log(f"learning refresh failed: {e}")
+            return None
+        # Agent weights from learning_engine.search_agent_weights() drive
+        # the next scan (model_key covers the weights → no stale packets)
+        weights = state.get("agent_weights")
+        if weights and weights != self._agent_weights:
+            self._agent_weights = weights
+            self.manager.prime.set_weights(weights)
+            self._write_log(f"agent weights updated: {self.manager.prime.weights}")
+        return state
+
+    # -------------------------------------------------------------
+    # SCHEDULER LOOP
+    # -------------------------------------------------------------
+    def run_due(self, tolerance=0.0):
+        """
+        Scan every mode whose next run is due (within `tolerance`
+        seconds), one after the other. Returns the modes scanned.
+        """
+        due = [m for m, t in self.next_run.items() if t <= time.time() + tolerance]
+        for mode in due:
+            started = time.time()
+            try:
+                self.run_once(mode)
+            except Exception as e:
+                self._write_log(f"{mode} scan failed: {e}")
+            self.next_run[mode] = started + self.schedule[mode]
+        return due
+
+    def run_forever(self):
+        self._write_log(f"started (schedule={self.schedule})")
+
+        while not self._stop.is_set():
+            self.run_due()
+            wait = max(0.5, min(self.next_run.values()) - time.time())
+            self._stop.wait(wait)
+
+        self._write_log("stopped")
+
+    def schedule_jobs(self, scheduler, jitter=RESCAN_JITTER):
+        """
+        Register one "scan.rescan" job on a shared JobScheduler instead
+        of running this service's own loop. It fires at the shortest
+        mode interval and scans whichever modes are due, sequentially —
+        one pool worker, never two scans at once. A rescan still running
+        when the next tick comes up makes that tick a skip.
+        """
+        tick = min(self.schedule.values())
+        scheduler.add_job(
+            "scan.rescan", self.run_due, IntervalTrigger(tick),
+            kwargs={"tolerance": tick / 2}, jitter=min(jitter, tick / 10), run_now=True,
+        )
+        return scheduler
+
+    def start(self):
+        """Run the scheduler in a daemon thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="astra-scan-service", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+
+# ----------------------------------------------------------------------
+# Main Entry
+# ----------------------------------------------------------------------
+
+if __name__ == "__main__":
+    service = ScanService()
+    try:
+        service.run_forever()
+    except KeyboardInterrupt:
+        service.stop()
+        print("\n🛑 Astra Scan Service shutting down.")
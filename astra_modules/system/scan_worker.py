@@ -0,0 +1,88 @@
+"""
+Astra Scan Worker – Phase-101
+-----------------------------
+Shard worker for distributed scans. Leases shards from the shared
+ShardQueue (astra_queue/scan_queue.db), scans them with a local
+ScanManager and writes the partial results back. The coordinator
+(ScanService with ASTRA_SCAN_SHARDED=1) merges them into one ranking.
+
+Run any number of these on the coordinator's host — in one container
+or as docker-compose replicas bind-mounting the same local astra_queue
+directory (not a network filesystem: see engine/work_queue.py):
+    python -m astra_modules.system.scan_worker
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime
+
+# === Force project root onto sys.path ===
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from astra_modules.engine.scan_manager import ScanManager
+from astra_modules.engine.work_queue import ShardQueue, default_worker_id
+
+
+# Seconds to wait before polling an empty queue again
+IDLE_WAIT = 2.0
+
+
+class ScanWorker:
+    def __init__(self, manager=None, work_queue=None, worker_id=None):
+        # Shards arrive pre-screened → no prefilter in the worker
+        self.manager = manager or ScanManager(prefilter=None)
+        self.queue = work_queue or ShardQueue()
+        self.worker_id = worker_id or default_worker_id()
+
+        self.shards_done = 0
+        self._stop = threading.Event()
+
+    def _write_log(self, msg):
+        timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
+        print(f"{timestamp} [scan_worker:{self.worker_id}] {msg}")
+
+    def run_once(self):
+        """Lease + scan one shard. Returns False if the queue was empty."""
+        shard = self.queue.lease(self.worker_id)
+        if shard is None:
+            return False
+
+        ok = self.manager.process_shard(shard, self.queue, self.worker_id)
+        if ok:
+            self.shards_done += 1
+        self._write_log(
+            f"shard {shard['scan_id']}/{shard['shard_id']} "
+            f"({len(shard['tickers'])} tickers) {'done' if ok else 'released'}"
+        )
+        return True
+
+    def run_forever(self):
+        self._write_log("started")
+        while not self._stop.is_set():
+            try:
+                busy = self.run_once()
+            except Exception as e:
+                self._write_log(f"shard failed: {e}")
+                busy = False
+            if not busy:
+                self._stop.wait(IDLE_WAIT)
+        self._write_log(f"stopped ({self.shards_done} shards)")
+
+    def stop(self):
+        self._stop.set()
+
+
+# ----------------------------------------------------------------------
+# Main Entry
+# ----------------------------------------------------------------------
+
+if __name__ == "__main__":
+    worker = ScanWorker()
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+        print("\n🛑 Astra Scan Worker shutting down.")
@@ -19,8 +19,10 @@ from astra_modules.api_keys import (
 )
 from astra_modules.guardian.guardian_v6 import GuardianV6
 from astra_modules.universe.universe_builder import build_universe
+from astra_modules.engine.snapshot_store import SnapshotStore
 
 guardian = GuardianV6(__file__)
+snapshots = SnapshotStore()   # written by the background ScanService
 
 # -------------------------------------------------
 # Placeholder for Unified API Data Fetcher
@@ -78,7 +80,13 @@ def render_dashboard():
         st.info(f"🔄 Auto-refresh every {refresh_interval // 60} minutes")
 
     # Fetch live data
-    df = fetch_live_data(symbol=selected_symbol, mode="day" if mode == "Day Trading" else "swing")
+    mode_key = "day" if mode == "Day Trading" else "swing"
+    df = fetch_live_data(symbol=selected_symbol, mode=mode_key)
+
+    # Latest ranking snapshot (read-only — the dashboard never scans)
+    snap = snapshots.read_latest(mode_key) or {}
+    ranked = snap.get("ranked", [])
+    entry = next((x for x in ranked if x.get("ticker") == selected_symbol), None)
 
     # Layout columns
     col1, col2 = st.columns([2, 3], gap="large")
@@ -86,18 +94,34 @@ def render_dashboard():
     with col1:
         st.markdown(f"### 🧠 {selected_symbol}")
         st.markdown("**Phase-90 Real-Time Scan**")
-        st.markdown(
-            """
-            <div style="background-color:rgba(255,255,255,0.05);padding:15px;border-radius:12px;border:1px solid rgba(255,255,255,0.1);">
-                <strong>📈 Astra Summary:</strong><br>
-                Bullish trend forming with rising momentum.<br>
-                Guardian confidence: <strong>87%</strong><br>
-                Risk: <strong>Moderate</strong><br>
-                Timeframe: <strong>Day Trading</strong>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+        if entry:
+            packet = entry.get("packet") or {}
+            rank = ranked.index(entry) + 1
+            st.markdown(
+                f"""
+                <div style="background-color:rgba(255,255,255,0.05);padding:15px;border-radius:12px;border:1px solid rgba(255,255,255,0.1);">
+                    <strong>📈 Astra Summary:</strong><br>
+                    Astra score: <strong>{packet.get("astra_score", 0):.3f}</strong> (grade {packet.get("grade", "–")})<br>
+                    Rank: <strong>#{rank}</strong> of {len(ranked)} · rank score {entry.get("rank_score", 0):.3f}<br>
+                    Timeframe: <strong>{mode}</strong><br>
+                    Snapshot: v{snap.get("version")}
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+        else:
+            st.info("No scan snapshot for this symbol yet.")
+
+        if ranked:
+            st.markdown("**Top picks**")
+            st.dataframe(
+                pd.DataFrame(
+                    [[x.get("ticker"), round(x.get("rank_score", 0), 3)] for x in ranked[:10]],
+                    columns=["Ticker", "Rank Score"],
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
 
     with col2:
         if df is None or df.empty:
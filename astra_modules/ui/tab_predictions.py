@@ -2,29 +2,112 @@
 tab_predictions.py — Phase-90
 
 Predictions Tab:
- • Auto-run smart_scan
+ • Reads the latest ranking snapshot (never scans inline)
+ • Background ScanService publishes day / swing snapshots
+ • Live top-N tables + scan progress (auto-refreshing fragment)
  • RankingEngine integration
  • Stocks + Crypto tables
  • Click-to-view chart
  • Guardian-safe
 """
 
+import os
+import time
+
 import streamlit as st
 import pandas as pd
 
 from astra_modules.guardian.guardian_v6 import GuardianV6 as GuardianV3
-from astra_modules.scanners.smart_scan import smart_scan
-<<<<<<< Updated upstream
-<<<<<<< Updated upstream
-from astra_modules.chart_core.chart_engine import render_chart_html
-=======
-=======
->>>>>>> Stashed changes
 from astra_modules.chart_core.chart_engine import ChartEngine
-from astra_modules.ui.components.ticker_card import render_ticker_card
->>>>>>> Stashed changes
-from astra_modules.engine.ranking_engine import RankingEngine
-from astra_modules.universe.universe_builder import UniverseBuilder
+from astra_modules.engine.snapshot_store import SnapshotStore
+from astra_modules.core.symbol_index import get_symbol_index
+from astra_modules.system.scan_service import ScanService
+from astra_modules.fetch_core.fetch_unified import fetch_unified
+
+
+TOP_N = 20
+REFRESH_SECONDS = 2      # snapshot re-read interval (one stat() when unchanged)
+
+# "external" → a separate `python -m astra_modules.system.scan_service`
+# process writes the snapshots; otherwise one in-process daemon thread does.
+SCAN_SERVICE_MODE = os.getenv("ASTRA_SCAN_SERVICE", "inprocess")
+
+COLUMNS = [
+    "Ticker",
+    "Rank Score",
+    "Astra Score",
+    "Neural",
+    "Momentum",
+    "Technical",
+    "Price",
+]
+
+
+@st.cache_resource
+def _get_snapshot_store():
+    return SnapshotStore()
+
+
+@st.cache_resource
+def _get_scan_service():
+    """One background ScanService per server process (not per rerun)."""
+    if SCAN_SERVICE_MODE == "external":
+        return None
+    return ScanService(store=_get_snapshot_store()).start()
+
+
+def _num(v):
+    try:
+        return round(float(v[0] if isinstance(v, (list, tuple)) else v), 3)
+    except Exception:
+        return 0.0
+
+
+def _row(entry):
+    packet = entry.get("packet") or {}
+    agents = packet.get("agent_scores", {})
+    return [
+        entry.get("ticker"),
+        _num(entry.get("rank_score", 0)),
+        _num(packet.get("astra_score", 0)),
+        _num(agents.get("neural", 0)),
+        _num(agents.get("momentum", 0)),
+        _num(agents.get("technical", 0)),
+        _num((packet.get("fetch_meta") or {}).get("last_price", 0)),
+    ]
+
+
+def _render_tables(ranked, stock_slot, crypto_slot, top_n=TOP_N):
+    """Split ranked rows into Stocks / Crypto and redraw both tables."""
+    stocks, crypto = get_symbol_index().split(ranked, key=lambda x: x.get("ticker", ""))
+    stocks, crypto = stocks[:top_n], crypto[:top_n]
+
+    stock_slot.dataframe(
+        pd.DataFrame([_row(x) for x in stocks], columns=COLUMNS),
+        use_container_width=True,
+        hide_index=True,
+    )
+    crypto_slot.dataframe(
+        pd.DataFrame([_row(x) for x in crypto], columns=COLUMNS),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def _render_snapshot_status(snap, slot):
+    """Progress / freshness line for the current snapshot."""
+    age = time.time() - snap.get("created_at", time.time())
+    stats = snap.get("stats", {})
+
+    if snap.get("complete"):
+        slot.caption(
+            f"Snapshot v{snap.get('version')} · {snap.get('count', 0)} ranked · "
+            f"updated {age:.0f}s ago · scan took {stats.get('duration', 0):.1f}s"
+        )
+    else:
+        total = max(1, stats.get("tickers", 1))
+        done = stats.get("scored", 0) + stats.get("fetch_failed", 0) + stats.get("score_failed", 0)
+        slot.progress(min(1.0, done / total), text=f"Scanning… {done}/{total} (v{snap.get('version')} in progress)")
 
 
 def render_predictions():
@@ -37,132 +120,33 @@ def render_predictions():
         unsafe_allow_html=True,
     )
 
-    guardian = GuardianV3()
+    guardian = GuardianV3(os.path.dirname(__file__))
     chart_engine = ChartEngine()
-    ranker = RankingEngine()
-    universe = UniverseBuilder()
-
-    # ================================
-    # RUN SMART SCAN
-    # ================================
-    universe_list = guardian.safe_run(universe.build_universe)
-    if not universe_list:
-        st.error("Universe load failed")
-        return
-
-    with st.spinner("Running smart scan across universe…"):
-        predictions = []
-        for symbol in universe_list:
-            result = guardian.safe_run(smart_scan, symbol)
-            if result:
-                predictions.append(result)
-
-    if not predictions:
-        st.warning("No predictions available")
-        return
-
-    # Split Stocks / Crypto
-    stocks = [x for x in predictions if not x.get("ticker", "").endswith("-USD")]
-    crypto = [x for x in predictions if x.get("ticker", "").endswith("-USD")]
+    store = _get_snapshot_store()
+    _get_scan_service()
+
+    mode = st.radio("Mode", ["Day", "Swing"], horizontal=True, key="predictions_mode").lower()
 
     selected = st.session_state.get("selected_prediction")
     left, right = st.columns([1.2, 2])
 
-    # LEFT — Stock Table
+    # LEFT — snapshot tables (fragment re-reads the snapshot on a timer)
     with left:
-        st.markdown("## 📈 Stocks")
-        stock_rows = []
-        for x in stocks[:20]:
-            stock_rows.append([
-                x.get("ticker"),
-                round(x.get("rank_score", 0), 3),
-                round(x.get("astra_score", 0), 3),
-                round(x.get("agent_scores", {}).get("neural", 0), 3),
-                round(x.get("agent_scores", {}).get("momentum", 0), 3),
-                round(x.get("agent_scores", {}).get("technical", 0), 3),
-<<<<<<< Updated upstream
-<<<<<<< Updated upstream
-                round(x.get("fetch_meta", {}).get("last_price", 0), 3)
-=======
-                round(x.get("fetch_meta", {}).get("last_price", 0), 3),
->>>>>>> Stashed changes
-=======
-                round(x.get("fetch_meta", {}).get("last_price", 0), 3),
->>>>>>> Stashed changes
-            ])
-
-        df_stocks = pd.DataFrame(
-            stock_rows,
-            columns=[
-<<<<<<< Updated upstream
-<<<<<<< Updated upstream
-                "Ticker", "Rank Score", "Astra Score",
-                "Neural", "Momentum", "Technical", "Price"
-            ]
-=======
-=======
->>>>>>> Stashed changes
-                "Ticker",
-                "Rank Score",
-                "Astra Score",
-                "Neural",
-                "Momentum",
-                "Technical",
-                "Price",
-            ],
-<<<<<<< Updated upstream
->>>>>>> Stashed changes
-=======
->>>>>>> Stashed changes
-        )
-        st.dataframe(df_stocks, use_container_width=True, hide_index=True)
-
-        st.markdown("## 🪙 Crypto")
-        crypto_rows = []
-        for x in crypto[:20]:
-            crypto_rows.append([
-                x.get("ticker"),
-                round(x.get("rank_score", 0), 3),
-                round(x.get("astra_score", 0), 3),
-                round(x.get("agent_scores", {}).get("neural", 0), 3),
-                round(x.get("agent_scores", {}).get("momentum", 0), 3),
-                round(x.get("agent_scores", {}).get("technical", 0), 3),
-<<<<<<< Updated upstream
-<<<<<<< Updated upstream
-                round(x.get("fetch_meta", {}).get("last_price", 0), 3)
-=======
-                round(x.get("fetch_meta", {}).get("last_price", 0), 3),
->>>>>>> Stashed changes
-=======
-                round(x.get("fetch_meta", {}).get("last_price", 0), 3),
->>>>>>> Stashed changes
-            ])
-
-        df_crypto = pd.DataFrame(
-            crypto_rows,
-            columns=[
-<<<<<<< Updated upstream
-<<<<<<< Updated upstream
-                "Ticker", "Rank Score", "Astra Score",
-                "Neural", "Momentum", "Technical", "Price"
-            ]
-=======
-=======
->>>>>>> Stashed changes
-                "Ticker",
-                "Rank Score",
-                "Astra Score",
-                "Neural",
-                "Momentum",
-                "Technical",
-                "Price",
-            ],
-<<<<<<< Updated upstream
->>>>>>> Stashed changes
-=======
->>>>>>> Stashed changes
-        )
-        st.dataframe(df_crypto, use_container_width=True, hide_index=True)
+        @st.fragment(run_every=REFRESH_SECONDS)
+        def _live_tables():
+            snap = store.read_latest(mode)
+            if not snap:
+                st.info("Waiting for the first scan snapshot…")
+                return
+
+            _render_snapshot_status(snap, st.empty())
+            st.markdown("## 📈 Stocks")
+            stock_slot = st.empty()
+            st.markdown("## 🪙 Crypto")
+            crypto_slot = st.empty()
+            _render_tables(snap.get("ranked", []), stock_slot, crypto_slot)
+
+        _live_tables()
 
     # RIGHT — Chart
     with right:
@@ -171,12 +155,9 @@ def render_predictions():
             st.info("Select a ticker from the table to display chart.")
             return
 
-        df = guardian.safe_run(universe.fetch_and_clean, selected)
-        if df is None:
+        df = guardian.safe_run(lambda: fetch_unified(selected))
+        if df is None or df.empty:
             st.error("Chart data fetch failed")
             return
 
-    chart_html = guardian.safe_run(render_chart_html, selected, df)
-    if chart_html:
-        st.components.v1.html(chart_html, height=500, scrolling=False)
-
+        guardian.safe_run(lambda: chart_engine.render_chart(df, f"{selected} — Prediction Chart"))
@@ -3,14 +3,19 @@ Astra Intelligence – System Health Monitor (Phase-90)
 -----------------------------------------------------
 Displays live system status from GuardianV6 and IntegrityBuilder.
 Provides visibility into uptime, repair activity, and health metrics.
+Scan pipeline metrics (per-stage latency, throughput, provider calls)
+come from astra_logs/scan_metrics.jsonl.
 """
 
 import os
 import time
 from datetime import datetime
+import pandas as pd
 import streamlit as st
 from pathlib import Path
 
+from astra_modules.engine.scan_metrics import read_metrics, PERCENTILES
+
 
 def read_last_lines(filepath, n=10):
     """Read the last N lines of a log file safely."""
@@ -32,6 +37,49 @@ def parse_repair_log(log_lines):
     return total_repairs, last_entry
 
 
+def render_scan_metrics(history=50):
+    """Latest scan's per-stage latencies + throughput history."""
+    st.subheader("Scan Pipeline Metrics")
+    runs = read_metrics(limit=history)
+    if not runs:
+        st.info("No scan metrics recorded yet.")
+        return
+
+    last = runs[-1]
+    calls = last.get("provider_calls", {})
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Tickers / sec", f"{last.get('tickers_per_sec', 0):.2f}")
+    col2.metric("Scan Wall Time", f"{last.get('wall_s', 0):.1f}s")
+    col3.metric("Tickers", last.get("tickers", 0))
+    col4.metric("Provider Calls", sum(calls.values()))
+
+    rows = [
+        {
+            "Stage": stage,
+            "Count": s.get("count", 0),
+            **{f"p{p} (ms)": round(s.get(f"p{p}_ms", 0.0), 1) for p in PERCENTILES},
+            "Max (ms)": round(s.get("max_ms", 0.0), 1),
+            "Total (s)": round(s.get("total_ms", 0.0) / 1000.0, 2),
+        }
+        for stage, s in last.get("stages", {}).items()
+    ]
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    if calls:
+        st.caption("Provider calls: " + " · ".join(f"{k}={v}" for k, v in sorted(calls.items())))
+
+    if len(runs) > 1:
+        trend = pd.DataFrame({
+            "time": [datetime.fromtimestamp(r.get("timestamp", 0)) for r in runs],
+            "tickers/sec": [r.get("tickers_per_sec", 0) for r in runs],
+        }).set_index("time")
+        st.line_chart(trend)
+
+    with st.expander("🐢 Slowest Tickers (last scan)"):
+        st.dataframe(pd.DataFrame(last.get("slowest", [])), use_container_width=True, hide_index=True)
+
+
 def render_system_health():
     """Render the system health dashboard for Guardian + Integrity."""
     base_path = os.path.dirname(__file__)
@@ -71,6 +119,11 @@ def render_system_health():
     with st.expander("📋 View Integrity Log"):
         st.text("\n".join(repair_lines))
 
+    # ----------------------------------------------------------------
+    # Scan Pipeline Metrics
+    # ----------------------------------------------------------------
+    render_scan_metrics()
+
     # ----------------------------------------------------------------
     # Summary Footer
     # ----------------------------------------------------------------
@@ -1,10 +1,4 @@
-<<<<<<< Updated upstream
-<<<<<<< Updated upstream
 # Universe module init
-=======
->>>>>>> Stashed changes
-=======
->>>>>>> Stashed changes
-from .universe_builder import UniverseBuilder
+from .universe_builder import UniverseBuilder, build_universe
 
-__all__ = ["UniverseBuilder"]
+__all__ = ["UniverseBuilder", "build_universe"]
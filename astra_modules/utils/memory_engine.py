@@ -1,8 +1,20 @@
 """
 Astra Intelligence — Rolling Learning Memory Engine (90-Day Window)
 Stores scan results, rankings, forecasts, and summaries in a rotating
-JSON memory file. Automatically prunes entries older than 90 days
-and condenses repeated patterns to improve Astra’s internal learning.
+memory. Automatically prunes entries older than 90 days and condenses
+repeated patterns to improve Astra’s internal learning.
+
+Storage (Phase-100):
+ • one append-only JSONL segment per UTC day:
+       astra_memory_segments/YYYY-MM-DD.jsonl   (project root)
+   add_event() appends one line — no file rewrites
+ • pruning drops whole segments older than MAX_DAYS (file delete +
+   per-symbol popleft), at most once per PRUNE_INTERVAL
+ • per-symbol in-memory index with running aggregates →
+   get_history() is one dict hit, summarize_symbol() is O(1)
+
+Legacy astra_memory.json "entries" are imported once into segments
+(the file itself is left untouched — other modules share it).
 
 Works with:
 - Smart Scan
@@ -13,45 +25,180 @@ Works with:
 """
 
 import json
-import os
+import threading
 import time
-from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from pathlib import Path
 
-MEMORY_PATH = "astra_memory.json"
+MEMORY_DIR = "astra_memory_segments"
+LEGACY_FILE = "astra_memory.json"
 MAX_DAYS = 90   # rolling window
+PRUNE_INTERVAL = 3600
+RECENT = 3      # forecasts / summaries returned by summarize_symbol
+
+
+def _get_memory_dir() -> Path:
+    """Directory of day-segmented memory files (astra_memory_segments/)."""
+    return Path(__file__).resolve().parents[2] / MEMORY_DIR
+
+
+def _day(ts) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _num(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# ----------------------------------------------------------
+# PER-SYMBOL INDEX ENTRY
+# ----------------------------------------------------------
+class _SymbolMemory:
+    """Entries of one symbol (oldest first) + running aggregates."""
+
+    __slots__ = ("entries", "scan_count", "buy_sum", "conf_sum",
+                 "rank_count", "rank_sum", "forecasts", "summaries")
+
+    def __init__(self):
+        self.entries = deque()
+        self.scan_count = 0
+        self.buy_sum = 0.0
+        self.conf_sum = 0.0
+        self.rank_count = 0
+        self.rank_sum = 0.0
+        self.forecasts = deque()
+        self.summaries = deque()
+
+    def add(self, e):
+        self.entries.append(e)
+        t, p = e["event_type"], e.get("payload") or {}
+        if t == "scan":
+            self.scan_count += 1
+            self.buy_sum += _num(p.get("buy_score"))
+            self.conf_sum += _num(p.get("confidence"))
+        elif t == "ranking":
+            self.rank_count += 1
+            self.rank_sum += _num(p.get("final_score"))
+        elif t == "forecast":
+            self.forecasts.append(p)
+        elif t == "summary":
+            self.summaries.append(p)
+
+    def drop_oldest(self):
+        """Undo add() for the oldest entry (segments expire oldest first)."""
+        e = self.entries.popleft()
+        t, p = e["event_type"], e.get("payload") or {}
+        if t == "scan":
+            self.scan_count -= 1
+            self.buy_sum -= _num(p.get("buy_score"))
+            self.conf_sum -= _num(p.get("confidence"))
+        elif t == "ranking":
+            self.rank_count -= 1
+            self.rank_sum -= _num(p.get("final_score"))
+        elif t == "forecast":
+            self.forecasts.popleft()
+        elif t == "summary":
+            self.summaries.popleft()
 
 
 class MemoryEngine:
 
-    def __init__(self, path: str = MEMORY_PATH):
-        self.path = path
-        self.data = self._load()
+    def __init__(self, path=None, max_days: int = MAX_DAYS):
+        self.path = Path(path) if path else _get_memory_dir()
+        self.max_days = max_days
+        self._lock = threading.RLock()
+        self._segments = OrderedDict()     # day -> {symbol: n entries}
+        self._index = {}                   # SYMBOL -> _SymbolMemory
+        self._last_prune = 0.0
+
+        if self.path.exists():
+            self._load()
+        else:
+            self._import_legacy()
+        self.prune(force=True)
 
     # ----------------------------------------------------------
     # LOAD / SAVE
     # ----------------------------------------------------------
+    def _segment_path(self, day):
+        return self.path / f"{day}.jsonl"
+
+    def _index_entry(self, e):
+        day = _day(e["timestamp"])
+        sym = str(e["symbol"]).upper()
+        counts = self._segments.get(day)
+        if counts is None:
+            # Compare with the newest day *before* inserting this one
+            out_of_order = bool(self._segments) and day < next(reversed(self._segments))
+            counts = self._segments[day] = {}
+            if out_of_order:
+                # Out-of-order day (legacy import): keep segments sorted
+                self._segments = OrderedDict(sorted(self._segments.items()))
+        counts[sym] = counts.get(sym, 0) + 1
+        mem = self._index.get(sym)
+        if mem is None:
+            mem = self._index[sym] = _SymbolMemory()
+        mem.add(e)
+
     def _load(self):
-        if not os.path.exists(self.path):
-            return {"entries": []}
+        for seg in sorted(self.path.glob("*.jsonl")):
+            try:
+                with seg.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            self._index_entry(json.loads(line))
+                        except (ValueError, KeyError, TypeError):
+                            continue
+            except OSError as e:
+                print(f"[memory_engine] failed to read {seg.name}: {e}")
+
+    def _import_legacy(self):
+        legacy = self.path.with_name(LEGACY_FILE)
+        if not legacy.exists():
+            return
         try:
-            with open(self.path, "r") as f:
-                return json.load(f)
+            with legacy.open("r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", [])
         except Exception:
-            return {"entries": []}
+            return
 
-    def _save(self):
-        with open(self.path, "w") as f:
-            json.dump(self.data, f, indent=2)
+        by_day = OrderedDict()
+        for e in sorted((e for e in entries if isinstance(e, dict) and "timestamp" in e),
+                        key=lambda e: e["timestamp"]):
+            by_day.setdefault(_day(e["timestamp"]), []).append(e)
+        if by_day:
+            self.path.mkdir(parents=True, exist_ok=True)
+        for day, rows in by_day.items():
+            with self._segment_path(day).open("a", encoding="utf-8") as f:
+                f.writelines(json.dumps(e, default=str) + "\n" for e in rows)
+            for e in rows:
+                self._index_entry(e)
 
     # ----------------------------------------------------------
-    # PRUNE OLD ENTRIES
+    # PRUNE OLD SEGMENTS
     # ----------------------------------------------------------
-    def prune(self):
-        cutoff = time.time() - (MAX_DAYS * 86400)
-        self.data["entries"] = [
-            e for e in self.data["entries"] if e["timestamp"] >= cutoff
-        ]
-        self._save()
+    def prune(self, force=False):
+        now = time.time()
+        if not force and now - self._last_prune < PRUNE_INTERVAL:
+            return
+        cutoff = _day(now - self.max_days * 86400)
+        with self._lock:
+            self._last_prune = now
+            while self._segments:
+                day = next(iter(self._segments))
+                if day >= cutoff:
+                    break
+                for sym, n in self._segments.pop(day).items():
+                    mem = self._index[sym]
+                    for _ in range(n):
+                        mem.drop_oldest()
+                    if not mem.entries:
+                        del self._index[sym]
+                self._segment_path(day).unlink(missing_ok=True)
 
     # ----------------------------------------------------------
     # ADD NEW LEARNING EVENT
@@ -72,53 +219,56 @@ class MemoryEngine:
             "timestamp": time.time(),
         }
 
-        self.data["entries"].append(entry)
-        self.prune()
-        self._save()
+        with self._lock:
+            try:
+                self.path.mkdir(parents=True, exist_ok=True)
+                with self._segment_path(_day(entry["timestamp"])).open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            except OSError as e:
+                print(f"[memory_engine] write failed: {e}")
+            self._index_entry(entry)
+            self.prune()
+        return entry
 
     # ----------------------------------------------------------
     # GET SYMBOL HISTORY (FOR LEARNING)
     # ----------------------------------------------------------
     def get_history(self, symbol):
-        return [
-            e for e in self.data["entries"]
-            if e["symbol"].upper() == symbol.upper()
-        ]
+        with self._lock:
+            mem = self._index.get(str(symbol).upper())
+            return list(mem.entries) if mem else []
+
+    def symbols(self):
+        with self._lock:
+            return list(self._index)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(m.entries) for m in self._index.values())
 
     # ----------------------------------------------------------
     # PATTERN CONDENSATION
-    # Reduces noise + enhances learning
+    # Reduces noise + enhances learning (running aggregates, O(1))
     # ----------------------------------------------------------
     def summarize_symbol(self, symbol):
-        hist = self.get_history(symbol)
-        if not hist:
-            return None
-
-        scans = []
-        ranks = []
-        forecasts = []
-        summaries = []
-
-        for e in hist:
-            t = e["event_type"]
-            p = e["payload"]
-            if t == "scan":
-                scans.append(p)
-            elif t == "ranking":
-                ranks.append(p)
-            elif t == "forecast":
-                forecasts.append(p)
-            elif t == "summary":
-                summaries.append(p)
+        with self._lock:
+            mem = self._index.get(str(symbol).upper())
+            if mem is None:
+                return None
+            return self._summary(symbol, mem)
 
+    @staticmethod
+    def _summary(symbol, mem):
+        forecasts = mem.forecasts
+        summaries = mem.summaries
         return {
             "symbol": symbol,
-            "scan_count": len(scans),
-            "avg_buy_score": sum([s.get("buy_score", 0) for s in scans]) / max(1, len(scans)),
-            "avg_confidence": sum([s.get("confidence", 0) for s in scans]) / max(1, len(scans)),
-            "avg_ranking": sum([r.get("final_score", 0) for r in ranks]) / max(1, len(ranks)),
-            "forecasts": forecasts[-3:],    # last 3 forecasts
-            "summaries": summaries[-3:],    # last 3 summaries
+            "scan_count": mem.scan_count,
+            "avg_buy_score": mem.buy_sum / max(1, mem.scan_count),
+            "avg_confidence": mem.conf_sum / max(1, mem.scan_count),
+            "avg_ranking": mem.rank_sum / max(1, mem.rank_count),
+            "forecasts": [forecasts[i] for i in range(max(0, len(forecasts) - RECENT), len(forecasts))],
+            "summaries": [summaries[i] for i in range(max(0, len(summaries) - RECENT), len(summaries))],
         }
 
 
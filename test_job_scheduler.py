@@ -0,0 +1,129 @@
+"""
+JobScheduler Harness
+----------------------------------------------------
+CronTrigger.next_after across field rollovers, overlap
+prevention for slow jobs, and the three catch-up policies
+replaying fires missed while the process was down.
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from astra_modules.system.job_scheduler import (  # noqa: E402
+    CronTrigger,
+    IntervalTrigger,
+    JobScheduler,
+)
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def _raises(exc, fn):
+    try:
+        fn()
+    except exc:
+        return True
+    return False
+
+
+def _wait_for(cond, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_cron_next_after():
+    every_15 = CronTrigger("*/15 * * * *")
+    assert every_15.next_after(_utc(2025, 6, 6, 10, 7, 30)) == _utc(2025, 6, 6, 10, 15)
+    assert every_15.next_after(_utc(2025, 6, 6, 10, 15)) == _utc(2025, 6, 6, 10, 30)    # strictly after
+    assert every_15.next_after(_utc(2025, 6, 6, 23, 50)) == _utc(2025, 6, 7, 0, 0)
+
+    weekdays = CronTrigger("0 9 * * 1-5")
+    assert weekdays.next_after(_utc(2025, 6, 6, 10, 0)) == _utc(2025, 6, 9, 9, 0)      # Fri → Mon
+
+    assert CronTrigger("@monthly").next_after(_utc(2025, 12, 31, 12, 0)) == _utc(2026, 1, 1, 0, 0)
+    assert CronTrigger("30 3 * * 7").next_after(_utc(2025, 6, 6, 0, 0)) == _utc(2025, 6, 8, 3, 30)
+
+    # Both day fields restricted: either matches (13th or a Friday)
+    either = CronTrigger("0 0 13 * 5")
+    assert either.next_after(_utc(2025, 6, 1, 0, 0)) == _utc(2025, 6, 6, 0, 0)
+    assert either.next_after(_utc(2025, 6, 10, 0, 0)) == _utc(2025, 6, 13, 0, 0)
+
+    assert _raises(ValueError, lambda: CronTrigger("* * *"))
+    assert _raises(ValueError, lambda: CronTrigger("61 * * * *"))
+    assert _raises(ValueError, lambda: CronTrigger("0 0 30 2 *").next_after(_utc(2025, 1, 1)))
+
+
+def test_running_job_is_skipped_not_queued():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.3)
+        with lock:
+            active[0] -= 1
+
+    scheduler = JobScheduler(max_workers=4, persist=False)
+    job = scheduler.add_job("slow", slow, IntervalTrigger(0.05), run_now=True)
+    scheduler.start()
+    try:
+        assert _wait_for(lambda: job.runs >= 2)
+    finally:
+        scheduler.stop()
+    assert peak[0] == 1
+    assert job.skipped > 0
+
+
+def test_catch_up_after_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = Path(tmp) / "scheduler_state.json"
+        last = time.time() - 600.5       # ten 60s fires missed while down
+        state_path.write_text(json.dumps({"coalesce": last, "all": last, "skip": last}))
+
+        calls = {"coalesce": 0, "all": 0, "skip": 0}
+
+        def bump(name):
+            calls[name] += 1
+
+        scheduler = JobScheduler(max_workers=3, state_path=state_path)
+        jobs = {
+            policy: scheduler.add_job(policy, bump, IntervalTrigger(60), args=(policy,), catch_up=policy, grace=5)
+            for policy in calls
+        }
+        scheduler.start()
+        try:
+            assert _wait_for(lambda: jobs["all"].runs == 10 and jobs["coalesce"].runs == 1
+                             and jobs["skip"].missed == 10)
+        finally:
+            scheduler.stop()
+
+        assert calls == {"coalesce": 1, "all": 10, "skip": 0}
+        assert jobs["coalesce"].missed == 9 and jobs["all"].missed == 0
+        for job in jobs.values():
+            assert job.next_base > time.time()
+        saved = json.loads(state_path.read_text())
+        assert saved["coalesce"] > last and saved["skip"] == last
+
+
+if __name__ == "__main__":
+    test_cron_next_after()
+    test_running_job_is_skipped_not_queued()
+    test_catch_up_after_restart()
+    print("✅ job scheduler OK")
@@ -0,0 +1,137 @@
+"""
+LearningStore Harness
+----------------------------------------------------
+Batched commits, failed-flush recovery, nested JSON columns,
+the row-id cursor and the closed-store guard, on a throwaway
+SQLite file.
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from astra_modules.learning.learning_store import LearningStore, LearningStoreClosed  # noqa: E402
+
+
+class _FailingConnection:
+    """Wraps a sqlite3 connection; the next `fail` executemany calls raise."""
+
+    def __init__(self, conn, fail=1):
+        self._conn = conn
+        self.fail = fail
+
+    def executemany(self, *args, **kwargs):
+        if self.fail:
+            self.fail -= 1
+            raise sqlite3.OperationalError("disk I/O error (simulated)")
+        return self._conn.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _raises(exc, fn):
+    try:
+        fn()
+    except exc:
+        return True
+    return False
+
+
+def _store(work, **kwargs):
+    kwargs.setdefault("flush_seconds", 3600)
+    return LearningStore(Path(work) / "learning.db", **kwargs)
+
+
+def test_records_commit_in_batches():
+    with tempfile.TemporaryDirectory() as work:
+        store = _store(work, batch_size=3)
+        store.add_records({"ticker": f"T{i}", "close": i} for i in range(2))
+        assert len(store._pending) == 2
+        store.add_record({"ticker": "T2", "close": 2})
+        assert store._pending == []
+        assert [r["ticker"] for r in store.load()] == ["T0", "T1", "T2"]
+        store.close()
+
+
+def test_failed_flush_keeps_the_batch():
+    with tempfile.TemporaryDirectory() as work:
+        store = _store(work)
+        store.add_records({"ticker": f"T{i}", "close": i, "new_column": i} for i in range(3))
+        store._conn = _FailingConnection(store._conn)
+
+        assert _raises(sqlite3.OperationalError, store.flush)
+        assert [r["ticker"] for r in store._pending] == ["T0", "T1", "T2"]
+
+        store.add_record({"ticker": "T3", "close": 3})
+        assert store.flush() == 4
+        assert [r["ticker"] for r in store.load()] == ["T0", "T1", "T2", "T3"]
+        store.close()
+
+
+def test_failed_auto_flush_does_not_raise():
+    with tempfile.TemporaryDirectory() as work:
+        store = _store(work, batch_size=2)
+        store._conn = _FailingConnection(store._conn)
+        store.add_record({"ticker": "A", "close": 1})
+        store.add_record({"ticker": "B", "close": 2})     # auto-flush fails, batch kept
+        assert len(store._pending) == 2
+        assert store.count() == 2
+        store.close()
+
+
+def test_nested_values_round_trip():
+    with tempfile.TemporaryDirectory() as work:
+        store = _store(work)
+        store.add_record({"ticker": "A", "context": {"grade": "A+", "vector": [1, 2]}})
+        store.close()
+
+        reopened = _store(work)
+        (row,) = reopened.load()
+        assert row["context"] == {"grade": "A+", "vector": [1, 2]}
+        reopened.close()
+
+
+def test_after_id_returns_late_rows():
+    with tempfile.TemporaryDirectory() as work:
+        store = _store(work)
+        store.add_records({"ticker": f"T{i}"} for i in range(3))
+        first = store.load(as_dataframe=True, columns=["id", "ticker"])
+        last_id = int(first["id"].max())
+
+        store.add_record({"ticker": "LATE"})
+        store._pending[-1]["timestamp"] -= 3600     # committed late, older timestamp
+        later = store.load(as_dataframe=True, columns=["id", "ticker"], after_id=last_id)
+        assert later["ticker"].tolist() == ["LATE"]
+        store.close()
+
+
+def test_closed_store_raises_clearly():
+    with tempfile.TemporaryDirectory() as work:
+        store = _store(work)
+        store.add_record({"ticker": "A"})
+        store.close()
+        assert store._conn is None
+
+        for call in (lambda: store.add_record({"ticker": "B"}), store.load, store.count):
+            assert _raises(LearningStoreClosed, call)
+        store.close()   # idempotent
+
+        reopened = _store(work)
+        assert reopened.count() == 1
+        reopened.close()
+
+
+if __name__ == "__main__":
+    test_records_commit_in_batches()
+    test_failed_flush_keeps_the_batch()
+    test_failed_auto_flush_does_not_raise()
+    test_nested_values_round_trip()
+    test_after_id_returns_late_rows()
+    test_closed_store_raises_clearly()
+    print("✅ learning store OK")
@@ -0,0 +1,102 @@
+"""
+ModelRegistry Harness
+----------------------------------------------------
+Versioned saves, promotion (CURRENT.json) and what load()
+resolves to, pruning that spares the promoted version,
+metadata compatibility checks, the shared load cache and
+checksum verification — on a throwaway registry root.
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from astra_modules.agents.model_registry import (  # noqa: E402
+    CURRENT_FILE,
+    WEIGHTS_FILE,
+    ModelRegistry,
+    ModelRegistryError,
+    schema_hash,
+)
+
+
+def _state(value):
+    return {"w": np.full((2, 3), value, dtype=np.float32), "steps": np.array([int(value)], dtype=np.int64)}
+
+
+def _raises(exc, fn):
+    try:
+        fn()
+    except exc:
+        return True
+    return False
+
+
+def test_promotion_decides_what_load_returns():
+    with tempfile.TemporaryDirectory() as tmp:
+        reg = ModelRegistry(root=tmp)
+        assert _raises(ModelRegistryError, lambda: reg.load("neural"))
+
+        v1 = reg.save("neural", _state(1), metrics={"acc": 0.6})
+        v2 = reg.save("neural", _state(2))
+        assert (v1, v2) == (1, 2)
+        assert reg.current_version("neural") is None
+        assert reg.load("neural")[1]["version"] == 2            # nothing promoted → newest
+
+        reg.promote("neural", 1)
+        state, meta = reg.load("neural")
+        assert meta["version"] == 1 and meta["metrics"] == {"acc": 0.6}
+        assert np.array_equal(state["w"], np.ones((2, 3))) and state["steps"].dtype == np.int64
+
+        v3 = reg.save("neural", _state(3), promote=True)
+        current = json.loads((Path(tmp) / "neural" / CURRENT_FILE).read_text())
+        assert current["version"] == v3 and current["previous"] == 1
+        assert reg.load("neural")[1]["version"] == 3
+
+        assert _raises(ModelRegistryError, lambda: reg.promote("neural", 42))
+        assert reg.current_version("neural") == 3
+
+
+def test_prune_keeps_the_promoted_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        reg = ModelRegistry(root=tmp, keep=2)
+        reg.save("neural", _state(1), promote=True)
+        for i in range(2, 6):
+            reg.save("neural", _state(i))
+        assert reg.list_versions("neural") == [1, 4, 5]
+        assert reg.load("neural")[1]["version"] == 1
+
+
+def test_expect_cache_and_checksum():
+    with tempfile.TemporaryDirectory() as tmp:
+        reg = ModelRegistry(root=tmp)
+        features = ["rsi", "macd", "volume"]
+        reg.save("neural", _state(1), meta={"input_dim": 3, "feature_schema": features})
+
+        state, meta = reg.load("neural", expect={"input_dim": 3, "schema_hash": schema_hash(features)})
+        again, _ = reg.load("neural")
+        assert again["w"] is state["w"]                          # one shared weight set
+        assert reg.cache_stats() == {"cached": 1, "hits": 1, "misses": 1}
+        assert _raises(ModelRegistryError, lambda: reg.load("neural", expect={"input_dim": 4}))
+        reg.load("neural", expect={"input_dim": None, "unknown": 1})
+
+        weights = Path(tmp) / "neural" / "v000001" / WEIGHTS_FILE
+        raw = bytearray(weights.read_bytes())
+        raw[-1] ^= 0xFF
+        weights.write_bytes(bytes(raw))
+        reg.clear_cache()
+        assert _raises(ModelRegistryError, lambda: reg.load("neural", verify=True))
+
+
+if __name__ == "__main__":
+    test_promotion_decides_what_load_returns()
+    test_prune_keeps_the_promoted_version()
+    test_expect_cache_and_checksum()
+    print("✅ model registry OK")
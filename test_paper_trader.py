@@ -0,0 +1,91 @@
+"""
+PaperTrader Tick Harness
+----------------------------------------------------
+on_tick() over long and short positions: stop / target /
+expiry close-outs at the tick price, positions without a
+price left open, realized PnL, closed-slot reuse and the
+ReplayBuffer samples written for closed trades.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from astra_modules.learning.paper_trader import SHORT, PaperTrader  # noqa: E402
+from astra_modules.learning.replay_buffer import ReplayBuffer  # noqa: E402
+
+T0 = 1_000_000.0
+
+
+def _trader():
+    trader = PaperTrader(ReplayBuffer(capacity=64, feature_dim=3), capacity=2)
+    trader.register_symbols(["AAA", "BBB", "CCC", "DDD"])
+    return trader
+
+
+def test_stops_targets_and_expiry():
+    trader = _trader()
+    ids = trader.open_trades(
+        ["AAA", "BBB", "CCC", "DDD"], [100.0, 100.0, 100.0, 100.0],
+        sides=[1, 1, SHORT, 1],
+        stops=[95.0, 95.0, 105.0, np.nan],
+        targets=[110.0, 110.0, 90.0, np.nan],
+        max_minutes=[np.inf, np.inf, np.inf, 10.0],
+        now=T0,
+    )
+    assert (ids > 0).all() and trader.summary()["open"] == 4
+
+    # AAA hits its stop, CCC (short) its stop, BBB / DDD stay open
+    res = trader.on_tick([94.0, 101.0, 106.0, 100.0], now=T0 + 60)
+    assert (res["stop"], res["target"], res["expiry"]) == (2, 0, 0)
+    assert res["open"] == 2
+
+    # DDD has no price this tick: past its expiry but left open
+    res = trader.on_tick({"BBB": 112.0}, now=T0 + 11 * 60)
+    assert (res["stop"], res["target"], res["expiry"]) == (0, 1, 0)
+    res = trader.on_tick({"DDD": 103.0}, now=T0 + 11 * 60)
+    assert res["expiry"] == 1 and res["open"] == 0
+
+    closed = {t["ticker"]: t for t in trader.get_closed_positions()}
+    assert {t: c["reason"] for t, c in closed.items()} == {
+        "AAA": "stop", "CCC": "stop", "BBB": "target", "DDD": "expiry",
+    }
+    assert closed["AAA"]["exit"] == 94.0 and closed["CCC"]["pnl"] == -6.0
+    assert np.isclose(trader.realized_pnl, -6.0 - 6.0 + 12.0 + 3.0)
+
+
+def test_mark_without_close_and_slot_reuse():
+    trader = _trader()
+    trader.open_trades(["AAA", "BBB"], [50.0, 20.0], stops=[40.0, 10.0], now=T0)
+    res = trader.on_tick([55.0, 18.0], now=T0 + 1)
+    assert res["open"] == 2 and np.isclose(res["unrealized_pnl"], 5.0 - 2.0)
+
+    trader.on_tick([39.0, 18.0], now=T0 + 2)
+    trader.open_trades(["CCC"], [10.0], now=T0 + 3)
+    assert trader._high == 2            # the freed slot was reused, nothing grew
+    assert sorted(p["ticker"] for p in trader.get_open_positions()) == ["BBB", "CCC"]
+
+
+def test_closed_trades_feed_the_replay_buffer():
+    trader = _trader()
+    contexts = [{"neural_vector": [1, 2, 3], "prediction": 0.8}, {"neural_vector": [4, 5, 6]}, {}]
+    trader.open_trades(["AAA", "BBB", "CCC"], 100.0, stops=95.0, targets=105.0, contexts=contexts, now=T0)
+    trader.on_tick([106.0, 94.0, 94.0], now=T0 + 1)
+
+    batch = trader.buffer.snapshot()
+    assert batch.size == 2              # CCC carried no vector
+    assert batch.labels.tolist() == [1.0, 0.0]
+    assert batch.outcomes.tolist() == [6.0, -6.0]
+    assert np.isclose(batch.predictions[0], 0.8)
+
+
+if __name__ == "__main__":
+    test_stops_targets_and_expiry()
+    test_mark_without_close_and_slot_reuse()
+    test_closed_trades_feed_the_replay_buffer()
+    print("✅ paper trader OK")
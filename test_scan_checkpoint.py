@@ -0,0 +1,232 @@
+"""
+ScanManager Checkpoint / Resume Harness
+----------------------------------------------------
+Kills a checkpointed universe scan midway (hard exit in a
+child process), restarts it with the same scan ID and checks
+that no already-checkpointed ticker is fetched again and that
+the resumed scan ranks the whole universe.
+
+Also checks that a finished checkpoint is scanned again rather
+than replayed (and deleted), and that fetch failures are retried
+on resume.
+
+Synthetic OHLCV replaces network fetches; every fetch is
+logged per process so refetches can be counted.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent
+TICKERS = [f"T{i:03d}" for i in range(60)]
+KILL_AFTER = 25     # scored tickers before the first run is killed
+
+
+CHILD = r"""
+import json, os, sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, {root!r})
+
+# Scoring is faked below; without torch only AstraPrime's NeuralAgent
+# construction would fail, so give it an inert stand-in
+try:
+    import torch  # noqa: F401
+except ImportError:
+    import types
+    class _NeuralAgent:
+        model_version, checkpoint = 0, None
+        def __init__(self, *args, **kwargs): pass
+        def load(self, *args, **kwargs): return None
+        def predict(self, x): return None
+    stub = types.ModuleType("astra_modules.agents.neural_agent")
+    stub.NeuralAgent = _NeuralAgent
+    sys.modules[stub.__name__] = stub
+
+import astra_modules.engine.scan_manager as sm
+from astra_modules.engine.scan_state import ScanStateStore
+from astra_modules.engine.scan_metrics import ScanMetrics
+
+work, scan_id, kill_after = sys.argv[1], sys.argv[2], int(sys.argv[3])
+failing = set(filter(None, sys.argv[4].split(","))) if len(sys.argv) > 4 else set()
+fetch_log = open(os.path.join(work, f"fetch_{{os.getpid()}}.log"), "a")
+
+def fake_fetch(ticker):
+    fetch_log.write(ticker + "\n"); fetch_log.flush()
+    if ticker in failing:
+        return None
+    rng = np.random.default_rng(int(ticker[1:]))
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, 60))
+    df = pd.DataFrame({{"date": pd.date_range(end="2026-01-02", periods=60), "close": close, "volume": 1e6}})
+    return df, {{"last_price": float(close[-1])}}
+
+sm.fetch_unified = fake_fetch
+manager = sm.ScanManager(fetch_workers=4, score_workers=1, state=ScanStateStore(os.path.join(work, "state.json")),
+                         prefilter=None)
+
+scored = [0]
+def fake_score(ticker, df, meta, stats=None):
+    if kill_after and scored[0] >= kill_after:
+        os._exit(9)      # simulated crash: no cleanup, no finally blocks
+    scored[0] += 1
+    x = float(df["close"].iloc[-1] / df["close"].iloc[0] - 1)
+    return {{"ticker": ticker, "astra_score": x, "agent_scores": {{"momentum": x}}}}
+
+manager.score_stage = fake_score
+manager.metrics = ScanMetrics(os.path.join(work, "metrics.jsonl"))
+ranked = manager.scan_universe({tickers!r}, scan_id=scan_id, checkpoint_root=os.path.join(work, "ckpt"))
+print(json.dumps({{"ranked": [r["ticker"] for r in ranked], "stats": manager.last_scan_stats}}, default=str))
+"""
+
+
+def _run(work, scan_id, kill_after, failing=()):
+    script = CHILD.format(root=str(ROOT), tickers=TICKERS)
+    return subprocess.run(
+        [sys.executable, "-c", script, work, scan_id, str(kill_after), ",".join(failing)],
+        capture_output=True, text=True, cwd=str(ROOT),
+    )
+
+
+def _fetches(work, exclude=()):
+    out = []
+    for p in Path(work).glob("fetch_*.log"):
+        if p.name in exclude:
+            continue
+        out.extend(p.read_text().split())
+    return out
+
+
+def _checkpointed(work, scan_id, status=None):
+    done = set()
+    path = Path(work) / "ckpt" / f"{scan_id}.jsonl"
+    for line in path.read_text().splitlines():
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        if "ticker" in rec and (status is None or rec.get("status") == status):
+            done.add(rec["ticker"])
+    return done
+
+
+def test_killed_scan_resumes_without_refetch():
+    with tempfile.TemporaryDirectory() as work:
+        scan_id = "resume-test"
+
+        # 1) Crash midway
+        first = _run(work, scan_id, KILL_AFTER)
+        assert first.returncode == 9, first.stderr
+        first_logs = {p.name for p in Path(work).glob("fetch_*.log")}
+        checkpointed = _checkpointed(work, scan_id)
+        assert KILL_AFTER <= len(checkpointed) < len(TICKERS)
+
+        # 2) Restart with the same scan ID
+        second = _run(work, scan_id, 0)
+        assert second.returncode == 0, second.stderr
+        result = json.loads(second.stdout.strip().splitlines()[-1])
+
+        refetched = _fetches(work, exclude=first_logs)
+        assert not set(refetched) & checkpointed, "checkpointed tickers were refetched"
+        assert len(refetched) == len(set(refetched)), "ticker fetched twice in the resumed run"
+        assert sorted(result["ranked"]) == sorted(TICKERS)
+        assert result["stats"]["resumed"] == len(checkpointed)
+
+        print(
+            f"killed after {len(checkpointed)} checkpointed tickers, "
+            f"resumed run fetched {len(refetched)} / {len(TICKERS)}"
+        )
+
+
+def test_fetch_failures_are_retried_on_resume():
+    with tempfile.TemporaryDirectory() as work:
+        scan_id = "retry-test"
+        failing = TICKERS[:3]
+
+        first = _run(work, scan_id, KILL_AFTER, failing)
+        assert first.returncode == 9, first.stderr
+        first_logs = {p.name for p in Path(work).glob("fetch_*.log")}
+        failed = _checkpointed(work, scan_id, status="fetch_failed")
+        assert failed == set(failing)
+        settled = _checkpointed(work, scan_id) - failed
+
+        second = _run(work, scan_id, 0)
+        assert second.returncode == 0, second.stderr
+        result = json.loads(second.stdout.strip().splitlines()[-1])
+
+        refetched = set(_fetches(work, exclude=first_logs))
+        assert failed <= refetched, "fetch failures were not retried"
+        assert not refetched & settled
+        assert sorted(result["ranked"]) == sorted(TICKERS)
+        assert result["stats"]["resumed"] == len(settled)
+
+
+def test_complete_checkpoint_is_rescanned():
+    with tempfile.TemporaryDirectory() as work:
+        scan_id = "complete-test"
+
+        first = _run(work, scan_id, 0)
+        assert first.returncode == 0, first.stderr
+        first_logs = {p.name for p in Path(work).glob("fetch_*.log")}
+
+        second = _run(work, scan_id, 0)
+        assert second.returncode == 0, second.stderr
+        result = json.loads(second.stdout.strip().splitlines()[-1])
+
+        assert sorted(_fetches(work, exclude=first_logs)) == sorted(TICKERS)
+        assert sorted(result["ranked"]) == sorted(TICKERS)
+        assert "resumed" not in result["stats"]
+
+
+def test_latest_incomplete_skips_finished_scans():
+    sys.path.insert(0, str(ROOT))
+    from astra_modules.engine.scan_checkpoint import ScanCheckpoint, latest_incomplete
+
+    with tempfile.TemporaryDirectory() as root:
+        assert latest_incomplete("day-", root=root) is None
+
+        interrupted = ScanCheckpoint("day-1", root=root)
+        interrupted.begin(TICKERS)
+        interrupted.record(TICKERS[0], packet={"ticker": TICKERS[0]})
+        interrupted.close()
+
+        finished = ScanCheckpoint("day-2", root=root, keep_finished=True)
+        finished.begin(TICKERS)
+        finished.finish()
+        os.utime(finished.path, (time.time() + 5, time.time() + 5))
+
+        swing = ScanCheckpoint("swing-1", root=root)
+        swing.begin(TICKERS)
+        swing.close()
+
+        assert latest_incomplete("day-", root=root) == "day-1"
+        assert latest_incomplete("day-", root=root, max_age=-1) is None
+
+
+def test_finished_checkpoint_is_deleted():
+    sys.path.insert(0, str(ROOT))
+    from astra_modules.engine.scan_checkpoint import ScanCheckpoint
+
+    with tempfile.TemporaryDirectory() as root:
+        checkpoint = ScanCheckpoint("day-3", root=root)
+        checkpoint.begin(TICKERS)
+        checkpoint.record(TICKERS[0], packet={"ticker": TICKERS[0]})
+        assert checkpoint.path.exists()
+        checkpoint.finish()
+        assert not checkpoint.path.exists()
+        assert not ScanCheckpoint("day-3", root=root).resumed
+
+
+if __name__ == "__main__":
+    test_killed_scan_resumes_without_refetch()
+    test_fetch_failures_are_retried_on_resume()
+    test_complete_checkpoint_is_rescanned()
+    test_latest_incomplete_skips_finished_scans()
+    test_finished_checkpoint_is_deleted()
+    print("✅ checkpoint / resume OK")
@@ -0,0 +1,95 @@
+"""
+ScanStateStore Harness
+----------------------------------------------------
+Concurrent writers sharing one state file (save() merges with
+the file on disk, newest checked_at wins per ticker) and the
+bar-keyed market_closed skip.
+"""
+
+import multiprocessing as mp
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from astra_modules.engine.scan_state import (  # noqa: E402
+    SKIP_MARKET_CLOSED,
+    ScanStateStore,
+    _MARKET_TZ,
+)
+
+
+def _entry(store, ticker, checked_at, tag):
+    store.update(ticker, "2025-06-06", f"h-{tag}", "m", {"ticker": ticker, "by": tag}, checked_at=checked_at)
+
+
+def _write_many(path, worker):
+    """Worker process: its own tickers, one save each."""
+    store = ScanStateStore(path)
+    for i in range(20):
+        _entry(store, f"W{worker}-{i}", 1000 + i, worker)
+        store.save()
+
+
+def _ny(*args):
+    return datetime(*args, tzinfo=_MARKET_TZ).timestamp()
+
+
+def test_save_merges_newest_entry_per_ticker():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "state.json"
+        a, b = ScanStateStore(path), ScanStateStore(path)
+        _entry(a, "X", 100, "a")
+        _entry(a, "Y", 300, "a")
+        _entry(b, "Y", 200, "b")
+        _entry(b, "Z", 100, "b")
+        a.save()
+        b.save()
+
+        merged = ScanStateStore(path).tickers
+        assert {t: e["packet"]["by"] for t, e in merged.items()} == {"X": "a", "Y": "a", "Z": "b"}
+        # b's in-memory view picked up a's entries during its save
+        assert b.get("X")["packet"]["by"] == "a"
+
+
+def test_concurrent_processes_lose_no_ticker():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "state.json"
+        with mp.get_context("spawn").Pool(4) as pool:
+            pool.starmap(_write_many, [(path, w) for w in range(4)])
+        assert len(ScanStateStore(path).tickers) == 80
+
+
+def test_market_closed_skip_follows_the_bar():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScanStateStore(Path(tmp) / "state.json")
+        packet = {"ticker": "AAPL"}
+        store.update("AAPL", "2025-06-06", "h", "m", packet)        # Friday's daily bar
+
+        saturday = _ny(2025, 6, 7, 12, 0)
+        monday_open = _ny(2025, 6, 9, 10, 0)
+        friday_close = _ny(2025, 6, 6, 16, 1)
+        assert store.pre_fetch_skip("AAPL", "m", False, now=saturday) == (SKIP_MARKET_CLOSED, packet)
+        assert store.pre_fetch_skip("AAPL", "m", False, now=friday_close)[0] == SKIP_MARKET_CLOSED
+        assert store.pre_fetch_skip("AAPL", "m", False, now=monday_open) == (None, None)
+
+        # Thursday's bar seen after Friday's close: Friday's bar is due
+        store.update("AAPL", "2025-06-05", "h", "m", packet)
+        assert store.pre_fetch_skip("AAPL", "m", False, now=friday_close) == (None, None)
+
+        # Other model, crypto, or an unparseable stamp → always fetch
+        assert store.pre_fetch_skip("AAPL", "other", False, now=saturday) == (None, None)
+        assert store.pre_fetch_skip("AAPL", "m", True, now=saturday) == (None, None)
+        store.update("AAPL", "not-a-date", "h", "m", packet)
+        assert store.pre_fetch_skip("AAPL", "m", False, now=saturday) == (None, None)
+
+
+if __name__ == "__main__":
+    test_save_merges_newest_entry_per_ticker()
+    test_concurrent_processes_lose_no_ticker()
+    test_market_closed_skip_follows_the_bar()
+    print("✅ scan state OK")
@@ -0,0 +1,103 @@
+"""
+ShardQueue Lease Harness
+----------------------------------------------------
+Shard splitting, exclusive leases across worker processes,
+lease expiry / takeover, release, exhausted shards failing,
+and the coordinator's merged results — on a throwaway
+SQLite file.
+"""
+
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from astra_modules.engine.work_queue import DONE, FAILED, ShardQueue  # noqa: E402
+
+TICKERS = [f"T{i:03d}" for i in range(40)]
+
+
+def _drain(path, worker_id):
+    """Worker process: lease and complete shards until none are left."""
+    queue = ShardQueue(path)
+    got = []
+    while True:
+        shard = queue.lease(worker_id)
+        if shard is None:
+            return got
+        got.append(shard["shard_id"])
+        queue.complete(shard, worker_id, {t: {"ticker": t, "worker": worker_id} for t in shard["tickers"]})
+
+
+def test_workers_never_share_a_shard():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "queue.db"
+        queue = ShardQueue(path)
+        scan_id = queue.submit(TICKERS, shard_size=3)
+        assert queue.progress(scan_id)["total"] == 14
+
+        with mp.get_context("spawn").Pool(4) as pool:
+            leased = pool.starmap(_drain, [(path, f"w{i}") for i in range(4)])
+        shard_ids = [s for got in leased for s in got]
+        assert sorted(shard_ids) == list(range(14))
+
+        assert queue.is_finished(scan_id)
+        assert sorted(queue.results(scan_id)) == TICKERS
+
+
+def test_expired_lease_is_taken_over():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = ShardQueue(Path(tmp) / "queue.db", lease_seconds=0.2)
+        scan_id = queue.submit(TICKERS[:4], shard_size=4)
+
+        first = queue.lease("a")
+        assert queue.lease("b") is None             # still leased to a
+        assert queue.heartbeat(first, "a")
+        time.sleep(0.3)
+
+        second = queue.lease("b")
+        assert second["shard_id"] == first["shard_id"] and second["attempts"] == 2
+        assert not queue.heartbeat(first, "a")
+        assert not queue.complete(first, "a", {"T000": {}})
+        assert queue.complete(second, "b", {t: {} for t in second["tickers"]})
+        assert queue.progress(scan_id)[DONE] == 1
+
+
+def test_release_returns_the_shard():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = ShardQueue(Path(tmp) / "queue.db")
+        queue.submit(TICKERS[:2], shard_size=2)
+        shard = queue.lease("a")
+        queue.release(shard, "a")
+        again = queue.lease("b")
+        assert again["shard_id"] == shard["shard_id"]
+
+
+def test_exhausted_shard_fails_without_a_new_lease():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = ShardQueue(Path(tmp) / "queue.db", lease_seconds=0.1, max_attempts=1)
+        scan_id = queue.submit(TICKERS[:4], shard_size=2)
+        shard = queue.lease("a")
+        done = queue.lease("b")
+        queue.complete(done, "b", {})
+        time.sleep(0.2)
+
+        # a's lease expired on its only attempt: the coordinator sees it fail
+        progress = queue.progress(scan_id)
+        assert progress[FAILED] == 1 and progress[DONE] == 1
+        assert queue.is_finished(scan_id)
+        assert not queue.heartbeat(shard, "a")
+        assert queue.lease("c") is None
+
+
+if __name__ == "__main__":
+    test_workers_never_share_a_shard()
+    test_expired_lease_is_taken_over()
+    test_release_returns_the_shard()
+    test_exhausted_shard_fails_without_a_new_lease()
+    print("✅ shard queue OK")